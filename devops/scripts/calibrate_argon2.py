@@ -0,0 +1,60 @@
+"""Pick Argon2id costs that make one verify take about --target-ms here.
+
+Run on the production instance type; paste the printed lines into the env.
+Existing hashes are upgraded to the new costs the next time each user logs in.
+"""
+
+import argparse
+import time
+
+from argon2 import PasswordHasher
+
+
+def measure_verify_ms(
+    time_cost: int, memory_cost: int, parallelism: int, rounds: int
+) -> float:
+    hasher = PasswordHasher(
+        time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+    )
+    hashed = hasher.hash("calibration-password")
+    start = time.perf_counter()
+    for _ in range(rounds):
+        hasher.verify(hashed, "calibration-password")
+    return (time.perf_counter() - start) * 1000 / rounds
+
+
+def calibrate(target_ms: float, max_memory_kib: int, parallelism: int, rounds: int):
+    """Grow memory first (the costlier dimension for attackers), then time."""
+    memory_cost = 8 * parallelism * 1024
+    time_cost = 1
+    elapsed = measure_verify_ms(time_cost, memory_cost, parallelism, rounds)
+    while elapsed < target_ms and memory_cost * 2 <= max_memory_kib:
+        memory_cost *= 2
+        elapsed = measure_verify_ms(time_cost, memory_cost, parallelism, rounds)
+        print(f"  m={memory_cost} KiB t={time_cost}: {elapsed:.1f} ms")
+    while elapsed < target_ms:
+        time_cost += 1
+        elapsed = measure_verify_ms(time_cost, memory_cost, parallelism, rounds)
+        print(f"  m={memory_cost} KiB t={time_cost}: {elapsed:.1f} ms")
+    return time_cost, memory_cost, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--max-memory-mib", type=int, default=64)
+    parser.add_argument("--parallelism", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    time_cost, memory_cost, elapsed = calibrate(
+        args.target_ms, args.max_memory_mib * 1024, args.parallelism, args.rounds
+    )
+    print(f"# verify takes {elapsed:.1f} ms on this machine")
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST={memory_cost}")
+    print(f"ARGON2_PARALLELISM={args.parallelism}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Fill the database with synthetic users and example rows for load tests.
+
+Rows are generated deterministically from --seed and bulk-loaded with COPY by
+several processes. Passwords come from a small pool hashed once up front
+(with the configured Argon2 costs); user <id> logs in with
+LoadTest-<id % pool-size, 4 digits>!, e.g. LoadTest-0007!. Users are routed
+to DATABASE_SHARD_URLS like signups; run against migrated databases.
+
+The users skip signup, so the login filter in REDIS_URL is invalidated once
+they are loaded: running workers fail open and rebuild it within
+LOGIN_FILTER_RELOAD seconds. Until then logins reach the database, so let
+the rebuild finish before measuring login latency.
+"""
+
+import argparse
+import os
+
+from src.core.config import settings
+from src.db.load_data import load_synthetic_data
+from src.db.sharding import shard_urls
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--examples", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument(
+        "--pool-size", type=int, default=16, help="Distinct password hashes"
+    )
+    parser.add_argument(
+        "--start-id",
+        type=int,
+        help="First user id; defaults to one past the highest existing id",
+    )
+    args = parser.parse_args()
+
+    stats = load_synthetic_data(
+        settings.DATABASE_URL,
+        shard_urls(settings),
+        users=args.users,
+        examples=args.examples,
+        seed=args.seed,
+        processes=args.processes,
+        chunk_size=args.chunk_size,
+        pool_size=args.pool_size,
+        start_id=args.start_id,
+        redis_url=settings.REDIS_URL,
+    )
+    for phase, (rows, seconds) in stats.items():
+        rate = rows / seconds if seconds else float("inf")
+        print(f"{phase:>16}: {rows:>10} rows in {seconds:7.2f} s ({rate:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Manage the user shard layout while the app keeps serving traffic.
+
+Migrate every shard first (alembic -x url=<shard url> upgrade head). Then:
+
+  1. backfill   register existing users in the directory (repeat after step 3
+                when moving off a single database, to catch late signups)
+  2. pin        store the bucket map for the shard count currently deployed
+  3. deploy DATABASE_SHARD_URLS with the new shard appended (routing is
+     unchanged, since the stored map still names the old shards)
+  4. move       copy buckets to the new shards, flip the map, wait for workers
+                to reload it, catch up and delete the old copies
+
+Shards are named by DATABASE_SHARD_URLS (or --shards); the directory is
+DATABASE_URL.
+"""
+
+import argparse
+
+from src.core.bloom import invalidate_shared_filter
+from src.core.config import settings
+from src.db.resharding import backfill_directory, pin_bucket_map, reshard
+from src.db.session import create_db_engine
+from src.db.sharding import shard_urls
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("command", choices=["backfill", "pin", "move"])
+    parser.add_argument(
+        "--shards",
+        default=settings.DATABASE_SHARD_URLS,
+        help="Comma-separated shard URLs, in routing order",
+    )
+    parser.add_argument(
+        "--from-shards",
+        type=int,
+        help="pin: shard count the deployed app routes over today",
+    )
+    parser.add_argument(
+        "--grace",
+        type=float,
+        default=2 * settings.DB_SHARD_MAP_REFRESH,
+        help="move: seconds to wait for workers to reload the bucket map",
+    )
+    args = parser.parse_args()
+
+    settings.DATABASE_SHARD_URLS = args.shards
+    urls = shard_urls(settings) or [settings.DATABASE_URL]
+    directory = create_db_engine()
+    shards = [create_db_engine(url) for url in urls]
+    try:
+        if args.command == "backfill":
+            try:
+                added = backfill_directory(directory, shards)
+            finally:
+                # Sharded workers build the login filter from the directory
+                invalidate_shared_filter(settings.REDIS_URL)
+            print(f"Registered {added} users in the directory")
+        elif args.command == "pin":
+            pinned = pin_bucket_map(
+                directory, settings.DB_SHARD_BUCKETS, args.from_shards or len(urls)
+            )
+            print(f"Stored {pinned} bucket assignments")
+        else:
+            moves = reshard(directory, shards, settings.DB_SHARD_BUCKETS, args.grace)
+            print(f"Moved {len(moves)} of {settings.DB_SHARD_BUCKETS} buckets")
+    finally:
+        for engine in shards + [directory]:
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
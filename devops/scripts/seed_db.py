@@ -1,10 +1,13 @@
+from src.core.bloom import invalidate_shared_filter
+from src.core.config import settings
 from src.core.security import get_password_hash
 from src.db.models.user import User
-from src.db.session import SessionLocal
+from src.db.session import SessionLocal, get_engine
 
 
 def seed_database():
     """Seed database with initial data for development."""
+    get_engine()
     db = SessionLocal()
     test_users = [
         {"email": "admin@example.com", "password": "admin123"},
@@ -19,6 +22,8 @@ def seed_database():
             db.add(user)
     db.commit()
     db.close()
+    # The users skipped signup, so the login filter must be rebuilt
+    invalidate_shared_filter(settings.REDIS_URL)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+"""Prepare the databases before the app starts; safe to run on every replica.
+
+1. wait    Postgres (every shard) and Redis, in parallel, with backoff until
+           --timeout; Redis being down only warns, as the app degrades
+2. migrate each database not at head, one replica at a time (advisory lock);
+           a database at head costs one query
+3. seed    the development accounts, only with --seed
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+import redis
+from seed_db import seed_database
+from sqlalchemy import create_engine, pool
+
+from src.core.config import settings
+from src.db.migrate import advisory_lock, migrate
+from src.db.sharding import shard_urls
+from src.utils.startup import wait_for
+
+
+def database_urls():
+    urls = [settings.DATABASE_URL]
+    for url in shard_urls(settings):
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+
+def check_postgres(url: str) -> None:
+    psycopg2.connect(url, connect_timeout=5).close()
+
+
+def check_redis() -> None:
+    client = redis.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=5)
+    try:
+        client.ping()
+    finally:
+        client.close()
+
+
+def report(phase: str, seconds: float, detail: str = "") -> None:
+    print(f"{phase:<24} {seconds:7.2f} s  {detail}".rstrip(), flush=True)
+
+
+def wait_for_services(timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    waits = {
+        f"postgres {index}": (lambda url=url: check_postgres(url))
+        for index, url in enumerate(database_urls())
+    }
+    waits["redis"] = check_redis
+    with ThreadPoolExecutor(len(waits)) as executor:
+        futures = {
+            name: executor.submit(wait_for, name, check, deadline)
+            for name, check in waits.items()
+        }
+    ready = True
+    for name, future in futures.items():
+        try:
+            report(f"wait {name}", future.result())
+        except TimeoutError as e:
+            if name == "redis":
+                report(f"wait {name}", timeout, f"starting degraded: {e}")
+            else:
+                report(f"wait {name}", timeout, f"FAILED: {e}")
+                ready = False
+    return ready
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=60.0, help="Seconds to wait for services"
+    )
+    parser.add_argument(
+        "--seed", action="store_true", help="Create the development accounts"
+    )
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    if not wait_for_services(args.timeout):
+        sys.exit("Postgres is not reachable; not starting")
+
+    for index, url in enumerate(database_urls()):
+        phase_started = time.monotonic()
+        outcome = migrate(url)
+        report(f"migrate postgres {index}", time.monotonic() - phase_started, outcome)
+
+    if args.seed:
+        phase_started = time.monotonic()
+        engine = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+        # Replicas seeding together would race on the unique email index
+        with advisory_lock(engine):
+            seed_database()
+        engine.dispose()
+        report("seed", time.monotonic() - phase_started)
+
+    report("total", time.monotonic() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,8 @@
 #!/bin/bash
 set -e
 
-echo "Waiting for database..."
-python devops/scripts/wait_for_db.py
-
-echo "Running migrations..."
-alembic upgrade head
-
-echo "Seeding database..."
-python devops/scripts/seed_db.py
+# Waits for Postgres and Redis, migrates if needed and seeds when SEED_DB is set
+python devops/scripts/startup.py ${SEED_DB:+--seed}
 
 echo "Starting application..."
 uvicorn src.main:app --host $HOST --port $PORT --reload
@@ -1,26 +0,0 @@
-import os
-import time
-
-import psycopg2
-
-from src.core.config import settings
-
-
-def wait_for_db():
-    while True:
-        try:
-            conn = psycopg2.connect(
-                dbname=os.getenv("POSTGRES_DB"),
-                user=os.getenv("POSTGRES_USER"),
-                password=os.getenv("POSTGRES_PASSWORD"),
-                host=os.getenv("POSTGRES_HOST"),
-            )
-            conn.close()
-            break
-        except psycopg2.OperationalError:
-            print("Waiting for database...")
-            time.sleep(1)
-
-
-if __name__ == "__main__":
-    wait_for_db()
@@ -10,8 +10,10 @@ import sys
 config = context.config
 fileConfig(config.config_file_name)
 
-# ✅ Read database URL from environment
-DATABASE_URL = settings.DATABASE_URL
+# ✅ Read database URL from environment; migrate a shard with -x url=<shard url>
+DATABASE_URL = context.get_x_argument(as_dictionary=True).get(
+    "url", settings.DATABASE_URL
+)
 
 if not DATABASE_URL:
     raise ValueError("❌ DATABASE_URL environment variable is not set!")
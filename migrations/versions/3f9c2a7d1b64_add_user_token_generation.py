@@ -0,0 +1,31 @@
+"""add user token generation
+
+Revision ID: 3f9c2a7d1b64
+Revises: 62af5c82d8c9
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3f9c2a7d1b64"
+down_revision = "62af5c82d8c9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A constant server default makes this a metadata-only change in Postgres
+    op.add_column(
+        "users",
+        sa.Column(
+            "token_generation", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "token_generation")
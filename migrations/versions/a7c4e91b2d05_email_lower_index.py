@@ -0,0 +1,110 @@
+"""case-insensitive email index, drop duplicate primary key indexes
+
+Revision ID: a7c4e91b2d05
+Revises: 3f9c2a7d1b64
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "a7c4e91b2d05"
+down_revision = "3f9c2a7d1b64"
+branch_labels = None
+depends_on = None
+
+
+def index_valid(name: str):
+    """pg_index.indisvalid of the index, or None when it does not exist."""
+    return (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+            ),
+            {"name": name},
+        )
+        .scalar()
+    )
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction; none of these block
+    # writes to the table while they build. The unique build fails if two
+    # existing emails differ only by case; merge those accounts first.
+    with op.get_context().autocommit_block():
+        # A failed or cancelled concurrent build leaves an INVALID index that
+        # IF NOT EXISTS would skip; drop it and build again
+        if index_valid("ix_users_email_lower") is False:
+            op.drop_index(
+                "ix_users_email_lower",
+                table_name="users",
+                postgresql_concurrently=True,
+            )
+        op.create_index(
+            "ix_users_email_lower",
+            "users",
+            [sa.text("lower(email)")],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Keep the old unique index until the new one enforces uniqueness
+        if not index_valid("ix_users_email_lower"):
+            raise RuntimeError("ix_users_email_lower is not valid; users.email kept")
+        # lower(email) uniqueness implies exact uniqueness
+        op.drop_index(
+            "ix_users_email",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        # Primary keys already have a unique B-tree on id
+        op.drop_index(
+            "ix_users_id",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_example_id",
+            table_name="example",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_example_id",
+            "example",
+            ["id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_id",
+            "users",
+            ["id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_email",
+            "users",
+            ["email"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_users_email_lower",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
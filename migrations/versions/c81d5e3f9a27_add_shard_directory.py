@@ -0,0 +1,40 @@
+"""add user directory and shard bucket map
+
+Revision ID: c81d5e3f9a27
+Revises: a7c4e91b2d05
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c81d5e3f9a27"
+down_revision = "a7c4e91b2d05"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Only used in the main (directory) database once users are sharded;
+    # shards run the same migrations and leave these tables empty
+    op.create_table(
+        "user_directory",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("email_key", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+        sa.UniqueConstraint("email_key"),
+    )
+    op.create_table(
+        "shard_buckets",
+        sa.Column("bucket", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("shard", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("bucket"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("shard_buckets")
+    op.drop_table("user_directory")
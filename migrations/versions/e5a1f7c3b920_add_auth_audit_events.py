@@ -0,0 +1,43 @@
+"""add daily partitioned auth audit events
+
+Revision ID: e5a1f7c3b920
+Revises: c81d5e3f9a27
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e5a1f7c3b920"
+down_revision = "c81d5e3f9a27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Partitions are created a few days ahead by the app (src/db/audit.py)
+    op.create_table(
+        "auth_audit_events",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("event", sa.String(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("subject", sa.String(), nullable=True),
+        sa.Column("client_ip", sa.String(), nullable=True),
+        sa.Column("detail", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id", "occurred_at"),
+        postgresql_partition_by="RANGE (occurred_at)",
+    )
+    op.create_index(
+        "ix_auth_audit_events_user_id",
+        "auth_audit_events",
+        ["user_id", "occurred_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_auth_audit_events_user_id", table_name="auth_audit_events")
+    op.drop_table("auth_audit_events")
@@ -1,22 +1,52 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
+from src.api.v1.dependencies.resources import (
+    get_session_store,
+    get_token_blacklist,
+    get_token_generations,
+)
 from src.core.config import settings
 from src.core.exceptions import InvalidTokenError
-from src.core.token_manager import decode_token
+from src.core.sessions import SessionStore, is_session_token
+from src.core.token_generations import TokenGenerations
+from src.core.token_manager import TokenBlacklist, decode_token
+from src.core.token_parser import ParsedToken
+from src.core.tracing import traced
 from src.db.session import get_db
 from src.utils.logging import logger
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Validate access token and return current user."""
+def get_parsed_token(token: str = Depends(oauth2_scheme)) -> ParsedToken:
+    """Parse the bearer token once per request; verification is cached on it."""
+    return ParsedToken(token)
+
+
+@traced("auth.get_current_user")
+async def get_current_user(
+    token: ParsedToken = Depends(get_parsed_token),
+    blacklist: TokenBlacklist = Depends(get_token_blacklist),
+    sessions: SessionStore = Depends(get_session_store),
+    generations: TokenGenerations = Depends(get_token_generations),
+):
+    """Validate an access token or opaque session token and return the user."""
     try:
         logger.debug("Validating access token in get_current_user dependency")
-        payload = decode_token(token, token_type=settings.TOKEN_TYPE_ACCESS)
-        user_id = payload.get("user_id")
+        if is_session_token(token.token):
+            session = await sessions.get(token.token)
+            if session is None:
+                raise InvalidTokenError("Session has expired or been revoked")
+            return {"id": session.user_id}
+
+        claims = await decode_token(
+            token, blacklist, settings.TOKEN_TYPE_ACCESS, generations
+        )
+        user_id = claims.user_id
         if not user_id:
             logger.error("No user_id found in token payload")
             raise InvalidTokenError("Invalid token: no user_id")
@@ -31,3 +61,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             detail=str(exc),
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+async def require_admin(x_admin_token: str = Header(default="")):
+    """Allow the request only with the configured X-Admin-Token."""
+    if not settings.ADMIN_API_TOKEN or not hmac.compare_digest(
+        x_admin_token.encode(), settings.ADMIN_API_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
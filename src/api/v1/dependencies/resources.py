@@ -0,0 +1,59 @@
+from fastapi import Depends, Request
+
+from src.core.audit import AuditLog
+from src.core.config import settings
+from src.core.memory import MemoryDiagnostics
+from src.core.redis_client import RedisClient
+from src.core.refresh_tokens import RefreshTokenStore
+from src.core.resources import AppResources
+from src.core.sessions import SessionStore
+from src.core.token_generations import TokenGenerations
+from src.core.token_manager import TokenBlacklist
+from src.db.sharding import ShardRouter
+
+
+def get_resources(request: Request) -> AppResources:
+    """Return the resource container created in the app lifespan."""
+    return request.app.state.resources
+
+
+def get_token_blacklist(
+    resources: AppResources = Depends(get_resources),
+) -> TokenBlacklist:
+    return resources.token_blacklist
+
+
+def get_audit_log(resources: AppResources = Depends(get_resources)) -> AuditLog:
+    return resources.audit
+
+
+def get_redis(resources: AppResources = Depends(get_resources)) -> RedisClient:
+    return resources.redis
+
+
+def get_session_store(resources: AppResources = Depends(get_resources)) -> SessionStore:
+    return resources.sessions
+
+
+def get_token_generations(
+    resources: AppResources = Depends(get_resources),
+) -> TokenGenerations:
+    return resources.token_generations
+
+
+def get_shard_router(resources: AppResources = Depends(get_resources)) -> ShardRouter:
+    return resources.shards
+
+
+def get_refresh_token_store(
+    redis: RedisClient = Depends(get_redis),
+) -> RefreshTokenStore:
+    return RefreshTokenStore(
+        redis, family_ttl=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+    )
+
+
+def get_memory_diagnostics(
+    resources: AppResources = Depends(get_resources),
+) -> MemoryDiagnostics:
+    return resources.memory
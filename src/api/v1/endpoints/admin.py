@@ -0,0 +1,102 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+
+from src.api.v1.dependencies.auth import require_admin
+from src.api.v1.dependencies.resources import get_memory_diagnostics, get_resources
+from src.core.exceptions import MemoryTracingError
+from src.core.memory import MemoryDiagnostics
+from src.core.resources import AppResources
+
+GroupBy = Literal["lineno", "filename", "traceback"]
+
+router = APIRouter(
+    prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)]
+)
+
+
+@router.get("/profiling/flamegraph")
+async def profiling_flamegraph(resources: AppResources = Depends(get_resources)):
+    """Aggregated stack samples in folded format (flamegraph.pl, speedscope)."""
+    return Response(resources.profiler.folded(), media_type="text/plain")
+
+
+@router.get("/profiling/summary")
+async def profiling_summary(resources: AppResources = Depends(get_resources)):
+    """Average time per phase for each profiled route."""
+    return resources.profiler.summary()
+
+
+@router.delete("/profiling")
+async def reset_profiling(resources: AppResources = Depends(get_resources)):
+    resources.profiler.reset()
+    return {"status": "success"}
+
+
+@router.get("/memory")
+async def memory_report(memory: MemoryDiagnostics = Depends(get_memory_diagnostics)):
+    """RSS, GC counters, tracing state and the sizes of in-process caches."""
+    return memory.report()
+
+
+@router.post("/memory/tracing")
+async def start_memory_tracing(
+    frames: Optional[int] = Query(None, ge=1, le=100),
+    memory: MemoryDiagnostics = Depends(get_memory_diagnostics),
+):
+    """Start tracemalloc; every allocation is slower until it is stopped."""
+    memory.start_tracing(frames)
+    return {"status": "success"}
+
+
+@router.delete("/memory/tracing")
+async def stop_memory_tracing(
+    memory: MemoryDiagnostics = Depends(get_memory_diagnostics),
+):
+    memory.stop_tracing()
+    return {"status": "success"}
+
+
+@router.post("/memory/snapshots")
+async def take_memory_snapshot(
+    limit: int = Query(20, ge=1, le=500),
+    group_by: GroupBy = "lineno",
+    memory: MemoryDiagnostics = Depends(get_memory_diagnostics),
+):
+    """Snapshot traced allocations and return the top allocation sites."""
+    try:
+        snapshot_id = await memory.take_snapshot()
+    except MemoryTracingError as e:
+        raise HTTPException(status_code=409, detail=e.message)
+    return {
+        "id": snapshot_id,
+        "top": await memory.top(snapshot_id, limit, group_by),
+    }
+
+
+@router.get("/memory/snapshots/{snapshot_id}")
+async def memory_snapshot_top(
+    snapshot_id: int,
+    limit: int = Query(20, ge=1, le=500),
+    group_by: GroupBy = "lineno",
+    memory: MemoryDiagnostics = Depends(get_memory_diagnostics),
+):
+    try:
+        return await memory.top(snapshot_id, limit, group_by)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+
+
+@router.get("/memory/snapshots/{snapshot_id}/diff/{base_id}")
+async def memory_snapshot_diff(
+    snapshot_id: int,
+    base_id: int,
+    limit: int = Query(20, ge=1, le=500),
+    group_by: GroupBy = "lineno",
+    memory: MemoryDiagnostics = Depends(get_memory_diagnostics),
+):
+    """Allocation sites ordered by how much they grew since the base snapshot."""
+    try:
+        return await memory.diff(base_id, snapshot_id, limit, group_by)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
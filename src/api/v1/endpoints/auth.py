@@ -1,101 +1,221 @@
-from typing import Dict
+import time
+from typing import Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordRequestForm
 
-from src.api.v1.dependencies.auth import get_current_user
+from src.api.v1.dependencies.auth import get_current_user, get_parsed_token
+from src.api.v1.dependencies.resources import (
+    get_audit_log,
+    get_refresh_token_store,
+    get_resources,
+    get_session_store,
+    get_token_blacklist,
+    get_token_generations,
+)
+from src.core.audit import AuditLog
 from src.core.config import settings
-from src.core.exceptions import InvalidTokenError
-from src.core.security import verify_password
+from src.core.exceptions import (
+    InvalidTokenError,
+    RedisUnavailableError,
+    ServiceOverloadedError,
+)
+from src.core.refresh_tokens import REUSED, ROTATED, RefreshTokenStore
+from src.core.resources import AppResources
+from src.core.security import password_needs_rehash, verify_password
+from src.core.sessions import SessionStore, is_session_token, uses_session_tokens
+from src.core.token_generations import TokenGenerations
 from src.core.token_manager import (
-    create_access_token,
-    create_refresh_token,
+    TokenBlacklist,
+    access_token_expiry_bound,
+    create_token_pair,
     decode_token,
     invalidate_token,
     invalidate_token_by_jti,
 )
-from src.db.repositories import get_user_by_email
-from src.db.session import get_db
+from src.core.token_parser import ParsedToken
 from src.utils.logging import logger
 
 router = APIRouter(prefix="/auth", tags=["auth"])
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+
+
+def _client_ip(request: Request) -> Optional[str]:
+    return request.client.host if request.client else None
 
 
 @router.post("/login")
 async def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    resources: AppResources = Depends(get_resources),
 ):
-    user = get_user_by_email(db, form_data.username)
+    user = None
+    valid = False
+    # Known and unknown emails alike wait for a slot, so a 503 during a login
+    # storm says nothing about whether the account exists. Argon2 runs off the
+    # event loop, and only a few at a time per worker, so a storm is shed with
+    # 503s instead of starving every other endpoint
+    async with resources.login_admission.admit():
+        # Emails the filter rules out never reach the database
+        if await resources.email_filter.might_contain(form_data.username):
+            user = await resources.users_by_email.load(form_data.username)
+        check_started = time.perf_counter()
+        if user:
+            valid = await run_in_threadpool(
+                verify_password, form_data.password, user.hashed_password
+            )
+            resources.login_latency.observe(time.perf_counter() - check_started)
+        else:
+            # Answer as late as a real password check would, without doing one
+            await resources.login_latency.pad(check_started)
     if not user:
+        await resources.audit.record(
+            "login_failed",
+            subject=form_data.username,
+            client_ip=_client_ip(request),
+            detail="unknown user",
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
-
-    if not verify_password(form_data.password, user.hashed_password):
+    if not valid:
+        await resources.audit.record(
+            "login_failed",
+            user_id=user.id,
+            subject=form_data.username,
+            client_ip=_client_ip(request),
+            detail="wrong password",
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
 
+    # Move the stored hash to the configured costs without delaying the response
+    if password_needs_rehash(user.hashed_password):
+        await resources.jobs.enqueue(
+            "users.rehash_password",
+            user_id=user.id,
+            password=form_data.password,
+            old_hash=user.hashed_password,
+        )
+
+    session = uses_session_tokens(form_data.client_id)
+    await resources.audit.record(
+        "login",
+        user_id=user.id,
+        client_ip=_client_ip(request),
+        detail="session" if session else "jwt",
+    )
+
+    # First-party clients listed in SESSION_TOKEN_CLIENTS get an opaque token
+    if session:
+        session_token = await resources.sessions.create(user.id, form_data.client_id)
+        return {
+            "access_token": session_token,
+            "token_type": "bearer",
+            "expires_in": settings.SESSION_TTL_SECONDS,
+        }
+
     # Create tokens with user claims
-    claims = {"user_id": user.id}
-    access_token, access_jti = create_access_token(claims)  # Get both token and JTI
-    refresh_token = create_refresh_token(
-        claims, access_jti=access_jti
-    )  # Pass the real access JTI
+    claims = {"user_id": user.id, "gen": user.token_generation}
+    tokens = create_token_pair(claims)
 
     return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
+        "access_token": tokens.access_token,
+        "refresh_token": tokens.refresh_token,
         "token_type": "bearer",
     }
 
 
 @router.post("/refresh")
-async def refresh_token(token: str = Depends(oauth2_scheme)):
+async def refresh_token(
+    request: Request,
+    token: ParsedToken = Depends(get_parsed_token),
+    blacklist: TokenBlacklist = Depends(get_token_blacklist),
+    refresh_tokens: RefreshTokenStore = Depends(get_refresh_token_store),
+    generations: TokenGenerations = Depends(get_token_generations),
+    audit: AuditLog = Depends(get_audit_log),
+):
     try:
         logger.info("Attempting to refresh token")
-        payload = decode_token(token, token_type=settings.TOKEN_TYPE_REFRESH)
+        # The only decode of this token in the request
+        claims = await decode_token(
+            token, blacklist, settings.TOKEN_TYPE_REFRESH, generations
+        )
+        family = claims.fam or claims.jti
+
+        # Consume the refresh token atomically across workers
+        try:
+            outcome = await refresh_tokens.rotate(claims.jti, family, claims.exp)
+        except RedisUnavailableError:
+            raise ServiceOverloadedError(
+                "Cannot refresh tokens while Redis is unavailable", retry_after=5
+            )
+        if outcome != ROTATED:
+            if outcome == REUSED:
+                logger.warning(f"Refresh token reuse detected, revoked family {family}")
+                await audit.record(
+                    "refresh_reused",
+                    user_id=claims.user_id,
+                    client_ip=_client_ip(request),
+                    detail=f"family {family} revoked",
+                )
+            raise InvalidTokenError("Refresh token has already been used")
 
         # Invalidate old access token JTI if present
-        old_access_jti = payload.get("access_jti")
+        old_access_jti = claims.access_jti
         if old_access_jti:
             logger.info(f"Invalidating old access token with JTI: {old_access_jti}")
-            invalidate_token_by_jti(old_access_jti)
-
-        # Invalidate the used refresh token
-        logger.info("Invalidating used refresh token")
-        invalidate_token(token)
+            invalidate_token_by_jti(
+                old_access_jti, blacklist, access_token_expiry_bound()
+            )
 
         # Create new token pair
-        new_access_token, new_access_jti = create_access_token(
-            {"user_id": payload.get("user_id")}
-        )
-        new_refresh_token = create_refresh_token(
-            {"user_id": payload.get("user_id")}, access_jti=new_access_jti
+        user_claims = {"user_id": claims.user_id, "gen": claims.gen or 0}
+        tokens = create_token_pair(user_claims, family=family)
+        logger.info(f"Created new access token for user {claims.user_id}")
+        await audit.record(
+            "refresh", user_id=claims.user_id, client_ip=_client_ip(request)
         )
-        logger.info(f"Created new access token for user {payload.get('user_id')}")
 
         return {
-            "access_token": new_access_token,
-            "refresh_token": new_refresh_token,
+            "access_token": tokens.access_token,
+            "refresh_token": tokens.refresh_token,
             "token_type": "bearer",
         }
     except InvalidTokenError as e:
         logger.error(f"Invalid token error during refresh: {str(e)}")
+        await audit.record(
+            "refresh_failed",
+            user_id=token.claims.user_id if token.claims else None,
+            client_ip=_client_ip(request),
+            detail=str(e),
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
         )
 
 
 @router.post("/verify")
-async def verify_token(token: str = Depends(oauth2_scheme)):
+async def verify_token(
+    token: ParsedToken = Depends(get_parsed_token),
+    blacklist: TokenBlacklist = Depends(get_token_blacklist),
+    sessions: SessionStore = Depends(get_session_store),
+    generations: TokenGenerations = Depends(get_token_generations),
+):
     try:
-        payload = decode_token(token, token_type=settings.TOKEN_TYPE_ACCESS)
-        return {"status": "success", "user_id": payload.get("user_id")}
+        if is_session_token(token.token):
+            session = await sessions.get(token.token)
+            if session is None:
+                raise InvalidTokenError("Session has expired or been revoked")
+            return {"status": "success", "user_id": session.user_id}
+        claims = await decode_token(
+            token, blacklist, settings.TOKEN_TYPE_ACCESS, generations
+        )
+        return {"status": "success", "user_id": claims.user_id}
     except InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
@@ -103,12 +223,25 @@ async def verify_token(token: str = Depends(oauth2_scheme)):
 
 
 @router.post("/logout")
-async def logout(token: str = Depends(oauth2_scheme)):
+async def logout(
+    request: Request,
+    token: ParsedToken = Depends(get_parsed_token),
+    blacklist: TokenBlacklist = Depends(get_token_blacklist),
+    sessions: SessionStore = Depends(get_session_store),
+    audit: AuditLog = Depends(get_audit_log),
+):
     """Logout endpoint that invalidates the current token."""
+    if is_session_token(token.token):
+        await sessions.revoke(token.token)
+        await audit.record("logout", client_ip=_client_ip(request), detail="session")
+        return {"status": "success", "detail": "Successfully logged out"}
     try:
         # Invalidate the current access token
-        invalidate_token(token)
+        invalidate_token(token, blacklist)
         logger.info("Token invalidated during logout")
+        await audit.record(
+            "logout", user_id=token.claims.user_id, client_ip=_client_ip(request)
+        )
         return {"status": "success", "detail": "Successfully logged out"}
     except InvalidTokenError as e:
         logger.error(f"Error during logout: {str(e)}")
@@ -117,6 +250,33 @@ async def logout(token: str = Depends(oauth2_scheme)):
         )
 
 
+@router.post("/logout-all")
+async def logout_all(
+    request: Request,
+    current_user: Dict = Depends(get_current_user),
+    sessions: SessionStore = Depends(get_session_store),
+    generations: TokenGenerations = Depends(get_token_generations),
+    audit: AuditLog = Depends(get_audit_log),
+):
+    """Revoke every JWT and opaque session of the current user."""
+    user_id = current_user["id"]
+    try:
+        await generations.bump(user_id)
+    except RedisUnavailableError:
+        raise ServiceOverloadedError(
+            "Cannot revoke tokens while Redis is unavailable", retry_after=5
+        )
+    revoked = await sessions.revoke_all(user_id)
+    logger.info(f"Revoked all tokens and {revoked} sessions for user {user_id}")
+    await audit.record(
+        "logout_all",
+        user_id=user_id,
+        client_ip=_client_ip(request),
+        detail=f"{revoked} sessions revoked",
+    )
+    return {"status": "success", "revoked_sessions": revoked}
+
+
 @router.get("/protected")
 async def protected_route(current_user: Dict = Depends(get_current_user)):
     """A protected route that requires a valid access token."""
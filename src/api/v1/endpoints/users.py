@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
-from sqlalchemy.orm import Session
 
 from src.api.v1.dependencies.auth import get_current_user
+from src.api.v1.dependencies.resources import get_resources, get_shard_router
 from src.core.exceptions import PasswordTooWeakException
-from src.db.session import get_db
-from src.services.user import user_create_service, user_read_service
+from src.core.resources import AppResources
+from src.db.sharding import ShardRouter
+from src.services.user import user_create_service
 
 
 class UserCreate(BaseModel):
@@ -19,30 +21,41 @@ router = APIRouter(tags=["users"])
 @router.get("/me", response_model=dict)
 @router.get("/users/me", response_model=dict)
 async def get_current_user_info(
-    current_user=Depends(get_current_user), db: Session = Depends(get_db)
+    current_user=Depends(get_current_user),
+    resources: AppResources = Depends(get_resources),
 ):
     """Get current user information"""
     # Fetch fresh user data from DB using the validated user_id
-    db_user = user_read_service(db, current_user["id"])
+    db_user = await resources.users_by_id.load(current_user["id"])
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     return {"id": db_user.id, "email": db_user.email}
 
 
 @router.post("/users")
-def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_new_user(
+    user: UserCreate,
+    shards: ShardRouter = Depends(get_shard_router),
+    resources: AppResources = Depends(get_resources),
+):
     try:
-        db_user = user_create_service(db, user.email, user.password)
+        db_user = await run_in_threadpool(
+            user_create_service, shards, user.email, user.password
+        )
         if not db_user:
             raise HTTPException(status_code=400, detail="User creation failed")
+        # Visible to this worker's logins at once, to other workers via Redis
+        resources.email_filter.add(db_user.email)
+        if not await resources.email_filter.add_shared(db_user.email):
+            await resources.jobs.enqueue("login_filter.publish", email=db_user.email)
         return {"id": db_user.id, "email": db_user.email}
     except PasswordTooWeakException as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/users/{user_id}")
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = user_read_service(db, user_id)
+async def read_user(user_id: int, resources: AppResources = Depends(get_resources)):
+    db_user = await resources.users_by_id.load(user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     return {"id": db_user.id, "email": db_user.email}
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 
+from .endpoints.admin import router as admin_router
 from .endpoints.auth import router as auth_router
 from .endpoints.hello import router as hello_router
 from .endpoints.metrics import router as metrics_router
@@ -11,3 +12,4 @@ api_router.include_router(hello_router, prefix="/api/v1")
 api_router.include_router(metrics_router, prefix="/api/v1")
 api_router.include_router(users_router, prefix="/api/v1")
 api_router.include_router(auth_router, prefix="/api/v1")
+api_router.include_router(admin_router, prefix="/api/v1")
@@ -0,0 +1,176 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.engine import Engine
+
+from src.core.config import Settings
+from src.db.audit import AuditRow, copy_audit_rows, ensure_partitions
+from src.utils.logging import logger
+
+AUDIT_EVENTS = Counter("audit_events_total", "Audit events recorded", ["event"])
+AUDIT_DROPPED = Counter(
+    "audit_events_dropped_total",
+    "Audit events lost (full: no room in time, failed: batch not written)",
+    ["reason"],
+)
+AUDIT_BUFFERED = Gauge("audit_events_buffered", "Audit events waiting to be written")
+AUDIT_FLUSH_SECONDS = Histogram(
+    "audit_flush_duration_seconds", "Time to COPY one batch of audit events"
+)
+AUDIT_BATCH_SIZE = Histogram(
+    "audit_flush_batch_size",
+    "Audit events per COPY",
+    buckets=(1, 5, 10, 50, 100, 250, 500, 1000, 5000),
+)
+
+
+class AuditLog:
+    """Buffers auth audit events and writes them to Postgres in batches.
+
+    record() only appends to a bounded in-memory buffer; a background task
+    writes it with one COPY per `batch_size` events, at least every
+    `flush_interval` seconds. When the buffer is full, record() wakes the
+    writer and waits up to `backpressure_timeout` seconds for room, then
+    drops the event (counted in audit_events_dropped_total) rather than
+    stalling auth requests on a slow database. Events buffered when the
+    worker dies are lost.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        capacity: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        backpressure_timeout: float = 0.05,
+        partitions_ahead: int = 2,
+        enabled: bool = True,
+    ):
+        self.engine = engine
+        self.enabled = enabled
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.backpressure_timeout = backpressure_timeout
+        self.partitions_ahead = partitions_ahead
+        self._buffer: Deque[AuditRow] = deque()
+        self._wake = asyncio.Event()
+        self._room = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        # One COPY at a time, so batches land in the order they were taken
+        self._flushing = asyncio.Lock()
+        # Last day with a partition known to exist
+        self._partitioned_until = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings, engine: Engine) -> "AuditLog":
+        return cls(
+            engine,
+            capacity=settings.AUDIT_BUFFER_SIZE,
+            batch_size=settings.AUDIT_BATCH_SIZE,
+            flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+            backpressure_timeout=settings.AUDIT_BACKPRESSURE_TIMEOUT,
+            partitions_ahead=settings.AUDIT_PARTITIONS_AHEAD,
+            enabled=settings.AUDIT_ENABLED,
+        )
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    async def record(
+        self,
+        event: str,
+        user_id: Optional[int] = None,
+        subject: Optional[str] = None,
+        client_ip: Optional[str] = None,
+        detail: Optional[str] = None,
+    ) -> None:
+        """Buffer one event for the next flush."""
+        if not self.enabled:
+            return
+        row = (datetime.now(timezone.utc), event, user_id, subject, client_ip, detail)
+        deadline = time.monotonic() + self.backpressure_timeout
+        while len(self._buffer) >= self.capacity:
+            self._wake.set()
+            self._room.clear()
+            try:
+                await asyncio.wait_for(
+                    self._room.wait(), max(deadline - time.monotonic(), 0)
+                )
+            except asyncio.TimeoutError:
+                AUDIT_DROPPED.labels(reason="full").inc()
+                return
+        self._buffer.append(row)
+        AUDIT_EVENTS.labels(event=event).inc()
+        AUDIT_BUFFERED.set(len(self._buffer))
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    def start(self) -> None:
+        if self.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the writer once it has flushed what is buffered."""
+        self._closing = True
+        self._wake.set()
+        if self._task is not None:
+            # Not cancelled: a COPY already running in its thread would finish
+            # anyway, concurrently with the final flush
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the events written."""
+        async with self._flushing:
+            return await self._flush()
+
+    async def _flush(self) -> int:
+        written = 0
+        while self._buffer:
+            batch = [
+                self._buffer.popleft()
+                for _ in range(min(self.batch_size, len(self._buffer)))
+            ]
+            self._room.set()
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as e:
+                # Keep the batch for the next flush if there is room for it
+                if len(self._buffer) + len(batch) <= self.capacity:
+                    self._buffer.extendleft(reversed(batch))
+                else:
+                    AUDIT_DROPPED.labels(reason="failed").inc(len(batch))
+                # The partitions may be what is missing
+                self._partitioned_until = None
+                logger.warning(f"Audit events not written: {str(e)}")
+                break
+            written += len(batch)
+        AUDIT_BUFFERED.set(len(self._buffer))
+        return written
+
+    def _write(self, batch: List[AuditRow]) -> None:
+        last_day = max(row[0] for row in batch).date()
+        if self._partitioned_until is None or last_day > self._partitioned_until:
+            first_day = min(row[0] for row in batch).date()
+            ensure_partitions(self.engine, first_day, self.partitions_ahead + 1)
+            self._partitioned_until = first_day + timedelta(days=self.partitions_ahead)
+        start = time.perf_counter()
+        copy_audit_rows(self.engine, batch)
+        AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - start)
+        AUDIT_BATCH_SIZE.observe(len(batch))
@@ -0,0 +1,135 @@
+import asyncio
+import contextvars
+import time
+from typing import Callable, Dict, Generic, Hashable, List, Optional, Set, TypeVar
+
+from opentelemetry import trace
+from prometheus_client import Counter, Histogram
+
+from src.core.profiling import record_phase
+from src.core.tracing import span
+from src.db.instrumentation import count_queries
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+LOADER_BATCH_SIZE = Histogram(
+    "batch_loader_batch_size",
+    "Distinct keys fetched per batched query",
+    ["loader"],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 50, 100, 250),
+)
+LOADER_ADDED_LATENCY = Histogram(
+    "batch_loader_added_latency_seconds",
+    "Time the oldest lookup in a batch waited for it to be dispatched",
+    ["loader"],
+    buckets=(0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+LOADER_QUERIES_SAVED = Counter(
+    "batch_loader_queries_saved_total",
+    "Lookups answered without a query of their own",
+    ["loader"],
+)
+LOADER_QUERIES = Counter(
+    "batch_loader_queries_total",
+    "SQL statements issued by batched fetches",
+    ["loader"],
+)
+
+
+class BatchLoader(Generic[K, V]):
+    """Coalesces concurrent single-key lookups into one batched query.
+
+    Keys requested within `window` seconds of the first one (or until
+    `max_batch` distinct keys are waiting) are fetched with a single call to
+    `batch_fn`, run in a worker thread, which returns a dict of the keys it
+    found. Each caller gets its own value, or None when the key is missing.
+    Results are not cached between batches, so nothing served is older than
+    the query that fetched it. Use one loader per event loop.
+
+    A batch serves several requests, so it runs in a context of its own: its
+    span (linked to every caller's span) and its SQL statements belong to the
+    loader, not to whichever request happened to fill the batch.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[K]], Dict[K, V]],
+        window: float = 0.001,
+        max_batch: int = 100,
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: Dict[K, List[asyncio.Future]] = {}
+        self._links: List[trace.Link] = []
+        self._requests = 0
+        self._first_at = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> Optional[V]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending:
+            self._first_at = time.perf_counter()
+            self._timer = loop.call_later(self.window, self._dispatch)
+        self._pending.setdefault(key, []).append(future)
+        self._requests += 1
+        caller = trace.get_current_span().get_span_context()
+        if caller.is_valid:
+            self._links.append(trace.Link(caller))
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        started = time.perf_counter()
+        try:
+            return await future
+        finally:
+            # Every caller spent the wait on the database, whoever ran the query
+            record_phase("db", time.perf_counter() - started)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, requests, links = self._pending, self._requests, self._links
+        self._pending, self._requests, self._links = {}, 0, []
+        LOADER_ADDED_LATENCY.labels(loader=self.name).observe(
+            time.perf_counter() - self._first_at
+        )
+        LOADER_BATCH_SIZE.labels(loader=self.name).observe(len(batch))
+        LOADER_QUERIES_SAVED.labels(loader=self.name).inc(requests - 1)
+        task = asyncio.get_running_loop().create_task(
+            self._fetch(batch, links), context=contextvars.Context()
+        )
+        # The loop only keeps weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(
+        self, batch: Dict[K, List[asyncio.Future]], links: List[trace.Link]
+    ) -> None:
+        attributes = {"batch_loader.keys": len(batch)}
+        try:
+            with span(f"batch_loader.{self.name}", attributes, links=links):
+                with count_queries() as stats:
+                    try:
+                        found = await asyncio.to_thread(self.batch_fn, list(batch))
+                    finally:
+                        LOADER_QUERIES.labels(loader=self.name).inc(stats.count)
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for key, futures in batch.items():
+            value = found.get(key)
+            for future in futures:
+                # A caller that was cancelled no longer wants its value
+                if not future.done():
+                    future.set_result(value)
@@ -0,0 +1,184 @@
+import hashlib
+import math
+from typing import Iterable, List, Optional
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+from src.core.exceptions import RedisUnavailableError
+from src.core.redis_client import RedisClient
+from src.utils.logging import logger
+
+FILTER_KEY = "login:emails:bloom"
+
+
+class EmailBloomFilter:
+    """Bloom filter of registered emails, used to reject unknown logins early.
+
+    Bits live in a local bytearray and, when Redis is available, are mirrored
+    to a shared Redis string so signups on other workers are seen too. The
+    bit layout matches Redis SETBIT/GETBIT (most significant bit first).
+
+    One job builds the filter from the database and publishes it whole; other
+    workers take that copy with load_shared() rather than each scanning the
+    users table. The filter only ever answers "definitely absent" once it has
+    been loaded, and a local miss only while Redis confirms it against a
+    complete build; otherwise it fails open so a real user is never turned
+    away.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        redis: Optional[RedisClient] = None,
+        key: str = FILTER_KEY,
+        built_ttl: Optional[float] = None,
+    ):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.redis = redis
+        self.key = key
+        # Build counter, set once a full build has been ORed in; while it is
+        # missing or expired no worker answers a local miss with "absent"
+        self.built_key = f"{key}:built"
+        self.built_ttl = built_ttl
+        self.loaded = False
+        self._version: Optional[bytes] = None
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _offsets(self, email: str) -> List[int]:
+        # Kirsch-Mitzenmacher double hashing from one 128-bit digest
+        digest = hashlib.blake2b(
+            email.strip().lower().encode(), digest_size=16
+        ).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def _test_local(self, offsets: List[int]) -> bool:
+        bits = self._bits
+        return all(bits[offset >> 3] & (0x80 >> (offset & 7)) for offset in offsets)
+
+    def add(self, email: str) -> None:
+        """Set the email's bits locally; call add_shared() to publish them."""
+        for offset in self._offsets(email):
+            self._bits[offset >> 3] |= 0x80 >> (offset & 7)
+
+    async def add_shared(self, email: str) -> bool:
+        """Set the email's bits in Redis; False when Redis did not take them."""
+        if self.redis is None:
+            return True
+        commands = [("SETBIT", self.key, offset, 1) for offset in self._offsets(email)]
+        try:
+            await self.redis.pipeline(commands)
+        except RedisUnavailableError as e:
+            logger.warning(f"Could not publish email to the login filter: {e}")
+            return False
+        return True
+
+    def load(self, emails: Iterable[str]) -> int:
+        """Add every registered email and start answering negatives."""
+        count = 0
+        for email in emails:
+            self.add(email)
+            count += 1
+        self.loaded = True
+        return count
+
+    async def publish(self, complete: bool = False) -> None:
+        """OR the local bits into the shared filter (never clears others' bits).
+
+        `complete` marks the shared filter as holding every registered email,
+        so load_shared() may start answering negatives from it.
+        """
+        if self.redis is None:
+            return
+        scratch = f"{self.key}:load"
+        commands = [
+            ("SET", scratch, bytes(self._bits)),
+            ("BITOP", "OR", self.key, self.key, scratch),
+            ("DEL", scratch),
+        ]
+        if complete:
+            commands.append(("INCR", self.built_key))
+            if self.built_ttl:
+                commands.append(("EXPIRE", self.built_key, int(self.built_ttl)))
+        try:
+            await self.redis.pipeline(commands, transaction=True)
+        except RedisUnavailableError as e:
+            logger.warning(f"Could not publish the login filter: {e}")
+
+    async def load_shared(self) -> bool:
+        """Take the bits of a complete shared filter; False when there is none.
+
+        Local bits are kept, so signups not yet published are not lost. The
+        bits are only fetched when a newer build has been published.
+        """
+        if self.redis is None:
+            return False
+        try:
+            version = await self.redis.execute("GET", self.built_key)
+            if version is None:
+                return False
+            if self.loaded and version == self._version:
+                return True
+            shared = await self.redis.execute("GET", self.key)
+        except RedisUnavailableError:
+            return False
+        # A filter sized for another capacity hashes to other offsets
+        if shared is None or len(shared) != len(self._bits):
+            return False
+        bits = int.from_bytes(shared, "big")
+        if self.loaded:
+            bits |= int.from_bytes(self._bits, "big")
+        self._bits = bytearray(bits.to_bytes(len(self._bits), "big"))
+        self._version = version
+        self.loaded = True
+        return True
+
+    async def claim_rebuild(self, ttl: float) -> bool:
+        """True for the one caller per `ttl` seconds that should rebuild."""
+        if self.redis is None:
+            return False
+        try:
+            claimed = await self.redis.execute(
+                "SET", f"{self.key}:rebuild", 1, "NX", "EX", max(1, int(ttl))
+            )
+        except RedisUnavailableError:
+            return False
+        return bool(claimed)
+
+    async def might_contain(self, email: str) -> bool:
+        """False only when the email is certainly not registered."""
+        if not self.loaded:
+            return True
+        offsets = self._offsets(email)
+        if self._test_local(offsets):
+            return True
+        if self.redis is None:
+            return False
+        commands = [("EXISTS", self.built_key)]
+        commands += [("GETBIT", self.key, offset) for offset in offsets]
+        try:
+            built, *bits = await self.redis.pipeline(commands)
+        except RedisUnavailableError:
+            return True
+        return not built or all(bits)
+
+
+def invalidate_shared_filter(redis_url: str, key: str = FILTER_KEY) -> bool:
+    """Make workers fail open until the next rebuild, which is due at once.
+
+    For scripts that insert users without going through signup. Returns False
+    when Redis could not be reached.
+    """
+    client = Redis.from_url(redis_url, socket_timeout=5, socket_connect_timeout=5)
+    try:
+        client.delete(f"{key}:built", f"{key}:rebuild")
+    except (RedisError, OSError) as e:
+        logger.warning(f"Could not invalidate the login filter: {str(e)}")
+        return False
+    finally:
+        client.close()
+    return True
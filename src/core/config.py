@@ -1,13 +1,14 @@
 # src/core/config.py
 from typing import Any, ClassVar, Dict
 
-from pydantic import field_validator, computed_field
+from pydantic import computed_field, field_validator
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     # Project settings
     API_VERSION: str  # API version (e.g., "1.0.0")
+    DEBUG: bool = False  # Adds diagnostic response headers
     COMPOSE_PROJECT_NAME: str = "set-project-name"
     ENVIRONMENT: str = "dev"  # Environment setting (dev/test/prod) with default="dev"
     PROJECT_NAME: str  # Name of your project
@@ -26,6 +27,25 @@ class Settings(BaseSettings):
     POSTGRES_TEST_PORT: int = 5432
     POSTGRES_USER: str = "set-postgres-user"
 
+    # Database Pool Settings
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 3600  # Seconds before a pooled connection is replaced
+    DB_POOL_WARMUP: int = 2  # Connections opened per worker at startup
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0  # Statements slower than this are logged
+
+    # User Sharding
+    DATABASE_SHARD_URLS: str = ""  # Comma-separated user shards; empty = unsharded
+    DB_SHARD_BUCKETS: int = 1024  # Hash buckets of user ids; fixed once sharded
+    DB_SHARD_MAP_REFRESH: int = 30  # Seconds between bucket map reloads
+
+    # User Lookup Batching
+    USER_LOADER_WINDOW: float = 0.001  # Seconds to collect lookups into one query
+    USER_LOADER_MAX_BATCH: int = 100  # Keys that dispatch a batch early
+
+    # Worker Resources
+    PROCESS_POOL_WORKERS: int = 0  # Size of the CPU process pool, 0 disables it
+
     # Security Settings
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     ALGORITHM: str = "HS256"  # JWT encryption algorithm (default="HS256")
@@ -35,8 +55,30 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     SECRET_KEY: str  # JWT/encryption secret key
     TOKEN_AUDIENCE: str = "your-app-users"
+    SESSION_TOKEN_CLIENTS: str = ""  # Comma-separated client_ids given opaque tokens
+    SESSION_TTL_SECONDS: int = 3600  # Idle lifetime of an opaque session
+    SESSION_CACHE_SIZE: int = 10000  # Sessions kept in each worker's front cache
+    SESSION_CACHE_TTL: float = 5.0  # Seconds a cached session skips Redis
+    TOKEN_GENERATION_TTL: int = 3600  # Seconds a user's token generation stays in Redis
     TOKEN_ISSUER: str = "your-app-name"
 
+    # Password Hashing (Argon2id; calibrate with devops/scripts/calibrate_argon2.py)
+    ARGON2_TIME_COST: int = 3  # Iterations
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4  # Lanes
+    PASSWORD_MIN_LENGTH: int = 8
+    PASSWORD_REQUIRED_CLASSES: str = "upper,lower,digit,special"  # Comma-separated
+    PASSWORD_MIN_ENTROPY_BITS: float = 0.0  # Charset-based estimate; 0 disables
+    PASSWORD_BREACHED_FILE: str = ""  # Sorted SHA-1 list (HIBP format); empty disables
+    LOGIN_MAX_CONCURRENCY: int = 4  # Concurrent password checks per worker
+    LOGIN_QUEUE_DEADLINE: float = 2.0  # Seconds a login may queue before a 503
+    LOGIN_FILTER_CAPACITY: int = 1000000  # Accounts the email Bloom filter sizes for
+    LOGIN_FILTER_ERROR_RATE: float = 0.01  # False-positive rate at capacity
+    LOGIN_FILTER_REFRESH: float = 3600.0  # Seconds between rebuilds from the database
+    LOGIN_FILTER_RELOAD: float = (
+        60.0  # Seconds between checks for a newer shared filter
+    )
+
     # Auth Settings
     AUTH_ALGORITHM: str = "HS256"
     AUTH_REFRESH_SECRET_KEY: str
@@ -49,6 +91,63 @@ class Settings(BaseSettings):
 
     # Redis Configuration
     REDIS_URL: str = "redis://redis:6379/0"  # Redis connection string with default
+    REDIS_MAX_CONNECTIONS: int = 50  # Pool size shared by all features per worker
+    REDIS_SOCKET_TIMEOUT: float = 0.5  # Seconds, for connect and each command
+    REDIS_POOL_WARMUP: int = 2  # Connections opened per worker at startup
+    REDIS_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Failures before using the fallback
+    REDIS_CIRCUIT_RESET_SECONDS: float = 30.0  # Wait before retrying Redis
+    REDIS_LOCAL_CACHE_SIZE: int = 10000  # Entries in the client-side cache
+    REDIS_LOCAL_CACHE_TTL: float = 5.0  # Seconds a client-side entry may live
+    REDIS_CLIENT_TRACKING_PREFIXES: str = ""  # Comma-separated; enables tracking
+
+    # Background Jobs
+    JOBS_BACKEND: str = "redis"  # "redis" (Streams) or "memory" (in-process only)
+    JOBS_QUEUES: str = "default:4"  # Durable queue:concurrency pairs
+    JOBS_LOCAL_QUEUES: str = "local:2"  # In-process only; their jobs may hold secrets
+    JOBS_IN_PROCESS: bool = True  # API workers run durable jobs too (see src.worker)
+    JOBS_MAX_ATTEMPTS: int = 5  # Runs before a job is dead-lettered
+    JOBS_RETRY_BASE_DELAY: float = 1.0  # Seconds; doubles per attempt, with jitter
+    JOBS_RETRY_MAX_DELAY: float = 300.0  # Cap on a single retry delay
+    JOBS_CLAIM_IDLE: float = 300.0  # Seconds before another worker takes a stuck job
+    JOBS_POLL_INTERVAL: float = 0.5  # Seconds an idle consumer waits between reads
+    BLACKLIST_PRUNE_INTERVAL: float = 300.0  # Seconds between revoked-JTI sweeps
+
+    # Auth Audit Log
+    AUDIT_ENABLED: bool = True
+    AUDIT_BUFFER_SIZE: int = 10000  # Events buffered per worker before backpressure
+    AUDIT_BATCH_SIZE: int = 500  # Events per COPY; a full batch flushes at once
+    AUDIT_FLUSH_INTERVAL: float = 1.0  # Seconds between flushes of a partial batch
+    AUDIT_BACKPRESSURE_TIMEOUT: float = 0.05  # Seconds to wait for room, then drop
+    AUDIT_PARTITIONS_AHEAD: int = 2  # Daily partitions created in advance
+    AUDIT_RETENTION_DAYS: int = 90  # Older daily partitions are dropped
+    AUDIT_MAINTENANCE_INTERVAL: float = 3600.0  # Seconds between partition upkeep
+
+    # Health Checks
+    HEALTH_CHECK_INTERVAL: float = 5.0  # Seconds between background checks
+    HEALTH_CHECK_TIMEOUT: float = 2.0  # Seconds before a check counts as failed
+    HEALTH_CHECK_STALE_AFTER: float = 30.0  # Older results make /readyz fail
+
+    # Profiling
+    PROFILING_SAMPLE_RATE: float = 0.0  # Fraction of requests profiled, 0 disables
+    PROFILING_INTERVAL: float = 0.005  # Seconds between stack samples
+
+    # Event Loop Monitoring
+    LOOP_MONITOR_INTERVAL: float = 0.25  # Seconds between event loop lag probes
+    LOOP_BLOCK_THRESHOLD: float = 0.1  # Longer stalls are logged with their stack
+    LOOP_BLOCK_FAIL_MS: float = 0.0  # Tests: fail requests blocking longer; 0 disables
+
+    # Memory Diagnostics
+    MEMORY_TRACE_FRAMES: int = 10  # Stack depth recorded per allocation by tracemalloc
+    MEMORY_SNAPSHOTS_KEPT: int = 5  # Older tracemalloc snapshots are discarded
+
+    # Tracing
+    TRACING_ENABLED: bool = False
+    OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"  # OTLP/HTTP collector
+    TRACING_SAMPLE_RATE: float = 0.01  # Share of ordinary traces kept
+    TRACING_LATENCY_THRESHOLD: float = 0.5  # Seconds; slower traces are always kept
+
+    # Admin Endpoints
+    ADMIN_API_TOKEN: str = ""  # X-Admin-Token value; empty disables admin endpoints
 
     # Logging Configuration
     LOG_LEVEL: str = "INFO"  # Logging level with default="INFO"
@@ -7,6 +7,7 @@ from src.core.exceptions import (
     CustomAppException,
     InvalidTokenError,
     PasswordTooWeakException,
+    ServiceOverloadedError,
     UserNotFoundError,
 )
 from src.utils.logging import logger
@@ -36,11 +37,22 @@ async def user_not_found_handler(
     )
 
 
+async def service_overloaded_handler(
+    request: Request, exc: ServiceOverloadedError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 def setup_exception_handlers(app: FastAPI) -> None:
     """Register custom exception handlers with the FastAPI application."""
     app.add_exception_handler(InvalidTokenError, invalid_token_handler)
     app.add_exception_handler(PasswordTooWeakException, password_too_weak_handler)
     app.add_exception_handler(UserNotFoundError, user_not_found_handler)
+    app.add_exception_handler(ServiceOverloadedError, service_overloaded_handler)
 
     @app.exception_handler(StarletteHTTPException)
     async def http_exception_handler(
@@ -11,8 +11,11 @@ class InvalidTokenError(CustomAppException):
 
 
 class PasswordTooWeakException(CustomAppException):
-    def __init__(self, message="Password does not meet security requirements"):
+    def __init__(
+        self, message="Password does not meet security requirements", violations=None
+    ):
         self.message = message
+        self.violations = violations or [message]
         super().__init__(self.message)
 
 
@@ -20,3 +23,22 @@ class UserNotFoundError(CustomAppException):
     def __init__(self, message="User not found"):
         self.message = message
         super().__init__(self.message)
+
+
+class RedisUnavailableError(CustomAppException):
+    def __init__(self, message="Redis is unavailable"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class ServiceOverloadedError(CustomAppException):
+    def __init__(self, message="Service is busy, retry later", retry_after=1):
+        self.message = message
+        self.retry_after = retry_after
+        super().__init__(self.message)
+
+
+class MemoryTracingError(CustomAppException):
+    def __init__(self, message="Memory tracing is not running"):
+        self.message = message
+        super().__init__(self.message)
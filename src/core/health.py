@@ -0,0 +1,115 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from src.utils.logging import logger
+
+HealthCheck = Callable[[], Awaitable[bool]]
+
+
+class CheckResult:
+    """Outcome of the most recent run of one dependency check."""
+
+    __slots__ = ("healthy", "latency_ms", "checked_at", "error")
+
+    def __init__(
+        self,
+        healthy: bool,
+        latency_ms: float,
+        checked_at: float,
+        error: Optional[str] = None,
+    ):
+        self.healthy = healthy
+        self.latency_ms = latency_ms
+        self.checked_at = checked_at
+        self.error = error
+
+    def as_dict(self) -> Dict:
+        result = {
+            "status": "ok" if self.healthy else "failing",
+            "latency_ms": round(self.latency_ms, 2),
+            "age_seconds": round(time.monotonic() - self.checked_at, 2),
+        }
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+class HealthMonitor:
+    """Runs dependency checks on an interval and serves the cached results.
+
+    Probes read `results` only, so a burst of readiness probes never touches
+    the database and never waits on a slow dependency. Checks registered with
+    critical=False are reported but do not make the worker unready.
+    """
+
+    def __init__(
+        self, interval: float = 5.0, timeout: float = 2.0, stale_after: float = 30.0
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.checks: Dict[str, HealthCheck] = {}
+        self.critical: Dict[str, bool] = {}
+        self.results: Dict[str, CheckResult] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, check: HealthCheck, critical: bool = True) -> None:
+        self.checks[name] = check
+        self.critical[name] = critical
+
+    async def run_checks(self) -> None:
+        """Run every check concurrently, each bounded by the timeout."""
+        await asyncio.gather(*(self._run(name) for name in self.checks))
+
+    async def _run(self, name: str) -> None:
+        start = time.monotonic()
+        error = None
+        try:
+            healthy = await asyncio.wait_for(self.checks[name](), self.timeout)
+        except asyncio.TimeoutError:
+            healthy, error = False, f"timed out after {self.timeout}s"
+        except Exception as e:
+            healthy, error = False, str(e)
+        now = time.monotonic()
+        previous = self.results.get(name)
+        if not healthy and (previous is None or previous.healthy):
+            logger.warning(f"Health check {name} is failing: {error}")
+        self.results[name] = CheckResult(healthy, (now - start) * 1000, now, error)
+
+    async def start(self) -> None:
+        """Run the checks once, then keep refreshing them in the background."""
+        await self.run_checks()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_checks()
+
+    def is_ready(self) -> bool:
+        now = time.monotonic()
+        for name, critical in self.critical.items():
+            if not critical:
+                continue
+            result = self.results.get(name)
+            if result is None or not result.healthy:
+                return False
+            if now - result.checked_at > self.stale_after:
+                return False
+        return True
+
+    def report(self) -> Dict:
+        return {
+            "status": "ready" if self.is_ready() else "unready",
+            "checks": {name: result.as_dict() for name, result in self.results.items()},
+        }
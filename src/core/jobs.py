@@ -0,0 +1,579 @@
+import asyncio
+import json
+import os
+import random
+import secrets
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+from redis.exceptions import RedisError, ResponseError
+
+from src.core.config import Settings
+from src.core.exceptions import RedisUnavailableError
+from src.core.redis_client import RedisClient
+from src.utils.logging import logger
+
+JOBS_ENQUEUED = Counter("jobs_enqueued_total", "Jobs enqueued", ["queue", "backend"])
+JOBS_FINISHED = Counter(
+    "jobs_finished_total",
+    "Job runs by outcome (done, retried, dead)",
+    ["queue", "outcome"],
+)
+JOB_DURATION = Histogram("job_duration_seconds", "Time spent running a job", ["job"])
+JOB_WAIT = Histogram(
+    "job_queue_wait_seconds",
+    "Time from enqueue (or retry) until a worker starts the job",
+    ["queue"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30, 120, 600),
+)
+JOBS_RUNNING = Gauge("jobs_running", "Jobs running in this process", ["queue"])
+
+Handler = Callable[..., Awaitable[Any]]
+
+
+class JobSpec:
+    __slots__ = ("name", "handler", "queue", "max_attempts")
+
+    def __init__(
+        self, name: str, handler: Handler, queue: str, max_attempts: Optional[int]
+    ):
+        self.name = name
+        self.handler = handler
+        self.queue = queue
+        self.max_attempts = max_attempts
+
+
+# Filled by @job as handler modules are imported
+JOBS: Dict[str, JobSpec] = {}
+
+
+def job(name: str, queue: str = "default", max_attempts: Optional[int] = None):
+    """Register `handler(resources, **kwargs)` as the job called `name`."""
+
+    def register(handler: Handler) -> Handler:
+        JOBS[name] = JobSpec(name, handler, queue, max_attempts)
+        return handler
+
+    return register
+
+
+def parse_queues(value: str) -> Dict[str, int]:
+    """'default:4,maintenance:1' -> {'default': 4, 'maintenance': 1}."""
+    queues = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, limit = item.partition(":")
+        queues[name.strip()] = int(limit) if limit.strip() else 1
+    return queues
+
+
+class Job:
+    """One run of a registered job; `delivery` is the backend's message id."""
+
+    __slots__ = ("id", "name", "queue", "kwargs", "attempts", "enqueued_at", "delivery")
+
+    def __init__(
+        self,
+        name: str,
+        queue: str,
+        kwargs: Dict[str, Any],
+        attempts: int = 0,
+        enqueued_at: Optional[float] = None,
+        id: Optional[str] = None,
+        delivery: Any = None,
+    ):
+        self.id = id or secrets.token_hex(8)
+        self.name = name
+        self.queue = queue
+        self.kwargs = kwargs
+        self.attempts = attempts
+        self.enqueued_at = time.time() if enqueued_at is None else enqueued_at
+        self.delivery = delivery
+
+    def dumps(self) -> str:
+        return json.dumps(
+            {
+                "id": self.id,
+                "name": self.name,
+                "kwargs": self.kwargs,
+                "attempts": self.attempts,
+                "enqueued_at": self.enqueued_at,
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def loads(cls, queue: str, payload: Any, delivery: Any = None) -> "Job":
+        data = json.loads(payload)
+        return cls(
+            data["name"],
+            queue,
+            data["kwargs"],
+            attempts=data["attempts"],
+            enqueued_at=data["enqueued_at"],
+            id=data["id"],
+            delivery=delivery,
+        )
+
+
+class MemoryBackend:
+    """Queues held in this process; whatever is pending is lost when it exits.
+
+    Jobs are passed by reference and never serialized, so this is the only
+    backend allowed to carry secrets.
+    """
+
+    name = "memory"
+
+    def __init__(self, dead_letters: int = 100):
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self.dead_letters: List[Tuple[Job, str]] = []
+        self._max_dead_letters = dead_letters
+
+    def _queue(self, queue: str) -> asyncio.Queue:
+        if queue not in self._queues:
+            self._queues[queue] = asyncio.Queue()
+        return self._queues[queue]
+
+    def pending(self, queue: str) -> int:
+        return self._queue(queue).qsize()
+
+    async def push(self, job: Job, delay: float = 0.0) -> None:
+        if delay > 0:
+            asyncio.get_running_loop().call_later(
+                delay, self._queue(job.queue).put_nowait, job
+            )
+        else:
+            self._queue(job.queue).put_nowait(job)
+
+    async def fetch(self, queue: str, count: int, timeout: float) -> List[Job]:
+        pending = self._queue(queue)
+        try:
+            jobs = [await asyncio.wait_for(pending.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while len(jobs) < count and not pending.empty():
+            jobs.append(pending.get_nowait())
+        return jobs
+
+    async def ack(self, job: Job) -> None:
+        pass
+
+    async def retry(self, job: Job, delay: float) -> None:
+        await self.push(job, delay)
+
+    async def dead(self, job: Job, error: str) -> None:
+        self.dead_letters.append((job, error))
+        del self.dead_letters[: -self._max_dead_letters]
+
+
+# Moves retries that are due from the delayed set into the stream
+PROMOTE_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, payload in ipairs(due) do
+    redis.call('XADD', KEYS[2], '*', 'job', payload)
+end
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return #due
+"""
+
+
+class RedisStreamsBackend:
+    """One Redis stream per queue, read through a consumer group.
+
+    A delivered job stays in the group's pending list until it is acked, so
+    the job of a worker that died is claimed by another one after
+    `claim_idle` seconds; handlers must therefore tolerate running twice.
+    Retries wait in a sorted set until they are due, and jobs out of attempts
+    are moved to the queue's dead-letter stream. Acked entries are deleted,
+    so a stream only holds the backlog.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        redis: RedisClient,
+        group: str = "workers",
+        consumer: Optional[str] = None,
+        claim_idle: float = 300.0,
+        prefix: str = "jobs",
+        dead_letters: int = 10000,
+    ):
+        self.redis = redis
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.claim_idle = claim_idle
+        self.prefix = prefix
+        self.dead_letters = dead_letters
+        self._groups: Set[str] = set()
+
+    def stream(self, queue: str) -> str:
+        return f"{self.prefix}:{queue}"
+
+    async def push(self, job: Job, delay: float = 0.0) -> None:
+        if delay > 0:
+            await self.redis.execute(
+                "ZADD",
+                f"{self.stream(job.queue)}:delayed",
+                time.time() + delay,
+                job.dumps(),
+            )
+        else:
+            await self.redis.execute(
+                "XADD", self.stream(job.queue), "*", "job", job.dumps()
+            )
+
+    async def _ensure_group(self, queue: str) -> None:
+        if queue in self._groups:
+            return
+        try:
+            await self.redis.redis.xgroup_create(
+                self.stream(queue), self.group, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise RedisUnavailableError(f"Consumer group not created: {str(e)}")
+        except (RedisError, OSError) as e:
+            raise RedisUnavailableError(f"Consumer group not created: {str(e)}")
+        self._groups.add(queue)
+
+    async def fetch(self, queue: str, count: int, timeout: float) -> List[Job]:
+        stream = self.stream(queue)
+        try:
+            await self._ensure_group(queue)
+            await self.redis.run_script(
+                PROMOTE_DUE_SCRIPT, [f"{stream}:delayed", stream], [time.time(), count]
+            )
+            # Jobs left pending by a consumer that stopped without acking; the
+            # reply has a third element (deleted ids) only from Redis 7
+            reply = await self.redis.execute(
+                "XAUTOCLAIM",
+                stream,
+                self.group,
+                self.consumer,
+                int(self.claim_idle * 1000),
+                "0-0",
+                "COUNT",
+                count,
+            )
+            entries = list(reply[1])
+            if len(entries) < count:
+                reply = await self.redis.execute(
+                    "XREADGROUP",
+                    "GROUP",
+                    self.group,
+                    self.consumer,
+                    "COUNT",
+                    count - len(entries),
+                    "STREAMS",
+                    stream,
+                    ">",
+                )
+                for _, messages in reply or []:
+                    entries.extend(messages)
+        except RedisUnavailableError:
+            # Recreate the group next time, in case Redis lost it
+            self._groups.discard(queue)
+            raise
+        if not entries:
+            # Polls instead of BLOCK, which would hold a pooled connection
+            # past REDIS_SOCKET_TIMEOUT
+            await asyncio.sleep(timeout)
+            return []
+
+        jobs = []
+        for delivery, fields in entries:
+            payload = fields.get(b"job", fields.get("job"))
+            try:
+                jobs.append(Job.loads(queue, payload, delivery))
+            except (TypeError, ValueError, KeyError):
+                logger.error(f"Dropping unreadable job {delivery!r} from {stream}")
+                await self._remove(stream, delivery)
+        return jobs
+
+    async def _remove(self, stream: str, delivery: Any, *commands) -> None:
+        await self.redis.pipeline(
+            [
+                *commands,
+                ("XACK", stream, self.group, delivery),
+                ("XDEL", stream, delivery),
+            ],
+            transaction=True,
+        )
+
+    async def ack(self, job: Job) -> None:
+        await self._remove(self.stream(job.queue), job.delivery)
+
+    async def retry(self, job: Job, delay: float) -> None:
+        stream = self.stream(job.queue)
+        await self._remove(
+            stream,
+            job.delivery,
+            ("ZADD", f"{stream}:delayed", time.time() + delay, job.dumps()),
+        )
+
+    async def dead(self, job: Job, error: str) -> None:
+        stream = self.stream(job.queue)
+        await self._remove(
+            stream,
+            job.delivery,
+            (
+                "XADD",
+                f"{stream}:dead",
+                "MAXLEN",
+                "~",
+                self.dead_letters,
+                "*",
+                "job",
+                job.dumps(),
+                "error",
+                error,
+            ),
+        )
+
+
+class JobQueue:
+    """Sends jobs to a backend; running them is the Worker's part.
+
+    Queues in `local_queues` always use the in-process backend, because their
+    arguments (a plaintext password for a hash upgrade) must never be written
+    to Redis. The other queues use the durable backend when one is configured
+    and fall back to the in-process one while Redis is unreachable, so an
+    outage delays work rather than failing the request that enqueued it.
+    """
+
+    def __init__(
+        self,
+        local: MemoryBackend,
+        durable: Optional[RedisStreamsBackend] = None,
+        durable_queues: Optional[Dict[str, int]] = None,
+        local_queues: Optional[Dict[str, int]] = None,
+    ):
+        self.local = local
+        self.durable = durable
+        self.durable_queues = durable_queues or {}
+        self.local_queues = local_queues or {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings, redis: RedisClient) -> "JobQueue":
+        durable = None
+        if settings.JOBS_BACKEND == "redis":
+            durable = RedisStreamsBackend(redis, claim_idle=settings.JOBS_CLAIM_IDLE)
+        return cls(
+            MemoryBackend(),
+            durable,
+            parse_queues(settings.JOBS_QUEUES),
+            parse_queues(settings.JOBS_LOCAL_QUEUES),
+        )
+
+    def backend_for(self, queue: str):
+        if self.durable is not None and queue in self.durable_queues:
+            return self.durable
+        return self.local
+
+    async def enqueue(self, name: str, **kwargs: Any) -> Job:
+        """Queue a run of the registered job `name` and return at once."""
+        spec = JOBS[name]
+        job = Job(name, spec.queue, kwargs)
+        backend = self.backend_for(spec.queue)
+        if backend is not self.local:
+            try:
+                await backend.push(job)
+            except RedisUnavailableError:
+                logger.warning(f"Job {name} queued in-process, Redis is unavailable")
+                backend = self.local
+        if backend is self.local:
+            await self.local.push(job)
+        JOBS_ENQUEUED.labels(queue=job.queue, backend=backend.name).inc()
+        return job
+
+
+class _Consumer:
+    __slots__ = ("backend", "queue", "limit", "busy", "freed")
+
+    def __init__(self, backend, queue: str, limit: int):
+        self.backend = backend
+        self.queue = queue
+        self.limit = limit
+        self.busy = 0
+        self.freed = asyncio.Event()
+
+
+class Worker:
+    """Runs jobs from (backend, queue) consumers and enqueues periodic jobs.
+
+    Each consumer has its own concurrency limit, so a burst of slow jobs on
+    one queue cannot take every slot. A failing job is retried after an
+    exponential backoff with full jitter until it has used its attempts, then
+    dead-lettered. Handlers get `context` (the AppResources) as their first
+    argument.
+    """
+
+    def __init__(
+        self,
+        context: Any,
+        max_attempts: int = 5,
+        retry_base: float = 1.0,
+        retry_max: float = 300.0,
+        poll_interval: float = 0.5,
+    ):
+        self.context = context
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.poll_interval = poll_interval
+        self._consumers: List[_Consumer] = []
+        self._schedules: List[Tuple[float, JobQueue, str]] = []
+        self._tasks: Set[asyncio.Task] = set()
+        self._running: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: Settings,
+        context: Any,
+        jobs: JobQueue,
+        local: bool = True,
+        durable: bool = True,
+    ) -> "Worker":
+        """Consume the in-process queues (every queue can fall back to them)
+        and, when `durable`, the configured Redis queues."""
+        worker = cls(
+            context,
+            max_attempts=settings.JOBS_MAX_ATTEMPTS,
+            retry_base=settings.JOBS_RETRY_BASE_DELAY,
+            retry_max=settings.JOBS_RETRY_MAX_DELAY,
+            poll_interval=settings.JOBS_POLL_INTERVAL,
+        )
+        if local:
+            for queue, limit in {**jobs.durable_queues, **jobs.local_queues}.items():
+                worker.consume(jobs.local, queue, limit)
+        if durable and jobs.durable is not None:
+            for queue, limit in jobs.durable_queues.items():
+                worker.consume(jobs.durable, queue, limit)
+        return worker
+
+    def consume(self, backend, queue: str, concurrency: int) -> None:
+        self._consumers.append(_Consumer(backend, queue, concurrency))
+
+    def every(self, interval: float, jobs: JobQueue, name: str) -> None:
+        """Enqueue the job `name` every `interval` seconds while running."""
+        self._schedules.append((interval, jobs, name))
+
+    def backoff(self, attempts: int) -> float:
+        return random.uniform(
+            0, min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+        )
+
+    def start(self) -> None:
+        for consumer in self._consumers:
+            self._spawn(self._tasks, self._consume(consumer))
+        for interval, jobs, name in self._schedules:
+            self._spawn(self._tasks, self._schedule(interval, jobs, name))
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Stop fetching, then give running jobs `timeout` seconds to finish.
+
+        Jobs cut short stay pending in Redis and are claimed again later;
+        in-process ones are lost.
+        """
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._running:
+            _, unfinished = await asyncio.wait(self._running, timeout=timeout)
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+
+    @staticmethod
+    def _spawn(tasks: Set[asyncio.Task], coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        # The loop only keeps weak references to tasks
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def _schedule(self, interval: float, jobs: JobQueue, name: str) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await jobs.enqueue(name)
+
+    async def _consume(self, consumer: _Consumer) -> None:
+        failures = 0
+        while True:
+            while consumer.busy >= consumer.limit:
+                consumer.freed.clear()
+                await consumer.freed.wait()
+            try:
+                jobs = await consumer.backend.fetch(
+                    consumer.queue, consumer.limit - consumer.busy, self.poll_interval
+                )
+            except RedisUnavailableError:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            except Exception as e:
+                # Anything else would end this task and leave the queue
+                # without a consumer while the worker keeps running
+                failures += 1
+                logger.error(
+                    f"Fetching jobs from {consumer.queue} failed "
+                    f"({failures} in a row): {str(e)}"
+                )
+                await asyncio.sleep(max(self.backoff(failures), self.poll_interval))
+                continue
+            failures = 0
+            for job in jobs:
+                consumer.busy += 1
+                self._spawn(self._running, self._run(consumer, job))
+
+    async def _run(self, consumer: _Consumer, job: Job) -> None:
+        backend = consumer.backend
+        JOB_WAIT.labels(queue=job.queue).observe(max(time.time() - job.enqueued_at, 0))
+        JOBS_RUNNING.labels(queue=job.queue).inc()
+        spec = JOBS.get(job.name)
+        start = time.perf_counter()
+        try:
+            if spec is None:
+                raise LookupError(f"No job is registered as {job.name}")
+            await spec.handler(self.context, **job.kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.attempts += 1
+            max_attempts = (spec and spec.max_attempts) or self.max_attempts
+            if spec is None or job.attempts >= max_attempts:
+                logger.error(
+                    f"Job {job.name} {job.id} failed {job.attempts} times, "
+                    f"dead-lettered: {str(e)}"
+                )
+                outcome = "dead"
+                settle = backend.dead(job, repr(e))
+            else:
+                delay = self.backoff(job.attempts)
+                logger.warning(
+                    f"Job {job.name} {job.id} failed, retry in {delay:.1f}s: {str(e)}"
+                )
+                outcome = "retried"
+                job.enqueued_at = time.time() + delay
+                settle = backend.retry(job, delay)
+        else:
+            outcome = "done"
+            settle = backend.ack(job)
+        finally:
+            JOB_DURATION.labels(job=job.name).observe(time.perf_counter() - start)
+            JOBS_RUNNING.labels(queue=job.queue).dec()
+            consumer.busy -= 1
+            consumer.freed.set()
+
+        try:
+            await settle
+        except RedisUnavailableError as e:
+            # Still pending in the group, so it is claimed and run again later
+            logger.warning(f"Job {job.name} {job.id} not settled: {str(e)}")
+        JOBS_FINISHED.labels(queue=job.queue, outcome=outcome).inc()
@@ -0,0 +1,45 @@
+import asyncio
+import random
+import time
+from typing import Optional
+
+from src.core.security import get_password_hash, verify_password
+
+
+class LoginLatency:
+    """Moving average of how long a credential check takes for a real user.
+
+    Logins for unknown emails skip the database row and Argon2 entirely and
+    instead sleep until the same amount of time has passed, so response
+    timing does not reveal whether an account exists and enumeration attempts
+    cost the server an idle timer rather than a CPU-bound hash.
+    """
+
+    def __init__(self, smoothing: float = 0.1, jitter: float = 0.05):
+        self.smoothing = smoothing
+        self.jitter = jitter
+        self.average: Optional[float] = None
+
+    def observe(self, seconds: float) -> None:
+        if self.average is None:
+            self.average = seconds
+        else:
+            self.average += self.smoothing * (seconds - self.average)
+
+    def calibrate(self) -> None:
+        """Seed the average by verifying a precomputed dummy hash once."""
+        dummy_hash = get_password_hash("calibration-password")
+        start = time.perf_counter()
+        verify_password("calibration-password", dummy_hash)
+        self.observe(time.perf_counter() - start)
+
+    async def pad(self, started_at: float) -> None:
+        """Sleep until a typical check started at `started_at` would finish."""
+        if self.average is None:
+            return
+        target = self.average * random.uniform(  # nosec B311
+            1 - self.jitter, 1 + self.jitter
+        )
+        remaining = target - (time.perf_counter() - started_at)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
@@ -0,0 +1,159 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, List, Optional
+
+from fastapi import FastAPI, Request
+from prometheus_client import Counter, Histogram
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.core.config import settings
+from src.utils.logging import logger
+from src.utils.routing import route_template
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late a timer on the event loop fired",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "event_loop_blocks_total", "Times the event loop was blocked past the threshold"
+)
+
+
+class LoopBlock:
+    """One stall of the event loop and the stack that caused it, if caught."""
+
+    __slots__ = ("started_at", "duration", "stack")
+
+    def __init__(self, started_at: float, duration: float, stack: Optional[str]):
+        self.started_at = started_at
+        self.duration = duration
+        self.stack = stack
+
+
+class LoopLagMonitor:
+    """Measures event loop lag and captures the stacks of calls that block it.
+
+    A task on the loop sleeps `interval` seconds at a time and records how
+    late it wakes up; every other coroutine waited that long too. A watchdog
+    thread checks that the task keeps ticking. Once the loop has been stuck
+    for `threshold` seconds it takes the loop thread's stack, which at that
+    moment belongs to the coroutine or callback holding the loop.
+    """
+
+    def __init__(self, interval: float = 0.25, threshold: float = 0.1, history=50):
+        self.interval = interval
+        self.threshold = threshold
+        self.blocks: Deque[LoopBlock] = deque(maxlen=history)
+        self.block_count = 0
+        self._lock = threading.Lock()
+        self._beat = 0.0
+        # (beat, block) of the stall the watchdog is following
+        self._watched = (None, None)
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        """Start monitoring the running loop."""
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._tick())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def since(self, count: int) -> List[LoopBlock]:
+        """Blocks recorded after block_count was `count`."""
+        with self._lock:
+            new = self.block_count - count
+            return list(self.blocks)[-new:] if new > 0 else []
+
+    def _add(self, block: LoopBlock) -> None:
+        with self._lock:
+            self.blocks.append(block)
+            self.block_count += 1
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            beat = self._beat = time.monotonic()
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - started - self.interval, 0.0)
+            EVENT_LOOP_LAG.observe(lag)
+            if lag < self.threshold:
+                continue
+            watched_beat, block = self._watched
+            if watched_beat == beat:
+                block.duration = lag
+            else:
+                # Shorter than the watchdog's polling period
+                block = LoopBlock(time.time() - lag, lag, None)
+                self._add(block)
+            EVENT_LOOP_BLOCKS.inc()
+            logger.warning(
+                f"Event loop blocked for {lag * 1000:.0f} ms"
+                + (f" in:\n{block.stack}" if block.stack else "")
+            )
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.threshold / 2):
+            beat = self._beat
+            stuck = time.monotonic() - beat - self.interval
+            if stuck < self.threshold:
+                continue
+            watched_beat, block = self._watched
+            if watched_beat != beat:
+                frame = sys._current_frames().get(self._loop_thread)
+                stack = (
+                    "".join(traceback.format_stack(frame, limit=30)) if frame else None
+                )
+                block = LoopBlock(time.time() - stuck, stuck, stack)
+                self._watched = (beat, block)
+                self._add(block)
+            block.duration = stuck
+
+
+class LoopBlockingMiddleware(BaseHTTPMiddleware):
+    """Test mode: fail any request that blocks the loop past LOOP_BLOCK_FAIL_MS.
+
+    Blocks are attributed to the request in flight, so this is only exact
+    when requests do not overlap, as with the test client.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        monitor: LoopLagMonitor = request.app.state.resources.loop_monitor
+        before = monitor.block_count
+        response = await call_next(request)
+        limit = settings.LOOP_BLOCK_FAIL_MS / 1000
+        worst = max(monitor.since(before), key=lambda b: b.duration, default=None)
+        if worst is not None and worst.duration > limit:
+            raise AssertionError(
+                f"{request.method} {route_template(request)} blocked the event "
+                f"loop for {worst.duration * 1000:.0f} ms "
+                f"(limit {settings.LOOP_BLOCK_FAIL_MS:.0f} ms) in:\n{worst.stack}"
+            )
+        return response
+
+
+def setup_loop_monitor(app: FastAPI) -> None:
+    """Register the blocking-call assertion when LOOP_BLOCK_FAIL_MS is set."""
+    if settings.LOOP_BLOCK_FAIL_MS > 0:
+        app.add_middleware(LoopBlockingMiddleware)
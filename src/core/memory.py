@@ -0,0 +1,175 @@
+import asyncio
+import gc
+import os
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from prometheus_client import Gauge, Histogram
+
+from src.core.config import Settings
+from src.core.exceptions import MemoryTracingError
+
+# RSS is already exported by prometheus_client as process_resident_memory_bytes,
+# and collections per generation as python_gc_collections_total
+GC_GENERATION_COUNT = Gauge(
+    "python_gc_generation_count",
+    "Allocation count (gen 0) or younger collections (gen 1, 2) since the "
+    "generation was last collected",
+    ["generation"],
+)
+GC_PAUSE = Histogram(
+    "python_gc_pause_seconds",
+    "Time the interpreter was paused by one garbage collection",
+    ["generation"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+
+for _generation in range(3):
+    GC_GENERATION_COUNT.labels(generation=str(_generation)).set_function(
+        lambda generation=_generation: gc.get_count()[generation]
+    )
+
+# Allocations made by the diagnostics themselves are noise in every report
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+_gc_started: Optional[float] = None
+
+
+def _time_gc(phase: str, info: dict) -> None:
+    # Collections hold the GIL and never nest, so one start time is enough
+    global _gc_started
+    if phase == "start":
+        _gc_started = time.perf_counter()
+    elif _gc_started is not None:
+        GC_PAUSE.labels(generation=str(info["generation"])).observe(
+            time.perf_counter() - _gc_started
+        )
+        _gc_started = None
+
+
+def install_gc_metrics() -> None:
+    """Time every garbage collection in this process; safe to call repeatedly."""
+    if _time_gc not in gc.callbacks:
+        gc.callbacks.append(_time_gc)
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _statistic(stat) -> dict:
+    entry = {
+        "size": stat.size,
+        "count": stat.count,
+        "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+    }
+    if isinstance(stat, tracemalloc.StatisticDiff):
+        entry["size_diff"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+class MemoryDiagnostics:
+    """Per-worker memory growth diagnostics behind the admin endpoints.
+
+    tracemalloc is off by default, since tracing slows every allocation; it
+    is started on demand and snapshots are kept in memory, `snapshots_kept`
+    at most, so two of them can be diffed to find what grows. Sizes of
+    in-process caches and tables registered with track() are reported
+    alongside RSS and the GC counters.
+    """
+
+    def __init__(self, frames: int = 10, snapshots_kept: int = 5):
+        self.frames = frames
+        self.snapshots_kept = snapshots_kept
+        self.snapshots: "OrderedDict[int, tracemalloc.Snapshot]" = OrderedDict()
+        self._next_id = 1
+        self._sizes: Dict[str, Callable[[], int]] = {}
+        install_gc_metrics()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "MemoryDiagnostics":
+        return cls(
+            frames=settings.MEMORY_TRACE_FRAMES,
+            snapshots_kept=settings.MEMORY_SNAPSHOTS_KEPT,
+        )
+
+    def track(self, name: str, size: Callable[[], int]) -> None:
+        """Report `size()` as the number of entries held by `name`."""
+        self._sizes[name] = size
+
+    def sizes(self) -> Dict[str, int]:
+        return {name: size() for name, size in self._sizes.items()}
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start_tracing(self, frames: Optional[int] = None) -> None:
+        if not self.tracing:
+            tracemalloc.start(frames or self.frames)
+
+    def stop_tracing(self) -> None:
+        """Stop tracing and drop the snapshots, which hold all traces in memory."""
+        tracemalloc.stop()
+        self.snapshots.clear()
+
+    async def take_snapshot(self) -> int:
+        """Snapshot the traced allocations; returns the snapshot id."""
+        if not self.tracing:
+            raise MemoryTracingError()
+        snapshot = await asyncio.to_thread(
+            lambda: tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        )
+        snapshot_id = self._next_id
+        self._next_id += 1
+        self.snapshots[snapshot_id] = snapshot
+        while len(self.snapshots) > self.snapshots_kept:
+            self.snapshots.popitem(last=False)
+        return snapshot_id
+
+    async def top(
+        self, snapshot_id: int, limit: int = 20, group_by: str = "lineno"
+    ) -> List[dict]:
+        """The allocation sites holding the most memory in one snapshot."""
+        snapshot = self.snapshots[snapshot_id]
+        stats = await asyncio.to_thread(snapshot.statistics, group_by)
+        return [_statistic(stat) for stat in stats[:limit]]
+
+    async def diff(
+        self, base_id: int, snapshot_id: int, limit: int = 20, group_by: str = "lineno"
+    ) -> List[dict]:
+        """The allocation sites that grew the most between two snapshots."""
+        base = self.snapshots[base_id]
+        snapshot = self.snapshots[snapshot_id]
+        stats = await asyncio.to_thread(snapshot.compare_to, base, group_by)
+        return [_statistic(stat) for stat in stats[:limit]]
+
+    def report(self) -> dict:
+        report = {
+            "rss_bytes": rss_bytes(),
+            "gc": {
+                "counts": gc.get_count(),
+                "thresholds": gc.get_threshold(),
+            },
+            "tracing": self.tracing,
+            "snapshots": list(self.snapshots),
+            "sizes": self.sizes(),
+        }
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            report["traced_memory"] = {"current": current, "peak": peak}
+        return report
@@ -0,0 +1,184 @@
+import hashlib
+import math
+import mmap
+import os
+import string
+from typing import List, Optional
+
+from src.core.config import Settings
+from src.core.exceptions import PasswordTooWeakException
+
+UPPER = frozenset(string.ascii_uppercase)
+LOWER = frozenset(string.ascii_lowercase)
+DIGITS = frozenset(string.digits)
+SPECIAL = frozenset('!@#$%^&*(),.?":{}|<>')
+KNOWN = UPPER | LOWER | DIGITS | SPECIAL
+# Rough pool size for characters outside the classes above
+OTHER_POOL = 32
+
+# Character classes as bits of one mask computed per password
+CLASS_BITS = {"upper": 1, "lower": 2, "digit": 4, "special": 8}
+OTHER_BIT = 16
+CLASS_MESSAGES = {
+    "upper": "Password must contain at least one uppercase letter",
+    "lower": "Password must contain at least one lowercase letter",
+    "digit": "Password must contain at least one number",
+    "special": "Password must contain at least one special character",
+}
+
+
+def _pool_bits(mask: int) -> float:
+    pool = sum(
+        len(group)
+        for bit, group in ((1, UPPER), (2, LOWER), (4, DIGITS), (8, SPECIAL))
+        if mask & bit
+    )
+    pool += OTHER_POOL if mask & OTHER_BIT else 0
+    return math.log2(pool) if pool > 1 else 0.0
+
+
+# log2 of the guessing pool for every combination of classes
+POOL_BITS = tuple(_pool_bits(mask) for mask in range(32))
+
+
+def class_mask(chars: frozenset) -> int:
+    """Bit mask of the character classes present in a set of characters."""
+    mask = 0
+    if not chars.isdisjoint(UPPER):
+        mask |= 1
+    if not chars.isdisjoint(LOWER):
+        mask |= 2
+    if not chars.isdisjoint(DIGITS):
+        mask |= 4
+    if not chars.isdisjoint(SPECIAL):
+        mask |= 8
+    if not chars <= KNOWN:
+        mask |= OTHER_BIT
+    return mask
+
+
+class BreachedPasswords:
+    """Lookup in a local breached-password file without loading it.
+
+    The file holds uppercase SHA-1 hashes, one per line and sorted, optionally
+    followed by ":count" (the Have I Been Pwned "ordered by hash" download).
+    It is memory-mapped and binary-searched, so a lookup touches a few pages
+    and the OS page cache is shared by every worker on the host. The map
+    holds its own descriptor of the file until close().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "BreachedPasswords":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _line_at(self, offset: int) -> int:
+        return self._map.rfind(b"\n", 0, offset) + 1
+
+    def __contains__(self, password: str) -> bool:
+        digest = hashlib.sha1(password.encode(), usedforsecurity=False)
+        target = digest.hexdigest().upper().encode()
+        data = self._map
+        low, high = 0, len(data)
+        while low < high:
+            start = self._line_at((low + high) // 2)
+            candidate = data[start : start + 40]
+            if candidate == target:
+                return True
+            if candidate < target:
+                end = data.find(b"\n", start)
+                low = len(data) if end == -1 else end + 1
+            else:
+                high = start
+        return False
+
+
+class PasswordPolicy:
+    """Configurable password rules checked in a single pass.
+
+    The password is scanned once into a set of its characters and reduced to
+    a bit mask of the classes present; class requirements and the entropy
+    estimate (via a precomputed pool table) are answered from the mask, and
+    every violation is reported together.
+    """
+
+    def __init__(
+        self,
+        min_length: int = 8,
+        required_classes=("upper", "lower", "digit", "special"),
+        min_entropy_bits: float = 0.0,
+        breached: Optional[BreachedPasswords] = None,
+    ):
+        self.min_length = min_length
+        self.required_classes = tuple(required_classes)
+        self._class_checks = tuple(
+            (CLASS_BITS[name], CLASS_MESSAGES[name]) for name in self.required_classes
+        )
+        self.min_entropy_bits = min_entropy_bits
+        self.breached = breached
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "PasswordPolicy":
+        classes = [c for c in settings.PASSWORD_REQUIRED_CLASSES.split(",") if c]
+        unknown = set(classes) - CLASS_BITS.keys()
+        if unknown:
+            raise ValueError(f"Unknown password classes: {', '.join(sorted(unknown))}")
+        breached = None
+        if settings.PASSWORD_BREACHED_FILE:
+            # A typo in the path must not quietly turn the check off
+            if not os.path.isfile(settings.PASSWORD_BREACHED_FILE):
+                raise ValueError(
+                    f"Breached password file not found: {settings.PASSWORD_BREACHED_FILE}"
+                )
+            breached = BreachedPasswords(settings.PASSWORD_BREACHED_FILE)
+        return cls(
+            min_length=settings.PASSWORD_MIN_LENGTH,
+            required_classes=classes,
+            min_entropy_bits=settings.PASSWORD_MIN_ENTROPY_BITS,
+            breached=breached,
+        )
+
+    def close(self) -> None:
+        """Release the breached-password file, if any."""
+        if self.breached is not None:
+            self.breached.close()
+
+    @staticmethod
+    def entropy_bits(password: str) -> float:
+        """Length times log2 of the pool implied by the classes used."""
+        return len(password) * POOL_BITS[class_mask(frozenset(password))]
+
+    def violations(self, password: str) -> List[str]:
+        """Every rule the password breaks, in a stable order; empty if none."""
+        problems = []
+        if len(password) < self.min_length:
+            problems.append(
+                f"Password must be at least {self.min_length} characters long"
+            )
+        mask = class_mask(frozenset(password))
+        for bit, message in self._class_checks:
+            if not mask & bit:
+                problems.append(message)
+        if (
+            self.min_entropy_bits
+            and len(password) * POOL_BITS[mask] < self.min_entropy_bits
+        ):
+            problems.append("Password is too predictable")
+        if self.breached is not None and password in self.breached:
+            problems.append("Password has appeared in a data breach")
+        return problems
+
+    def check(self, password: str) -> None:
+        """Raise PasswordTooWeakException listing every violation."""
+        problems = self.violations(password)
+        if problems:
+            raise PasswordTooWeakException("; ".join(problems), violations=problems)
@@ -0,0 +1,237 @@
+import hashlib
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.core.config import settings
+from src.utils.routing import route_template
+
+DEBUG_PROFILE_HEADER = "X-Debug-Profile"
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "current_profile", default=None
+)
+
+
+class RequestProfile:
+    """Time spent per phase (db, argon2, jwt, serialization) in one request."""
+
+    __slots__ = ("route", "started_at", "phases", "threads")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.started_at = time.perf_counter()
+        self.phases: Dict[str, float] = defaultdict(float)
+        self.threads = {threading.get_ident()}
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] += seconds
+
+    def server_timing(self, total: float) -> str:
+        parts = [f"{name};dur={secs * 1000:.2f}" for name, secs in self.phases.items()]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def profile_phase(phase: str):
+    """Attribute the enclosed block to a phase of the current sampled request.
+
+    Costs a single context variable lookup when the request is not sampled.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    profile.threads.add(threading.get_ident())
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(phase, time.perf_counter() - start)
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    """Add already-measured time to a phase of the current sampled request."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.threads.add(threading.get_ident())
+        profile.add(phase, seconds)
+
+
+def sign_debug_header(expires_at: int, secret_key: Optional[str] = None) -> str:
+    """Build an X-Debug-Profile value that forces profiling until expires_at."""
+    key = (secret_key or settings.SECRET_KEY).encode()
+    signature = hmac.new(key, f"profile:{expires_at}".encode(), hashlib.sha256)
+    return f"{expires_at}.{signature.hexdigest()}"
+
+
+def verify_debug_header(value: str) -> bool:
+    expires_at, _, signature = value.partition(".")
+    if not expires_at.isdigit() or int(expires_at) < time.time():
+        return False
+    expected = sign_debug_header(int(expires_at)).partition(".")[2]
+    return hmac.compare_digest(signature, expected)
+
+
+class StackSampler:
+    """Low-overhead statistical profiler aggregating folded stacks.
+
+    A daemon thread wakes every `interval` seconds while at least one sampled
+    request is in flight and records the stacks of the threads those requests
+    run on (the event loop plus any threadpool workers they used). Stacks are
+    kept in Brendan Gregg's folded format, ready for flamegraph.pl/speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005, max_stacks: int = 10000):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.stacks: Counter = Counter()
+        self.route_phases: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self.route_counts: Counter = Counter()
+        self._active: Dict[int, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def begin(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active[id(profile)] = profile
+        self._wake.set()
+
+    def end(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active.pop(id(profile), None)
+            self.route_counts[profile.route] += 1
+            for phase, seconds in profile.phases.items():
+                self.route_phases[profile.route][phase] += seconds
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stacks.clear()
+            self.route_phases.clear()
+            self.route_counts.clear()
+
+    def folded(self) -> str:
+        with self._lock:
+            items = self.stacks.most_common()
+        return "\n".join(f"{stack} {count}" for stack, count in items)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                route: {
+                    "requests": count,
+                    "avg_ms": {
+                        phase: round(total * 1000 / count, 3)
+                        for phase, total in self.route_phases[route].items()
+                    },
+                }
+                for route, count in self.route_counts.items()
+            }
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stopped:
+            # Clear before reading so a begin() racing with us is not missed
+            self._wake.clear()
+            with self._lock:
+                threads = {
+                    tid
+                    for profile in self._active.values()
+                    for tid in tuple(profile.threads)
+                }
+            if not threads:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for tid in threads - {own_id}:
+                    frame = frames.get(tid)
+                    if frame is not None:
+                        self._record(frame)
+            time.sleep(self.interval)
+
+    def _record(self, frame) -> None:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            filename = os.path.basename(code.co_filename)
+            names.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        stack = ";".join(reversed(names))
+        if stack in self.stacks or len(self.stacks) < self.max_stacks:
+            self.stacks[stack] += 1
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """Profile a sample of requests, or any carrying a signed debug header.
+
+    Sampled responses carry a Server-Timing header with the per-phase
+    breakdown; stacks and phase totals are aggregated for the admin endpoint.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        header = request.headers.get(DEBUG_PROFILE_HEADER)
+        sampled = (header is not None and verify_debug_header(header)) or (
+            settings.PROFILING_SAMPLE_RATE > 0
+            and random.random() < settings.PROFILING_SAMPLE_RATE  # nosec B311
+        )
+        if not sampled:
+            return await call_next(request)
+
+        sampler: StackSampler = request.app.state.resources.profiler
+        profile = RequestProfile(request.method)
+        token = _current_profile.set(profile)
+        sampler.begin(profile)
+        try:
+            response = await call_next(request)
+        finally:
+            _current_profile.reset(token)
+            # Aggregate by route template rather than raw path
+            profile.route = f"{request.method} {route_template(request)}"
+            sampler.end(profile)
+        total = time.perf_counter() - profile.started_at
+        response.headers["Server-Timing"] = profile.server_timing(total)
+        return response
+
+
+class ProfiledJSONResponse(JSONResponse):
+    """JSONResponse that reports rendering time as the serialization phase."""
+
+    def render(self, content) -> bytes:
+        with profile_phase("serialization"):
+            return super().render(content)
+
+
+def setup_profiling(app: FastAPI) -> None:
+    """Register the sampling profiler middleware."""
+    app.add_middleware(ProfilingMiddleware)
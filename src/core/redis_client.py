@@ -0,0 +1,462 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from prometheus_client import Counter, Histogram
+from redis import asyncio as aioredis
+from redis.exceptions import NoScriptError, RedisError
+
+from src.core.config import Settings
+from src.core.exceptions import RedisUnavailableError
+from src.utils.logging import logger
+
+REDIS_COMMAND_LATENCY = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+REDIS_COMMAND_ERRORS = Counter(
+    "redis_command_errors_total", "Failed Redis commands", ["command"]
+)
+REDIS_FALLBACKS = Counter(
+    "redis_fallback_total",
+    "Redis commands served by the local fallback",
+    ["command"],
+)
+REDIS_LOCAL_CACHE = Counter(
+    "redis_local_cache_total", "Client-side cache lookups", ["result"]
+)
+
+INVALIDATION_CHANNEL = "__redis__:invalidate"
+
+
+class CircuitBreaker:
+    """Stops calling Redis after repeated failures and retries after a cool-down.
+
+    closed: calls pass through. open: calls are short-circuited until
+    reset_timeout has elapsed. half-open: one trial call decides whether to
+    close again or re-open.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._trial_started_at = 0.0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state != "half-open":
+            return state == "closed"
+        # A trial that never reported back (cancelled) is given up after
+        # reset_timeout, so the circuit cannot stay shut for good
+        now = time.monotonic()
+        if self._trial_in_flight and now - self._trial_started_at < self.reset_timeout:
+            return False
+        self._trial_in_flight = True
+        self._trial_started_at = now
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half-open" or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self.state == "half-open":
+                logger.warning("Redis circuit opened after repeated failures")
+            self.opened_at = time.monotonic()
+
+
+class LocalCache:
+    """Bounded LRU mapping with a per-entry TTL."""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 5.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_MISSING = object()
+
+
+class RedisClient:
+    """Shared async Redis client for the whole worker.
+
+    One connection pool per worker is opened in AppResources.startup(). Every
+    command goes through execute(), which records latency, counts errors and
+    trips a circuit breaker; while the circuit is open, get/set/delete/incr are
+    served from a process-local store so callers keep working (per worker) until
+    Redis is back.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = 50,
+        socket_timeout: float = 0.5,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        local_cache_size: int = 10000,
+        local_cache_ttl: float = 5.0,
+        tracking_prefixes: Sequence[str] = (),
+        client: Optional[aioredis.Redis] = None,
+    ):
+        self.url = url
+        self.max_connections = max_connections
+        self.socket_timeout = socket_timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.local_cache = LocalCache(local_cache_size, local_cache_ttl)
+        self.fallback_store = LocalCache(local_cache_size, ttl=0)
+        self.tracking_prefixes = list(tracking_prefixes)
+        self._redis = client
+        self._tracking_task: Optional[asyncio.Task] = None
+        self._script_shas: Dict[str, str] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RedisClient":
+        prefixes = [p for p in settings.REDIS_CLIENT_TRACKING_PREFIXES.split(",") if p]
+        return cls(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            failure_threshold=settings.REDIS_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.REDIS_CIRCUIT_RESET_SECONDS,
+            local_cache_size=settings.REDIS_LOCAL_CACHE_SIZE,
+            local_cache_ttl=settings.REDIS_LOCAL_CACHE_TTL,
+            tracking_prefixes=prefixes,
+        )
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        if self._redis is None:
+            kwargs = {}
+            if self.tracking_prefixes:
+                kwargs["connection_class"] = _TrackingConnection
+            pool = aioredis.ConnectionPool.from_url(
+                self.url,
+                max_connections=self.max_connections,
+                socket_timeout=self.socket_timeout,
+                socket_connect_timeout=self.socket_timeout,
+                **kwargs,
+            )
+            self._redis = aioredis.Redis(connection_pool=pool)
+        return self._redis
+
+    @property
+    def available(self) -> bool:
+        return self.breaker.state == "closed"
+
+    async def connect(self, warm_connections: int = 1) -> bool:
+        """Open up to warm_connections pooled connections; False if Redis is down."""
+        try:
+            await asyncio.gather(
+                *(self.execute("PING") for _ in range(max(warm_connections, 1)))
+            )
+        except RedisUnavailableError:
+            logger.warning("Redis is unavailable at startup, using local fallback")
+            return False
+        if self.tracking_prefixes and self._tracking_task is None:
+            self._tracking_task = asyncio.create_task(self._listen_invalidations())
+        return True
+
+    async def close(self) -> None:
+        if self._tracking_task is not None:
+            self._tracking_task.cancel()
+            try:
+                await self._tracking_task
+            except asyncio.CancelledError:
+                pass
+            self._tracking_task = None
+        if self._redis is not None:
+            await self._redis.close()
+            await self._redis.connection_pool.disconnect()
+            self._redis = None
+
+    async def execute(
+        self, command: str, *args: Any, fallback: Optional[Callable[[], Any]] = None
+    ) -> Any:
+        """Run one command with metrics and circuit breaking.
+
+        When Redis is unavailable, return fallback() if given, otherwise raise
+        RedisUnavailableError.
+        """
+        if self.breaker.allow():
+            start = time.perf_counter()
+            try:
+                result = await self.redis.execute_command(command, *args)
+            except NoScriptError:
+                # Redis is fine, it just lacks the script; run_script() loads it
+                self.breaker.record_success()
+                raise
+            except (RedisError, OSError) as e:
+                REDIS_COMMAND_ERRORS.labels(command=command).inc()
+                self.breaker.record_failure()
+                logger.warning(f"Redis command {command} failed: {str(e)}")
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                REDIS_COMMAND_LATENCY.labels(command=command).observe(
+                    time.perf_counter() - start
+                )
+
+        if fallback is None:
+            raise RedisUnavailableError()
+        REDIS_FALLBACKS.labels(command=command).inc()
+        return fallback()
+
+    async def run_script(
+        self,
+        script: str,
+        keys: Sequence[str],
+        args: Sequence[Any],
+        fallback: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """Run a Lua script by SHA, sending the source only when Redis lacks it."""
+        sha = self._script_shas.get(script)
+        if sha is None:
+            sha = hashlib.sha1(script.encode(), usedforsecurity=False).hexdigest()
+            self._script_shas[script] = sha
+        try:
+            return await self.execute(
+                "EVALSHA", sha, len(keys), *keys, *args, fallback=fallback
+            )
+        except NoScriptError:
+            return await self.execute(
+                "EVAL", script, len(keys), *keys, *args, fallback=fallback
+            )
+
+    # Key/value helpers with a process-local fallback
+
+    async def get(self, key: str) -> Any:
+        return await self.execute(
+            "GET", key, fallback=lambda: self.fallback_store.get(key)
+        )
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> Any:
+        args = (key, value) if ex is None else (key, value, "EX", ex)
+
+        def fallback():
+            self.fallback_store.set(key, _encode(value), ttl=ex)
+            return True
+
+        result = await self.execute("SET", *args, fallback=fallback)
+        self.local_cache.delete(key)
+        return result
+
+    async def delete(self, *keys: str) -> int:
+        result = await self.execute(
+            "DEL", *keys, fallback=lambda: self.fallback_store.delete(*keys)
+        )
+        self.local_cache.delete(*keys)
+        return result
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        def fallback():
+            value = int(self.fallback_store.get(key, 0)) + amount
+            self.fallback_store.set(key, value, ttl=0)
+            return value
+
+        return await self.execute("INCRBY", key, amount, fallback=fallback)
+
+    # Client-side caching
+
+    async def cached_get(self, key: str, ttl: Optional[float] = None) -> Any:
+        """GET through the worker-local cache.
+
+        Entries expire after ttl (REDIS_LOCAL_CACHE_TTL by default). When client
+        tracking is enabled for the key's prefix, Redis also pushes
+        invalidations so writes from other workers evict the entry immediately.
+        """
+        value = self.local_cache.get(key, _MISSING)
+        if value is not _MISSING:
+            REDIS_LOCAL_CACHE.labels(result="hit").inc()
+            return value
+        REDIS_LOCAL_CACHE.labels(result="miss").inc()
+        value = await self.get(key)
+        if self.available:
+            self.local_cache.set(key, value, ttl)
+        return value
+
+    def invalidate_local(self, keys: Optional[Iterable[Any]]) -> None:
+        """Apply an invalidation message; None means flush everything."""
+        if keys is None:
+            self.local_cache.clear()
+            return
+        self.local_cache.delete(*(_decode(key) for key in keys))
+
+    async def _listen_invalidations(self) -> None:
+        # RESP2 client tracking: pooled connections enable tracking in
+        # broadcast mode and redirect invalidations to this dedicated
+        # connection, which is subscribed to the invalidation channel.
+        pool = self.redis.connection_pool
+        while True:
+            connection = None
+            try:
+                kwargs = dict(pool.connection_kwargs)
+                kwargs.pop("tracking_args", None)
+                kwargs["socket_timeout"] = None
+                connection = aioredis.Connection(**kwargs)
+                await connection.connect()
+                await connection.send_command("CLIENT", "ID")
+                client_id = await connection.read_response()
+                await connection.send_command("SUBSCRIBE", INVALIDATION_CHANNEL)
+                await connection.read_response()
+
+                tracking_args = ["CLIENT", "TRACKING", "ON"]
+                tracking_args += ["REDIRECT", client_id, "BCAST"]
+                for prefix in self.tracking_prefixes:
+                    tracking_args += ["PREFIX", prefix]
+                pool.connection_kwargs["tracking_args"] = tracking_args
+                # Idle connections reconnect with tracking pointed at us
+                await pool.disconnect(inuse_connections=False)
+                self.local_cache.clear()
+
+                while True:
+                    response = await connection.read_response()
+                    if response and response[0] == b"message":
+                        self.invalidate_local(response[2])
+            except (RedisError, OSError) as e:
+                # Without invalidations the cache could serve stale data
+                logger.warning(f"Redis invalidation listener failed: {str(e)}")
+                self.local_cache.clear()
+                await asyncio.sleep(1.0)
+            finally:
+                if connection is not None:
+                    await connection.disconnect()
+
+    # Pipelining and batching
+
+    async def pipeline(
+        self, commands: Sequence[Sequence[Any]], transaction: bool = False
+    ) -> List[Any]:
+        """Send several commands in one round trip and return their results.
+
+        Raises RedisUnavailableError when Redis is down so callers can choose
+        their own fallback for multi-command work.
+        """
+        if not self.breaker.allow():
+            raise RedisUnavailableError()
+        pipe = self.redis.pipeline(transaction=transaction)
+        for command in commands:
+            pipe.execute_command(*command)
+        start = time.perf_counter()
+        try:
+            results = await pipe.execute()
+        except (RedisError, OSError) as e:
+            REDIS_COMMAND_ERRORS.labels(command="PIPELINE").inc()
+            self.breaker.record_failure()
+            raise RedisUnavailableError(f"Redis pipeline failed: {str(e)}")
+        finally:
+            REDIS_COMMAND_LATENCY.labels(command="PIPELINE").observe(
+                time.perf_counter() - start
+            )
+        self.breaker.record_success()
+        return results
+
+    async def mget_batched(
+        self, keys: Sequence[str], batch_size: int = 500
+    ) -> List[Any]:
+        """MGET a large key list in fixed-size batches sent in one round trip."""
+        if not keys:
+            return []
+        commands = [
+            ("MGET", *keys[i : i + batch_size]) for i in range(0, len(keys), batch_size)
+        ]
+        try:
+            batches = await self.pipeline(commands)
+        except RedisUnavailableError:
+            REDIS_FALLBACKS.labels(command="MGET").inc()
+            return [self.fallback_store.get(key) for key in keys]
+        return [value for batch in batches for value in batch]
+
+    async def set_many(
+        self, mapping: Dict[str, Any], ex: Optional[int] = None, batch_size: int = 500
+    ) -> None:
+        """SET many keys with one round trip per batch_size keys."""
+        items = list(mapping.items())
+        expiry = () if ex is None else ("EX", ex)
+        for i in range(0, len(items), batch_size):
+            batch = items[i : i + batch_size]
+            try:
+                await self.pipeline(
+                    [("SET", key, value, *expiry) for key, value in batch]
+                )
+            except RedisUnavailableError:
+                REDIS_FALLBACKS.labels(command="SET").inc()
+                for key, value in batch:
+                    self.fallback_store.set(key, _encode(value), ttl=ex)
+        self.local_cache.delete(*mapping)
+
+
+class _TrackingConnection(aioredis.Connection):
+    """Connection that enables client tracking right after connecting."""
+
+    def __init__(self, *args, tracking_args: Optional[List[Any]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tracking_args = tracking_args
+
+    async def on_connect(self) -> None:
+        await super().on_connect()
+        if self.tracking_args:
+            await self.send_command(*self.tracking_args)
+            await self.read_response()
+
+
+def _encode(value: Any) -> Any:
+    """Store fallback values the way Redis would return them."""
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+def _decode(key: Any) -> str:
+    return key.decode() if isinstance(key, bytes) else key
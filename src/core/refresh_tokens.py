@@ -0,0 +1,57 @@
+import time
+
+from src.core.redis_client import RedisClient
+
+ROTATED = "rotated"
+REUSED = "reused"
+REVOKED = "revoked"
+
+# KEYS[1]: used marker of the presented refresh JTI
+# KEYS[2]: revocation marker of its token family
+# ARGV[1]: seconds until the presented token expires
+# ARGV[2]: seconds to keep a family revoked
+ROTATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return 'revoked'
+end
+if redis.call('SET', KEYS[1], '1', 'NX', 'EX', ARGV[1]) then
+    return 'rotated'
+end
+redis.call('SET', KEYS[2], '1', 'EX', ARGV[2])
+return 'reused'
+"""
+
+
+class RefreshTokenStore:
+    """Single-use refresh tokens with family-wide revocation on reuse.
+
+    Every refresh token carries the family (`fam` claim) started at login. A
+    rotation atomically consumes the presented JTI; presenting an already
+    consumed JTI means the token leaked, so the whole family is revoked and
+    both the attacker and the victim must log in again. State lives in Redis
+    so all workers agree; with no per-worker fallback, rotation fails closed
+    (RedisUnavailableError) while Redis is down, as each worker would accept
+    the same token once and its consumed JTIs would never reach Redis.
+    """
+
+    def __init__(self, redis: RedisClient, family_ttl: int):
+        self.redis = redis
+        self.family_ttl = family_ttl
+
+    @staticmethod
+    def _family_key(family: str) -> str:
+        return f"refresh:family:{family}:revoked"
+
+    async def rotate(self, jti: str, family: str, expires_at: int) -> str:
+        """Consume a refresh JTI; returns ROTATED, REUSED or REVOKED."""
+        used_key, family_key = f"refresh:used:{jti}", self._family_key(family)
+        ttl = max(1, int(expires_at - time.time()))
+        result = await self.redis.run_script(
+            ROTATE_SCRIPT, keys=(used_key, family_key), args=(ttl, self.family_ttl)
+        )
+        return result.decode() if isinstance(result, bytes) else result
+
+    async def revoke_family(self, family: str) -> None:
+        await self.redis.execute(
+            "SET", self._family_key(family), 1, "EX", self.family_ttl
+        )
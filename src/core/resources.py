@@ -0,0 +1,286 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+
+from src.core.admission import AdmissionController
+from src.core.audit import AuditLog
+from src.core.batch_loader import BatchLoader
+from src.core.bloom import EmailBloomFilter
+from src.core.config import Settings
+from src.core.health import HealthMonitor
+from src.core.jobs import JobQueue, Worker
+from src.core.login_timing import LoginLatency
+from src.core.loop_monitor import LoopLagMonitor
+from src.core.memory import MemoryDiagnostics
+from src.core.profiling import StackSampler
+from src.core.redis_client import RedisClient
+from src.core.security import get_password_policy, rate_limited_clients
+from src.core.sessions import SessionStore
+from src.core.token_generations import TokenGenerations
+from src.core.token_manager import TokenBlacklist
+from src.core.tracing import configure_tracing, shutdown_tracing
+from src.db.models.user import User
+from src.db.repositories import (
+    get_sharded_users_by_emails,
+    get_sharded_users_by_ids,
+    iter_registered_emails,
+)
+from src.db.session import check_db_connection, create_db_engine
+from src.db.sharding import ShardRouter
+from src.services import jobs  # noqa: F401  (registers the job handlers)
+from src.utils.logging import logger
+
+
+def _noop() -> None:
+    """Trivial task used to force process pool workers to spawn."""
+
+
+class AppResources:
+    """Per-worker resources opened in the app lifespan and kept on app.state.
+
+    Nothing here is created at import time, so a pre-fork server can import the
+    app once and every worker still builds its own pools after the fork.
+    """
+
+    def __init__(self, settings: Settings, consume_durable_jobs: Optional[bool] = None):
+        self.settings = settings
+        self.consume_durable_jobs = (
+            settings.JOBS_IN_PROCESS
+            if consume_durable_jobs is None
+            else consume_durable_jobs
+        )
+        self.engine: Optional[Engine] = None
+        self.session_factory: Optional[sessionmaker] = None
+        self.shards: Optional[ShardRouter] = None
+        self.users_by_id: Optional[BatchLoader[int, User]] = None
+        self.users_by_email: Optional[BatchLoader[str, User]] = None
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+        self.redis: Optional[RedisClient] = None
+        self.sessions: Optional[SessionStore] = None
+        self.token_generations: Optional[TokenGenerations] = None
+        self.audit: Optional[AuditLog] = None
+        self.jobs: Optional[JobQueue] = None
+        self.worker: Optional[Worker] = None
+        self.tracer_provider = None
+        self.token_blacklist = TokenBlacklist()
+        self.login_admission = AdmissionController(
+            "login",
+            max_concurrency=settings.LOGIN_MAX_CONCURRENCY,
+            queue_deadline=settings.LOGIN_QUEUE_DEADLINE,
+        )
+        self.email_filter: Optional[EmailBloomFilter] = None
+        self.login_latency = LoginLatency()
+        self._shard_map_task: Optional[asyncio.Task] = None
+        self.profiler = StackSampler(interval=settings.PROFILING_INTERVAL)
+        block_threshold = settings.LOOP_BLOCK_THRESHOLD
+        if settings.LOOP_BLOCK_FAIL_MS > 0:
+            # Catch every stall the test-mode assertion has to see
+            block_threshold = min(block_threshold, settings.LOOP_BLOCK_FAIL_MS / 1000)
+        self.loop_monitor = LoopLagMonitor(
+            interval=settings.LOOP_MONITOR_INTERVAL, threshold=block_threshold
+        )
+        self.memory = MemoryDiagnostics.from_settings(settings)
+        self.health = HealthMonitor(
+            interval=settings.HEALTH_CHECK_INTERVAL,
+            timeout=settings.HEALTH_CHECK_TIMEOUT,
+            stale_after=settings.HEALTH_CHECK_STALE_AFTER,
+        )
+        self.health.register("postgres", self.check_postgres)
+        # Redis outages degrade to the local fallback, so they don't fail readiness
+        self.health.register("redis", self.check_redis, critical=False)
+
+    async def startup(self) -> None:
+        """Open pools and warm them before the worker accepts traffic."""
+        # Bad PASSWORD_* settings stop the worker here, not at the first signup
+        get_password_policy()
+        self.tracer_provider = configure_tracing(self.settings)
+        self.engine = create_db_engine()
+        self.session_factory = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        )
+        self.shards = ShardRouter.from_settings(self.settings, self.session_factory)
+        self.audit = AuditLog.from_settings(self.settings, self.engine)
+        self.audit.start()
+        if self.shards.sharded:
+            await asyncio.to_thread(self.shards.load_map)
+            self._shard_map_task = asyncio.create_task(self._refresh_shard_map())
+        # Concurrent requests for different users share one query per shard
+        self.users_by_id = BatchLoader(
+            "users_by_id",
+            partial(get_sharded_users_by_ids, self.shards),
+            window=self.settings.USER_LOADER_WINDOW,
+            max_batch=self.settings.USER_LOADER_MAX_BATCH,
+        )
+        self.users_by_email = BatchLoader(
+            "users_by_email",
+            partial(get_sharded_users_by_emails, self.shards),
+            window=self.settings.USER_LOADER_WINDOW,
+            max_batch=self.settings.USER_LOADER_MAX_BATCH,
+        )
+        if self.settings.PROCESS_POOL_WORKERS > 0:
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=self.settings.PROCESS_POOL_WORKERS
+            )
+        self.redis = RedisClient.from_settings(self.settings)
+        await self.redis.connect(warm_connections=self.settings.REDIS_POOL_WARMUP)
+        self.sessions = SessionStore(
+            self.redis,
+            ttl=self.settings.SESSION_TTL_SECONDS,
+            cache_size=self.settings.SESSION_CACHE_SIZE,
+            cache_ttl=self.settings.SESSION_CACHE_TTL,
+        )
+        self.token_generations = TokenGenerations(
+            self.redis, self.shards, ttl=self.settings.TOKEN_GENERATION_TTL
+        )
+        self.email_filter = EmailBloomFilter(
+            self.settings.LOGIN_FILTER_CAPACITY,
+            self.settings.LOGIN_FILTER_ERROR_RATE,
+            redis=self.redis,
+            # Outlives one missed rebuild
+            built_ttl=2 * self.settings.LOGIN_FILTER_REFRESH,
+        )
+        await self.load_email_filter()
+        self.jobs = JobQueue.from_settings(self.settings, self.redis)
+        self.worker = Worker.from_settings(
+            self.settings, self, self.jobs, durable=self.consume_durable_jobs
+        )
+        self.worker.every(
+            self.settings.LOGIN_FILTER_REFRESH, self.jobs, "login_filter.rebuild"
+        )
+        self.worker.every(
+            self.settings.LOGIN_FILTER_RELOAD, self.jobs, "login_filter.reload"
+        )
+        self.worker.every(
+            self.settings.BLACKLIST_PRUNE_INTERVAL, self.jobs, "auth.prune_blacklist"
+        )
+        self.worker.every(
+            self.settings.AUDIT_MAINTENANCE_INTERVAL,
+            self.jobs,
+            "audit.maintain_partitions",
+        )
+        self.worker.start()
+        self.track_memory()
+        self.warm_up()
+        if self.process_pool is not None:
+            self.health.register("process_pool", self.check_process_pool)
+        await self.health.start()
+        self.profiler.start()
+        # Last, so the blocking warm-up above is not reported
+        self.loop_monitor.start()
+        logger.info("Application resources started")
+
+    def track_memory(self) -> None:
+        """Register the in-process caches and tables that can grow."""
+        track = self.memory.track
+        track("token_blacklist", lambda: len(self.token_blacklist))
+        track("rate_limited_clients", rate_limited_clients)
+        track("redis_local_cache", lambda: len(self.redis.local_cache))
+        track("redis_fallback_store", lambda: len(self.redis.fallback_store))
+        track("session_cache", lambda: len(self.sessions.cache))
+        track("audit_buffer", lambda: len(self.audit))
+        track("profiler_stacks", lambda: len(self.profiler.stacks))
+        track("profiler_routes", lambda: len(self.profiler.route_counts))
+        track("loop_blocks", lambda: len(self.loop_monitor.blocks))
+
+    def warm_up(self) -> None:
+        """Pre-connect database connections and load lazily imported tools."""
+        connections = []
+        try:
+            for _ in range(
+                min(self.settings.DB_POOL_WARMUP, self.settings.DB_POOL_SIZE)
+            ):
+                connection = self.engine.connect()
+                connection.execute(text("SELECT 1"))
+                connections.append(connection)
+        except SQLAlchemyError as e:
+            logger.warning(f"Database pool warm-up failed: {str(e)}")
+        finally:
+            # Returning the connections leaves them open in the pool
+            for connection in connections:
+                connection.close()
+
+        if self.process_pool is not None:
+            futures = [
+                self.process_pool.submit(_noop)
+                for _ in range(self.settings.PROCESS_POOL_WORKERS)
+            ]
+            for future in futures:
+                future.result()
+
+        # Loads argon2 and gives unknown-user logins a latency to match
+        self.login_latency.calibrate()
+
+    async def load_email_filter(self) -> None:
+        """Take the shared login filter, building it from the database if none."""
+        if await self.email_filter.load_shared():
+            logger.info("Login email filter loaded from Redis")
+            return
+        await self.build_email_filter()
+
+    async def build_email_filter(self) -> None:
+        """Add every registered email to the login filter and share it whole."""
+        try:
+            count = await asyncio.to_thread(self._read_emails_into_filter)
+        except SQLAlchemyError as e:
+            logger.warning(f"Login email filter not loaded: {str(e)}")
+            return
+        await self.email_filter.publish(complete=True)
+        logger.info(f"Login email filter built with {count} emails")
+
+    def _read_emails_into_filter(self) -> int:
+        return self.email_filter.load(iter_registered_emails(self.shards))
+
+    async def _refresh_shard_map(self) -> None:
+        # Follows buckets moved by devops/scripts/reshard.py
+        while True:
+            await asyncio.sleep(self.settings.DB_SHARD_MAP_REFRESH)
+            await asyncio.to_thread(self.shards.load_map)
+
+    async def check_postgres(self) -> bool:
+        return await asyncio.to_thread(check_db_connection, self.session_factory)
+
+    async def check_redis(self) -> bool:
+        # Bypass the circuit breaker so the probe sees recovery immediately
+        return bool(await self.redis.redis.ping())
+
+    async def check_process_pool(self) -> bool:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.process_pool, _noop)
+        return True
+
+    async def shutdown(self) -> None:
+        """Release everything opened in startup()."""
+        self.loop_monitor.stop()
+        await self.health.stop()
+        self.profiler.stop()
+        if self.worker is not None:
+            await self.worker.stop()
+            self.worker = None
+        if self.audit is not None:
+            # Before the engine it writes with is disposed
+            await self.audit.stop()
+            self.audit = None
+        if self._shard_map_task is not None:
+            self._shard_map_task.cancel()
+            self._shard_map_task = None
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=True)
+            self.process_pool = None
+        if self.shards is not None:
+            self.shards.dispose()
+            self.shards = None
+        if self.engine is not None:
+            self.engine.dispose()
+            self.engine = None
+        shutdown_tracing(self.tracer_provider)
+        self.tracer_provider = None
+        logger.info("Application resources closed")
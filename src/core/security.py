@@ -1,99 +1,167 @@
-import re
+import weakref
 from datetime import datetime, timedelta
-from typing import Dict, Set
+from typing import Dict
 
-from argon2 import PasswordHasher
-from argon2.exceptions import InvalidHashError, VerifyMismatchError
 from fastapi import FastAPI, HTTPException, Request
-from passlib.context import CryptContext
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from src.core.config import settings
-from src.core.exceptions import PasswordTooWeakException
+from src.core.password_policy import PasswordPolicy
+from src.core.profiling import profile_phase
+from src.core.tracing import span, traced
 from src.utils.logging import logger
 
-# Initialize security tools with consistent configuration
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-password_hasher = PasswordHasher()
+# (cost parameters, PasswordHasher); argon2 is loaded on first use so that
+# importing the app stays cheap
+_password_hasher = None
+# (policy settings, PasswordPolicy)
+_password_policy = None
 
 
+def get_password_hasher():
+    """Return the shared Argon2 hasher, importing argon2 on first use.
+
+    Costs come from the ARGON2_* settings; the hasher is rebuilt if they change.
+    """
+    global _password_hasher
+    params = (
+        settings.ARGON2_TIME_COST,
+        settings.ARGON2_MEMORY_COST,
+        settings.ARGON2_PARALLELISM,
+    )
+    if _password_hasher is None or _password_hasher[0] != params:
+        from argon2 import PasswordHasher
+
+        time_cost, memory_cost, parallelism = params
+        hasher = PasswordHasher(
+            time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+        )
+        _password_hasher = (params, hasher)
+    return _password_hasher[1]
+
+
+@traced("security.get_password_hash")
 def get_password_hash(password: str) -> str:
     """Hash a password using Argon2."""
-    return password_hasher.hash(password)
+    with profile_phase("argon2"):
+        return get_password_hasher().hash(password)
 
 
+@traced("security.verify_password")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash using Argon2."""
+    from argon2.exceptions import InvalidHashError, VerifyMismatchError
+
     try:
-        return password_hasher.verify(hashed_password, plain_password)
+        with profile_phase("argon2"):
+            return get_password_hasher().verify(hashed_password, plain_password)
     except (VerifyMismatchError, InvalidHashError):
         return False
 
 
-def validate_password_strength(password: str) -> bool:
-    """
-    Validate password strength requirements.
-    Returns True if password is strong enough, raises PasswordTooWeakException otherwise.
-    """
-    if len(password) < 8:
-        raise PasswordTooWeakException("Password must be at least 8 characters long")
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when a hash was made with costs other than the configured ones."""
+    from argon2.exceptions import InvalidHashError
 
-    if not re.search(r"[A-Z]", password):
-        raise PasswordTooWeakException(
-            "Password must contain at least one uppercase letter"
-        )
+    try:
+        return get_password_hasher().check_needs_rehash(hashed_password)
+    except InvalidHashError:
+        return False
 
-    if not re.search(r"[a-z]", password):
-        raise PasswordTooWeakException(
-            "Password must contain at least one lowercase letter"
-        )
 
-    if not re.search(r"\d", password):
-        raise PasswordTooWeakException("Password must contain at least one number")
+def get_password_policy() -> PasswordPolicy:
+    """Return the shared PasswordPolicy, rebuilt if the PASSWORD_* settings change."""
+    global _password_policy
+    params = (
+        settings.PASSWORD_MIN_LENGTH,
+        settings.PASSWORD_REQUIRED_CLASSES,
+        settings.PASSWORD_MIN_ENTROPY_BITS,
+        settings.PASSWORD_BREACHED_FILE,
+    )
+    if _password_policy is None or _password_policy[0] != params:
+        previous = _password_policy
+        _password_policy = (params, PasswordPolicy.from_settings(settings))
+        if previous is not None:
+            previous[1].close()
+    return _password_policy[1]
 
-    if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", password):
-        raise PasswordTooWeakException(
-            "Password must contain at least one special character"
-        )
 
+def validate_password_strength(password: str) -> bool:
+    """
+    Validate password strength requirements.
+    Returns True if password is strong enough, raises PasswordTooWeakException
+    listing every violated rule otherwise.
+    """
+    get_password_policy().check(password)
     return True
 
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
+    """Sliding-window login rate limit per client IP, local to the worker.
+
+    Only IPs with a request inside the current window are kept: an IP's
+    entry is rewritten on each of its requests, and the whole table is swept
+    for idle IPs whenever it doubles in size.
+    """
+
+    MIN_PRUNE_SIZE = 1024
+
     def __init__(self, app):
         super().__init__(app)
         self.requests: Dict[str, list] = {}
+        self._prune_at = self.MIN_PRUNE_SIZE
+        _rate_limiters.add(self)
 
     async def dispatch(self, request: Request, call_next):
         if request.url.path == "/api/v1/auth/login":
-            client_ip = request.client.host
-            now = datetime.utcnow()
-            window_start = now - timedelta(seconds=settings.LOGIN_RATE_LIMIT_WINDOW)
-
-            # Clean old requests
-            if client_ip in self.requests:
-                self.requests[client_ip] = [
-                    req_time
-                    for req_time in self.requests[client_ip]
-                    if req_time > window_start
-                ]
-
-            # Check rate limit
-            if (
-                client_ip in self.requests
-                and len(self.requests[client_ip]) >= settings.LOGIN_RATE_LIMIT_REQUESTS
-            ):
-                raise HTTPException(
-                    status_code=429, detail="Too many requests. Please try again later."
-                )
-
-            # Record request
-            if client_ip not in self.requests:
-                self.requests[client_ip] = []
-            self.requests[client_ip].append(now)
+            with span("middleware.rate_limit"):
+                self.check_rate_limit(request)
 
         return await call_next(request)
 
+    def check_rate_limit(self, request: Request) -> None:
+        client_ip = request.client.host
+        now = datetime.utcnow()
+        window_start = now - timedelta(seconds=settings.LOGIN_RATE_LIMIT_WINDOW)
+
+        # Clean old requests
+        recent = [
+            req_time
+            for req_time in self.requests.get(client_ip, ())
+            if req_time > window_start
+        ]
+
+        # Check rate limit
+        if len(recent) >= settings.LOGIN_RATE_LIMIT_REQUESTS:
+            self.requests[client_ip] = recent
+            raise HTTPException(
+                status_code=429, detail="Too many requests. Please try again later."
+            )
+
+        # Record request
+        recent.append(now)
+        self.requests[client_ip] = recent
+        if len(self.requests) >= self._prune_at:
+            self.prune(window_start)
+            # Amortized: sweep again only after the live table doubles
+            self._prune_at = max(self.MIN_PRUNE_SIZE, 2 * len(self.requests))
+
+    def prune(self, window_start: datetime) -> int:
+        """Drop IPs with no request since window_start; returns how many."""
+        idle = [ip for ip, times in self.requests.items() if times[-1] <= window_start]
+        for ip in idle:
+            del self.requests[ip]
+        return len(idle)
+
+
+# Live middleware instances; Starlette builds them lazily, out of reach of the app
+_rate_limiters: "weakref.WeakSet[RateLimitMiddleware]" = weakref.WeakSet()
+
+
+def rate_limited_clients() -> int:
+    """Client IPs currently held by the login rate limiter in this process."""
+    return sum(len(limiter.requests) for limiter in _rate_limiters)
+
 
 def setup_security(app: FastAPI) -> None:
     """Setup security middleware and configurations for the FastAPI app."""
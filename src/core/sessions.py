@@ -0,0 +1,201 @@
+import hashlib
+import secrets
+from typing import Optional, Tuple
+
+from src.core.config import settings
+from src.core.exceptions import RedisUnavailableError
+from src.core.redis_client import LocalCache, RedisClient
+
+SESSION_TOKEN_PREFIX = "st_"
+USER_INDEX_PREFIX = "sessions:user:"
+# Index members checked for expired sessions each time the index is touched
+PRUNE_SAMPLE = 20
+
+# Drops up to ARGV[n] index members whose session key has expired
+_PRUNE = """
+for _, member in ipairs(redis.call('SRANDMEMBER', KEYS[2], ARGV[%d])) do
+    if redis.call('EXISTS', member) == 0 then
+        redis.call('SREM', KEYS[2], member)
+    end
+end
+"""
+
+# KEYS[1]: session key; KEYS[2]: its user's index key; ARGV[1]: encoded
+# session; ARGV[2]: idle TTL; ARGV[3]: prune sample.
+CREATE_SCRIPT = (
+    """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+"""
+    + _PRUNE % 3
+    + """
+redis.call('SADD', KEYS[2], KEYS[1])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+"""
+)
+
+# KEYS[1]: session key; KEYS[2]: its user's index key; ARGV[1]: idle TTL;
+# ARGV[2]: prune sample. Reads the session and slides both it and the index
+# in one call; an expired session is dropped from the index instead.
+TOUCH_SCRIPT = (
+    """
+local value = redis.call('GETEX', KEYS[1], 'EX', ARGV[1])
+if not value then
+    redis.call('SREM', KEYS[2], KEYS[1])
+    return false
+end
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+"""
+    + _PRUNE % 2
+    + """
+return value
+"""
+)
+
+# KEYS[1]: user index key. Deletes every session listed in it and returns
+# how many were still live.
+REVOKE_ALL_SCRIPT = """
+local keys = redis.call('SMEMBERS', KEYS[1])
+local deleted = 0
+for i = 1, #keys, 500 do
+    deleted = deleted + redis.call('DEL', unpack(keys, i, math.min(i + 499, #keys)))
+end
+redis.call('DEL', KEYS[1])
+return deleted
+"""
+
+
+def is_session_token(token: str) -> bool:
+    return token.startswith(SESSION_TOKEN_PREFIX)
+
+
+def uses_session_tokens(client_id: Optional[str]) -> bool:
+    """Whether a login from this OAuth client_id gets an opaque session token."""
+    return bool(client_id) and client_id in settings.SESSION_TOKEN_CLIENTS.split(",")
+
+
+class Session:
+    __slots__ = ("user_id", "client_id")
+
+    def __init__(self, user_id: int, client_id: str):
+        self.user_id = user_id
+        self.client_id = client_id
+
+    def encode(self) -> str:
+        return f"{self.user_id}|{self.client_id}"
+
+    @classmethod
+    def decode(cls, value) -> "Session":
+        if isinstance(value, bytes):
+            value = value.decode()
+        user_id, _, client_id = value.partition("|")
+        return cls(int(user_id), client_id)
+
+
+class SessionStore:
+    """Opaque bearer tokens backed by server-side sessions in Redis.
+
+    Tokens are random and only their SHA-256 is stored, so a Redis dump does
+    not leak usable credentials. Each session expires after `ttl` idle
+    seconds; every Redis read slides it. A per-worker LRU front cache serves
+    repeat lookups for up to `cache_ttl` seconds, which bounds how long a
+    revocation takes to reach other workers. Revoking one session is a single
+    DEL; revoking all of a user's sessions walks a per-user index set, so no
+    blacklist is needed. Tokens carry the user id, which hash-tags a session
+    key and its user's index into one Redis Cluster slot so scripts can
+    declare both. While Redis is down, sessions live in the worker's fallback
+    store.
+    """
+
+    def __init__(
+        self,
+        redis: RedisClient,
+        ttl: int,
+        cache_size: int = 10000,
+        cache_ttl: float = 5.0,
+    ):
+        self.redis = redis
+        self.ttl = ttl
+        self.cache = LocalCache(cache_size, cache_ttl)
+
+    @staticmethod
+    def _user_key(user_id: int) -> str:
+        return f"{USER_INDEX_PREFIX}{{{user_id}}}"
+
+    @staticmethod
+    def _keys(token: str) -> Optional[Tuple[str, str]]:
+        """Session key and user index key for a token; None if malformed."""
+        user_id, dot, _ = token[len(SESSION_TOKEN_PREFIX) :].partition(".")
+        if not dot or not user_id.isdigit():
+            return None
+        digest = hashlib.sha256(token.encode()).hexdigest()
+        return f"session:{{{user_id}}}:{digest}", SessionStore._user_key(user_id)
+
+    async def create(self, user_id: int, client_id: str = "") -> str:
+        token = f"{SESSION_TOKEN_PREFIX}{user_id}.{secrets.token_urlsafe(32)}"
+        key, user_key = self._keys(token)
+        session = Session(user_id, client_id)
+        try:
+            await self.redis.run_script(
+                CREATE_SCRIPT,
+                keys=(key, user_key),
+                args=(session.encode(), self.ttl, PRUNE_SAMPLE),
+            )
+        except RedisUnavailableError:
+            store = self.redis.fallback_store
+            store.set(key, session.encode(), ttl=self.ttl)
+            store.set(user_key, store.get(user_key, frozenset()) | {key}, ttl=0)
+        self.cache.set(key, session)
+        return token
+
+    async def get(self, token: str) -> Optional[Session]:
+        """Return the live session for a token and slide its expiry."""
+        keys = self._keys(token)
+        if keys is None:
+            return None
+        key, user_key = keys
+        session = self.cache.get(key)
+        if session is not None:
+            return session
+
+        def fallback():
+            value = self.redis.fallback_store.get(key)
+            if value is not None:
+                self.redis.fallback_store.set(key, value, ttl=self.ttl)
+            return value
+
+        value = await self.redis.run_script(
+            TOUCH_SCRIPT,
+            keys=(key, user_key),
+            args=(self.ttl, PRUNE_SAMPLE),
+            fallback=fallback,
+        )
+        if value is None:
+            return None
+        session = Session.decode(value)
+        self.cache.set(key, session)
+        return session
+
+    async def revoke(self, token: str) -> None:
+        keys = self._keys(token)
+        if keys is None:
+            return
+        key, user_key = keys
+        self.cache.delete(key)
+        await self.redis.delete(key)
+        await self.redis.execute("SREM", user_key, key, fallback=lambda: 0)
+
+    async def revoke_all(self, user_id: int) -> int:
+        """End every session of a user; returns how many were still live."""
+        user_key = self._user_key(user_id)
+
+        def fallback():
+            keys = self.redis.fallback_store.get(user_key, frozenset())
+            self.redis.fallback_store.delete(user_key)
+            return self.redis.fallback_store.delete(*keys)
+
+        count = await self.redis.run_script(
+            REVOKE_ALL_SCRIPT, keys=(user_key,), args=(), fallback=fallback
+        )
+        # The front cache is not indexed by user, so drop this worker's copy
+        self.cache.clear()
+        return count
@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Tuple
+
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.trace import StatusCode
+
+
+class TailSamplingProcessor(SpanProcessor):
+    """Span processor that decides whether to keep a trace once it ends.
+
+    Spans are buffered per trace until the local root span finishes. The root
+    and the spans below it are then exported if one of them failed, if the
+    root took at least latency_threshold seconds, or otherwise with
+    probability sample_rate. Slow and failing requests are always kept without
+    paying for 100% export. Every local root is decided on its own, so a trace
+    that calls this service twice can keep one call and drop the other.
+
+    Decisions are remembered per span of recently decided traces, so spans
+    ending after their parent (work left running by the request) follow it;
+    spans whose local root never ends are dropped after pending_timeout
+    seconds.
+    """
+
+    def __init__(
+        self,
+        exporter_processor,
+        sample_rate: float = 0.01,
+        latency_threshold: float = 0.5,
+        max_pending_traces: int = 10000,
+        pending_timeout: float = 60.0,
+        max_decided_traces: int = 10000,
+    ):
+        self.exporter_processor = exporter_processor
+        self.sample_rate = sample_rate
+        self.latency_threshold = latency_threshold
+        self.max_pending_traces = max_pending_traces
+        self.pending_timeout = pending_timeout
+        self.max_decided_traces = max_decided_traces
+        # trace id -> (monotonic time of its first span, finished spans)
+        self._pending: "OrderedDict[int, Tuple[float, List]]" = OrderedDict()
+        # trace id -> {span id: kept} for decided spans, least recently used first
+        self._decided: "OrderedDict[int, Dict[int, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        now = time.monotonic()
+        with self._lock:
+            if trace_id not in self._pending:
+                self._pending[trace_id] = (now, [])
+            self._pending[trace_id][1].append(span)
+            decided = self._decided.get(trace_id, {})
+            if span.parent is None or span.parent.is_remote:
+                spans = self._take_subtree(trace_id, span)
+                keep = self._keep(span, spans)
+            elif span.parent.span_id in decided:
+                # Ended after its parent was decided: follows that decision
+                spans = self._take_subtree(trace_id, span)
+                keep = decided[span.parent.span_id]
+            else:
+                self._expire_pending(now)
+                return
+            self._remember(trace_id, spans, keep)
+
+        if keep:
+            for finished in spans:
+                self.exporter_processor.on_end(finished)
+
+    def _take_subtree(self, trace_id: int, top: ReadableSpan) -> List:
+        # Remove `top` and its finished descendants from the trace's pending
+        # spans; spans of other calls in the same trace stay
+        started, spans = self._pending.pop(trace_id)
+        children = defaultdict(list)
+        for finished in spans:
+            if finished is not top:
+                children[finished.parent.span_id].append(finished)
+        subtree, stack = [], [top]
+        while stack:
+            current = stack.pop()
+            subtree.append(current)
+            stack.extend(children.pop(current.context.span_id, ()))
+        rest = [finished for group in children.values() for finished in group]
+        if rest:
+            self._pending[trace_id] = (started, rest)
+            self._pending.move_to_end(trace_id, last=False)
+        return subtree
+
+    def _remember(self, trace_id: int, spans: List, keep: bool) -> None:
+        decided = self._decided.setdefault(trace_id, {})
+        for finished in spans:
+            decided[finished.context.span_id] = keep
+        self._decided.move_to_end(trace_id)
+        while len(self._decided) > self.max_decided_traces:
+            self._decided.popitem(last=False)
+
+    def _expire_pending(self, now: float) -> None:
+        # Oldest first: drop traces past the timeout or over the cap
+        while self._pending:
+            started, _ = next(iter(self._pending.values()))
+            if (
+                len(self._pending) <= self.max_pending_traces
+                and now - started < self.pending_timeout
+            ):
+                break
+            self._pending.popitem(last=False)
+
+    def _keep(self, root, spans) -> bool:
+        if any(s.status.status_code is StatusCode.ERROR for s in spans):
+            return True
+        duration = (root.end_time - root.start_time) / 1e9
+        if duration >= self.latency_threshold:
+            return True
+        return random.random() < self.sample_rate  # nosec B311
+
+    def shutdown(self) -> None:
+        self.exporter_processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.exporter_processor.force_flush(timeout_millis)
@@ -0,0 +1,74 @@
+import asyncio
+from typing import Optional
+
+from src.core.redis_client import RedisClient
+from src.db.repositories import get_token_generation, increment_token_generation
+from src.db.sharding import ShardRouter
+
+
+class TokenGenerations:
+    """Per-user token generation, bumped to revoke every token of a user.
+
+    Tokens carry the generation current when they were minted (`gen` claim)
+    and are rejected once the user's generation moves past it, so "log out
+    everywhere" needs no per-token state. The user's shard holds the counter;
+    reads go through the worker-local cache and Redis (RedisClient.cached_get),
+    and reach the database only when both miss. Add "user:" to
+    REDIS_CLIENT_TRACKING_PREFIXES to evict local copies on every worker as
+    soon as a generation is bumped, instead of after REDIS_LOCAL_CACHE_TTL.
+    """
+
+    def __init__(self, redis: RedisClient, shards: ShardRouter, ttl: int):
+        self.redis = redis
+        self.shards = shards
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"user:{user_id}:token_generation"
+
+    async def current(self, user_id: int) -> int:
+        key = self._key(user_id)
+        value = await self.redis.cached_get(key)
+        if value is not None:
+            return int(value)
+
+        generation = await asyncio.to_thread(self._read, user_id)
+        # NX: never overwrite a newer value written by a concurrent bump
+        await self.redis.execute(
+            "SET",
+            key,
+            generation,
+            "NX",
+            "EX",
+            self.ttl,
+            fallback=lambda: self.redis.fallback_store.set(key, generation, self.ttl),
+        )
+        self.redis.local_cache.delete(key)
+        return generation
+
+    async def bump(self, user_id: int) -> Optional[int]:
+        """Invalidate every token issued to the user so far.
+
+        Raises RedisUnavailableError, before the counter moves, when Redis is
+        down: a cached generation it could not update would accept the
+        revoked tokens again once Redis came back.
+        """
+        key = self._key(user_id)
+        try:
+            await self.redis.execute("DEL", key)
+            generation = await asyncio.to_thread(self._increment, user_id)
+            if generation is not None:
+                # Replaces an old value a concurrent current() cached meanwhile
+                await self.redis.execute("SET", key, generation, "EX", self.ttl)
+        finally:
+            self.redis.local_cache.delete(key)
+        return generation
+
+    def _read(self, user_id: int) -> int:
+        with self.shards.user_session(user_id) as db:
+            return get_token_generation(db, user_id) or 0
+
+    def _increment(self, user_id: int) -> Optional[int]:
+        with self.shards.user_session(user_id) as db:
+            return increment_token_generation(db, user_id)
@@ -1,141 +1,144 @@
-import uuid
-from datetime import datetime, timedelta
-from typing import Dict, Set
-
-import jwt
+import time
+from typing import Dict, Optional, Union
 
 from src.core.config import settings
 from src.core.exceptions import InvalidTokenError
+from src.core.token_generations import TokenGenerations
+from src.core.token_minter import TokenMinter, TokenPair
+from src.core.token_parser import ParsedToken, TokenClaims
+from src.core.tracing import traced
 from src.utils.logging import logger
 
-# Token blacklist storage (use Redis in production)
-_token_blacklist: Set[str] = set()
+# (token settings, TokenMinter)
+_token_minter = None
+
+
+class TokenBlacklist:
+    """Process-local revoked token JTIs, owned by AppResources.
+
+    Each JTI is kept only until the token it blocks would have expired anyway;
+    expired entries are pruned as the set grows, so it stays proportional to
+    the tokens revoked within one token lifetime. Revoking every token of a
+    user goes through TokenGenerations instead.
+    """
+
+    MIN_PRUNE_SIZE = 1024
+
+    def __init__(self):
+        self._expiry: Dict[str, float] = {}
+        self._prune_at = self.MIN_PRUNE_SIZE
+
+    def add(self, jti: str, expires_at: Optional[float] = None) -> None:
+        if expires_at is None:
+            # Unknown expiry: keep it for the longest token lifetime
+            expires_at = time.time() + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        self._expiry[jti] = expires_at
+        if len(self._expiry) >= self._prune_at:
+            self.prune()
+            # Amortized: prune again only after the live set doubles
+            self._prune_at = max(self.MIN_PRUNE_SIZE, 2 * len(self._expiry))
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Drop JTIs whose tokens have expired; returns how many were dropped."""
+        now = time.time() if now is None else now
+        expired = [jti for jti, expires_at in self._expiry.items() if expires_at <= now]
+        for jti in expired:
+            del self._expiry[jti]
+        return len(expired)
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._expiry
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+
+def access_token_expiry_bound() -> float:
+    """Latest expiry of an access token minted now, for JTIs seen without one."""
+    return time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+def get_token_minter() -> TokenMinter:
+    """Return the shared TokenMinter, rebuilt if the token settings change."""
+    global _token_minter
+    params = (
+        settings.SECRET_KEY,
+        settings.REFRESH_SECRET_KEY,
+        settings.ALGORITHM,
+        settings.TOKEN_ISSUER,
+        settings.TOKEN_AUDIENCE,
+        settings.ENVIRONMENT,
+        settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+        settings.REFRESH_TOKEN_EXPIRE_DAYS,
+    )
+    if _token_minter is None or _token_minter[0] != params:
+        _token_minter = (params, TokenMinter.from_settings(settings))
+    return _token_minter[1]
 
 
 def create_access_token(data: Dict, refresh_jti: str = None) -> tuple[str, str]:
     """Create a new access token and return the token along with its JTI."""
-    jti = str(uuid.uuid4())
-    to_encode = data.copy()
-    audience = (
-        "test-audience" if settings.ENVIRONMENT == "test" else settings.TOKEN_AUDIENCE
-    )
-
-    to_encode.update(
-        {
-            "jti": jti,
-            "refresh_jti": refresh_jti,
-            "type": "access",
-            "exp": datetime.utcnow()
-            + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-            "iat": datetime.utcnow(),
-            "iss": settings.TOKEN_ISSUER,
-            "aud": audience,
-        }
-    )
-    encoded_token = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
-    )
-    return encoded_token, jti
-
-
-def create_refresh_token(data: Dict, access_jti: str = None) -> str:
-    """Create a new refresh token with linked access token JTI."""
-    jti = str(uuid.uuid4())
-    to_encode = data.copy()
-    audience = (
-        "test-audience" if settings.ENVIRONMENT == "test" else settings.TOKEN_AUDIENCE
-    )
-
-    to_encode.update(
-        {
-            "jti": jti,
-            "access_jti": access_jti,  # Store the actual access token's JTI
-            "type": "refresh",
-            "exp": datetime.utcnow()
-            + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
-            "iat": datetime.utcnow(),
-            "iss": settings.TOKEN_ISSUER,
-            "aud": audience,
-        }
-    )
-    return jwt.encode(
-        to_encode, settings.REFRESH_SECRET_KEY, algorithm=settings.ALGORITHM
-    )
-
-
-def decode_token(token: str, token_type: str = settings.TOKEN_TYPE_ACCESS) -> Dict:
-    """Decode and validate a token."""
-    try:
-        # Select appropriate secret key based on token type
-        # This is safe as we're just comparing string constants for token types
-        secret_key = (
-            settings.SECRET_KEY
-            if token_type == settings.TOKEN_TYPE_ACCESS
-            else settings.REFRESH_SECRET_KEY
-        )
-        audience = (
-            "test-audience"
-            if settings.ENVIRONMENT == "test"
-            else settings.TOKEN_AUDIENCE
-        )
-
-        # First decode and validate the token
-        payload = jwt.decode(
-            token, secret_key, algorithms=[settings.ALGORITHM], audience=audience
-        )
-
-        # Then check if it's blacklisted
-        if "jti" in payload and payload["jti"] in _token_blacklist:
-            raise InvalidTokenError("Token has been invalidated")
-
-        if payload.get("type") != token_type:
-            raise InvalidTokenError("Invalid token type")
-
-        return payload
-
-    except jwt.ExpiredSignatureError:
-        raise InvalidTokenError("Token has expired")
-    except jwt.InvalidAudienceError:
-        raise InvalidTokenError("Invalid audience")
-    except jwt.PyJWTError as e:
-        raise InvalidTokenError(str(e))
-
-
-def invalidate_token_by_jti(jti: str) -> None:
-    """Add a token JTI to the blacklist."""
-    _token_blacklist.add(jti)
+    return get_token_minter().access_token(data, refresh_jti)
+
+
+def create_refresh_token(data: Dict, access_jti: str = None, family: str = None) -> str:
+    """Create a new refresh token with linked access token JTI.
+
+    Tokens rotated from one login share its family; a new family starts when
+    none is given.
+    """
+    return get_token_minter().refresh_token(data, access_jti, family)
+
+
+def create_token_pair(data: Dict, family: str = None) -> TokenPair:
+    """Create an access token and its refresh token, each naming the other's JTI."""
+    return get_token_minter().pair(data, family)
+
+
+@traced("token.decode")
+async def decode_token(
+    token: Union[str, ParsedToken],
+    blacklist: TokenBlacklist,
+    token_type: str = settings.TOKEN_TYPE_ACCESS,
+    generations: Optional[TokenGenerations] = None,
+) -> TokenClaims:
+    """Decode and validate a token.
+
+    Pass the request's ParsedToken to reuse its parse and signature check.
+    With `generations`, tokens minted before the user's last revoke-all are
+    rejected (one cached lookup).
+    """
+    parsed = token if isinstance(token, ParsedToken) else ParsedToken(token)
+    claims = parsed.verify(token_type)
+    if claims.jti is not None and claims.jti in blacklist:
+        raise InvalidTokenError("Token has been invalidated")
+    if generations is not None and claims.user_id is not None:
+        if (claims.gen or 0) < await generations.current(claims.user_id):
+            raise InvalidTokenError("Token has been revoked")
+    return claims
+
+
+def invalidate_token_by_jti(
+    jti: str, blacklist: TokenBlacklist, expires_at: Optional[float] = None
+) -> None:
+    """Add a token JTI to the blacklist until the token expires."""
+    blacklist.add(jti, expires_at)
     logger.info(f"Token {jti} added to blacklist")
 
 
-def invalidate_token(token: str) -> None:
-    """Decode and blacklist token by JTI, and optionally also blacklist its linked access_jti."""
+@traced("token.invalidate")
+def invalidate_token(token: Union[str, ParsedToken], blacklist: TokenBlacklist) -> None:
+    """Verify and blacklist a token by JTI, and also blacklist a refresh token's linked access_jti."""
+    parsed = token if isinstance(token, ParsedToken) else ParsedToken(token)
     try:
-        # Use the appropriate secret key based on token type
-        unverified = jwt.decode(token, options={"verify_signature": False})
-        token_type = unverified.get("type", settings.TOKEN_TYPE_ACCESS)
-        secret_key = (
-            settings.REFRESH_SECRET_KEY
-            if token_type == settings.TOKEN_TYPE_REFRESH
-            else settings.SECRET_KEY
-        )
-
-        # Properly verify the token before invalidating
-        payload = jwt.decode(
-            token,
-            secret_key,
-            algorithms=[settings.ALGORITHM],
-            audience=(
-                "test-audience"
-                if settings.ENVIRONMENT == "test"
-                else settings.TOKEN_AUDIENCE
-            ),
-        )
-
-        jti = payload.get("jti")
-        if jti:
-            invalidate_token_by_jti(jti)
-            if payload.get("type") == "refresh" and "access_jti" in payload:
-                invalidate_token_by_jti(payload["access_jti"])
-
-    except jwt.PyJWTError as e:
-        raise InvalidTokenError(f"Could not invalidate token: {str(e)}")
+        # The key follows the token's own type claim
+        claims = parsed.verify()
+    except InvalidTokenError as e:
+        raise InvalidTokenError(f"Could not invalidate token: {e.message}")
+
+    if claims.jti:
+        invalidate_token_by_jti(claims.jti, blacklist, claims.exp)
+        if claims.type == settings.TOKEN_TYPE_REFRESH and claims.access_jti:
+            invalidate_token_by_jti(
+                claims.access_jti, blacklist, access_token_expiry_bound()
+            )
@@ -0,0 +1,148 @@
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Dict, Optional
+
+from src.core.config import settings
+from src.core.exceptions import InvalidTokenError
+from src.core.profiling import profile_phase
+
+_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+
+def _b64decode(segment: bytes) -> bytes:
+    return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_header(segment: bytes) -> Dict[str, Any]:
+    # Every token this app signs has the same header, so it is parsed once
+    return json.loads(_b64decode(segment))
+
+
+class TokenClaims:
+    """Typed view of the claims this app puts in its JWTs."""
+
+    __slots__ = (
+        "jti",
+        "type",
+        "user_id",
+        "exp",
+        "iat",
+        "iss",
+        "aud",
+        "access_jti",
+        "refresh_jti",
+        "fam",
+        "gen",
+    )
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.jti: Optional[str] = payload.get("jti")
+        self.type: Optional[str] = payload.get("type")
+        self.user_id: Optional[int] = payload.get("user_id")
+        self.exp: Optional[int] = payload.get("exp")
+        self.iat: Optional[int] = payload.get("iat")
+        self.iss: Optional[str] = payload.get("iss")
+        self.aud = payload.get("aud")
+        self.access_jti: Optional[str] = payload.get("access_jti")
+        self.refresh_jti: Optional[str] = payload.get("refresh_jti")
+        self.fam: Optional[str] = payload.get("fam")
+        self.gen: Optional[int] = payload.get("gen")
+
+
+class ParsedToken:
+    """A JWT split, base64-decoded and JSON-parsed exactly once.
+
+    The header and claims are read before verification so the `type` claim
+    can pick the signing key; verify() then runs a single HMAC over the
+    original signing input and caches the outcome, so every step of a request
+    (auth dependency, endpoint, invalidation) shares one parse and one check.
+    Only the HMAC algorithms are supported, and the header must name the
+    configured one.
+    """
+
+    __slots__ = (
+        "token",
+        "header",
+        "claims",
+        "_signing_input",
+        "_signature",
+        "_payload",
+    )
+
+    def __init__(self, token: str):
+        self.token = token
+        self._payload: Optional[Dict[str, Any]] = None
+        self.header: Optional[Dict[str, Any]] = None
+        self.claims: Optional[TokenClaims] = None
+        try:
+            raw = token.encode("ascii")
+            self._signing_input, _, signature = raw.rpartition(b".")
+            header_segment, _, payload_segment = self._signing_input.partition(b".")
+            with profile_phase("jwt"):
+                self.header = _parse_header(header_segment)
+                self._payload = json.loads(_b64decode(payload_segment))
+            self._signature = _b64decode(signature)
+        except (ValueError, UnicodeError):
+            self._signature = None
+        if not isinstance(self.header, dict) or not isinstance(self._payload, dict):
+            self.header = self._payload = None
+
+    @property
+    def token_type(self) -> Optional[str]:
+        return self._payload.get("type") if self._payload else None
+
+    def verify(self, token_type: Optional[str] = None) -> TokenClaims:
+        """Check signature, expiry and audience once; return the claims.
+
+        The key is chosen from `token_type`, or from the token's own type
+        claim when None. Raises InvalidTokenError on any failure.
+        """
+        if self.claims is not None:
+            if token_type is not None and self.claims.type != token_type:
+                raise InvalidTokenError("Invalid token type")
+            return self.claims
+        if self._payload is None or not self._signature:
+            raise InvalidTokenError("Not enough segments")
+
+        key_type = token_type or self.token_type or settings.TOKEN_TYPE_ACCESS
+        secret = (
+            settings.REFRESH_SECRET_KEY
+            if key_type == settings.TOKEN_TYPE_REFRESH
+            else settings.SECRET_KEY
+        )
+        algorithm = self.header.get("alg")
+        digest = _DIGESTS.get(algorithm)
+        if digest is None or algorithm != settings.ALGORITHM:
+            raise InvalidTokenError("The specified alg value is not allowed")
+        with profile_phase("jwt"):
+            expected = hmac.new(secret.encode(), self._signing_input, digest).digest()
+        if not hmac.compare_digest(expected, self._signature):
+            raise InvalidTokenError("Signature verification failed")
+
+        payload = self._payload
+        now = time.time()
+        exp = payload.get("exp")
+        if exp is not None and (not isinstance(exp, (int, float)) or exp <= now):
+            raise InvalidTokenError("Token has expired")
+        nbf = payload.get("nbf")
+        if nbf is not None and (not isinstance(nbf, (int, float)) or nbf > now):
+            raise InvalidTokenError("The token is not yet valid (nbf)")
+        audience = (
+            "test-audience"
+            if settings.ENVIRONMENT == "test"
+            else settings.TOKEN_AUDIENCE
+        )
+        aud = payload.get("aud")
+        if aud != audience and not (isinstance(aud, list) and audience in aud):
+            raise InvalidTokenError("Invalid audience")
+
+        claims = TokenClaims(payload)
+        if token_type is not None and claims.type != token_type:
+            raise InvalidTokenError("Invalid token type")
+        self.claims = claims
+        return claims
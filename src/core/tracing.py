@@ -0,0 +1,175 @@
+import functools
+import inspect
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence
+
+from fastapi import FastAPI, Request
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.core.config import Settings
+from src.utils.logging import logger
+from src.utils.routing import route_template
+
+# No-op until configure_tracing() installs a provider in the app lifespan
+_tracer: trace.Tracer = trace.NoOpTracer()
+
+MAX_STATEMENT_LENGTH = 2048
+
+
+@contextmanager
+def span(
+    name: str,
+    attributes: Optional[Dict] = None,
+    kind=SpanKind.INTERNAL,
+    links: Optional[Sequence[trace.Link]] = None,
+):
+    """Run the enclosed block in a child span of the current trace."""
+    with _tracer.start_as_current_span(name, kind=kind, links=links) as current:
+        if attributes and current.is_recording():
+            current.set_attributes(attributes)
+        yield current
+
+
+def traced(name: str):
+    """Decorator form of span() for sync and async functions."""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_span(conn, cursor, statement, parameters, context, executemany):
+    if not trace.get_current_span().is_recording():
+        return
+    query_span = _tracer.start_span(
+        "db.query",
+        kind=SpanKind.CLIENT,
+        attributes={
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:MAX_STATEMENT_LENGTH],
+        },
+    )
+    conn.info.setdefault("trace_query_spans", []).append(query_span)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_query_span(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_query_spans")
+    if spans:
+        query_span = spans.pop()
+        query_span.set_attribute("db.rowcount", cursor.rowcount)
+        query_span.end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_query_span(exception_context):
+    connection = exception_context.connection
+    spans = connection.info.get("trace_query_spans") if connection else None
+    if spans:
+        query_span = spans.pop()
+        query_span.record_exception(exception_context.original_exception)
+        query_span.set_status(Status(StatusCode.ERROR))
+        query_span.end()
+
+
+def configure_tracing(settings: Settings, exporter=None):
+    """Install a tracer provider exporting tail-sampled traces over OTLP.
+
+    Returns the provider (shut it down at exit), or None when tracing is
+    disabled. The SDK and exporter are imported here, not at app import.
+    """
+    global _tracer
+    if not settings.TRACING_ENABLED:
+        return None
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    from src.core.tail_sampling import TailSamplingProcessor
+
+    if exporter is None:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        exporter = OTLPSpanExporter(endpoint=settings.OTLP_ENDPOINT)
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.PROJECT_NAME})
+    )
+    provider.add_span_processor(
+        TailSamplingProcessor(
+            BatchSpanProcessor(exporter),
+            sample_rate=settings.TRACING_SAMPLE_RATE,
+            latency_threshold=settings.TRACING_LATENCY_THRESHOLD,
+        )
+    )
+    _tracer = provider.get_tracer("src")
+    logger.info(f"Tracing enabled, exporting to {settings.OTLP_ENDPOINT}")
+    return provider
+
+
+def shutdown_tracing(provider) -> None:
+    global _tracer
+    _tracer = trace.NoOpTracer()
+    if provider is not None:
+        provider.shutdown()
+
+
+class TracingMiddleware(BaseHTTPMiddleware):
+    """Open the server span for each request, continuing W3C trace context.
+
+    Added last so it wraps every other middleware; the traceparent of the
+    request span is returned to the caller in the response headers.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        context = propagate.extract(request.headers)
+        with _tracer.start_as_current_span(
+            f"{request.method} {request.url.path}",
+            context=context,
+            kind=SpanKind.SERVER,
+        ) as server_span:
+            response = await call_next(request)
+            if server_span.is_recording():
+                template = route_template(request)
+                server_span.update_name(f"{request.method} {template}")
+                server_span.set_attributes(
+                    {
+                        "http.request.method": request.method,
+                        "http.route": template,
+                        "http.response.status_code": response.status_code,
+                    }
+                )
+                if response.status_code >= 500:
+                    server_span.set_status(Status(StatusCode.ERROR))
+                carrier: Dict[str, str] = {}
+                propagate.inject(carrier)
+                response.headers.update(carrier)
+            return response
+
+
+def setup_tracing(app: FastAPI) -> None:
+    """Register the tracing middleware; call after all other middleware."""
+    app.add_middleware(TracingMiddleware)
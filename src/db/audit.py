@@ -0,0 +1,100 @@
+import csv
+import io
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, ProgrammingError
+
+from src.db.models.audit import AuthAuditEvent
+
+AUDIT_TABLE = AuthAuditEvent.__table__.name
+# Written by COPY in this order; id comes from its sequence
+AUDIT_COLUMNS = ("occurred_at", "event", "user_id", "subject", "client_ip", "detail")
+
+AuditRow = Tuple[
+    datetime, str, Optional[int], Optional[str], Optional[str], Optional[str]
+]
+
+
+def partition_name(day: date) -> str:
+    return f"{AUDIT_TABLE}_p{day:%Y%m%d}"
+
+
+def ensure_partitions(engine: Engine, first_day: date, days: int) -> None:
+    """Create the daily partitions from first_day on, if they don't exist."""
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    text(
+                        f'CREATE TABLE IF NOT EXISTS "{partition_name(day)}" '
+                        f"PARTITION OF {AUDIT_TABLE} FOR VALUES "
+                        f"FROM ('{day.isoformat()} 00:00+00') "
+                        f"TO ('{(day + timedelta(days=1)).isoformat()} 00:00+00')"
+                    )
+                )
+        except (IntegrityError, ProgrammingError):
+            # IF NOT EXISTS is not atomic: another worker created it first
+            if partition_name(day) not in list_partitions(engine):
+                raise
+
+
+def list_partitions(engine: Engine) -> List[str]:
+    with engine.connect() as connection:
+        return sorted(
+            connection.execute(
+                text(
+                    "SELECT child.relname FROM pg_inherits "
+                    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                    "WHERE parent.relname = :parent"
+                ),
+                {"parent": AUDIT_TABLE},
+            ).scalars()
+        )
+
+
+def drop_partitions_before(engine: Engine, cutoff: date) -> List[str]:
+    """Drop the daily partitions that end on or before cutoff.
+
+    Retention costs one DROP TABLE per day instead of a DELETE and the
+    vacuum behind it.
+    """
+    prefix = f"{AUDIT_TABLE}_p"
+    expired = [
+        name
+        for name in list_partitions(engine)
+        if name.startswith(prefix)
+        and datetime.strptime(name[len(prefix) :], "%Y%m%d").date() < cutoff
+    ]
+    with engine.begin() as connection:
+        for name in expired:
+            connection.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+    return expired
+
+
+def copy_audit_rows(engine: Engine, rows: Sequence[AuditRow]) -> int:
+    """Append rows with one COPY; their days' partitions must exist."""
+    buffer = io.StringIO()
+    # None is written as an unquoted empty field, which COPY loads as NULL
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {AUDIT_TABLE} ({', '.join(AUDIT_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        connection.commit()
+    finally:
+        connection.close()
+    return len(rows)
+
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
@@ -0,0 +1,138 @@
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from fastapi import FastAPI, Request
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.core.config import settings
+from src.core.profiling import record_phase
+from src.utils.logging import logger
+from src.utils.routing import route_template
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements issued per request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Time spent in SQL statements per request",
+    ["method", "route"],
+)
+
+_query_stats: ContextVar[Optional["QueryStats"]] = ContextVar(
+    "query_stats", default=None
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*%\(\w+\)s\s*,)+\s*%\(\w+\)s\s*\)")
+
+
+class QueryStats:
+    """Statement count and total database time for one unit of work."""
+
+    __slots__ = ("count", "total_time")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+
+
+@contextmanager
+def count_queries():
+    """Count the statements issued inside the block (same context only)."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace, literals and IN-lists so similar queries group."""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> str:
+    """Describe bind parameters by name and type, never by value."""
+    if executemany and parameters:
+        return f"{len(parameters)} x {parameter_shape(parameters[0], False)}"
+    if isinstance(parameters, dict):
+        return ", ".join(
+            f"{name}: {type(value).__name__}" for name, value in parameters.items()
+        )
+    if isinstance(parameters, (list, tuple)):
+        return ", ".join(type(value).__name__ for value in parameters)
+    return ""
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_time += elapsed
+    record_phase("db", elapsed)
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            f"slow_query duration_ms={elapsed * 1000:.1f} "
+            f"statement={normalize_sql(statement)!r} "
+            f"parameters=[{parameter_shape(parameters, executemany)}]"
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """Count SQL statements and database time for each request.
+
+    Totals are recorded as per-route histograms and, when DEBUG is on, returned
+    in the X-DB-Query-Count and X-DB-Time-Ms response headers.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            _query_stats.reset(token)
+
+        labels = {"method": request.method, "route": route_template(request)}
+        DB_QUERIES_PER_REQUEST.labels(**labels).observe(stats.count)
+        DB_TIME_PER_REQUEST.labels(**labels).observe(stats.total_time)
+        if settings.DEBUG:
+            response.headers["X-DB-Query-Count"] = str(stats.count)
+            response.headers["X-DB-Time-Ms"] = f"{stats.total_time * 1000:.2f}"
+        return response
+
+
+def setup_query_instrumentation(app: FastAPI) -> None:
+    """Register the per-request query counting middleware."""
+    app.add_middleware(QueryStatsMiddleware)
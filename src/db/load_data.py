@@ -0,0 +1,270 @@
+import csv
+import io
+import multiprocessing
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import sessionmaker
+
+from src.core.bloom import invalidate_shared_filter
+from src.core.config import settings
+from src.core.security import get_password_hash
+from src.db.session import create_db_engine
+from src.db.sharding import ShardRouter
+
+UserRow = Tuple[int, str, str]  # id, email, hashed_password
+
+FIRST_NAMES = (
+    "ada", "alan", "amara", "bjorn", "chen", "dana", "emeka", "farah", "grace",
+    "hiro", "ines", "jonas", "kofi", "lena", "mateo", "nadia", "omar", "priya",
+    "quinn", "rosa", "sven", "tariq", "uma", "vera", "wei", "yara", "zoe",
+)  # fmt: skip
+LAST_NAMES = (
+    "adams", "bauer", "costa", "diallo", "evans", "fischer", "garcia", "haddad",
+    "ito", "jensen", "kim", "lopez", "mensah", "novak", "okafor", "patel",
+    "quispe", "rossi", "silva", "tanaka", "ulloa", "varga", "wong", "yilmaz",
+)  # fmt: skip
+DOMAINS = (
+    "example.com", "example.org", "example.net", "mail.example.com",
+    "corp.example.com", "test.example.org",
+)  # fmt: skip
+WORDS = (
+    "amber", "basalt", "cedar", "delta", "ember", "fjord", "granite", "harbor",
+    "iris", "juniper", "kelp", "lagoon", "meadow", "nimbus", "orchid", "prairie",
+)  # fmt: skip
+
+# Per-process state set up by _init_worker
+_router: Optional[ShardRouter] = None
+_hashes: List[str] = []
+
+
+def pool_password(index: int) -> str:
+    return f"LoadTest-{index:04d}!"
+
+
+def password_for(user_id: int, pool_size: int) -> str:
+    """Plaintext password of a generated user, for load test logins."""
+    return pool_password(user_id % pool_size)
+
+
+def hash_pool(size: int) -> List[str]:
+    """Hash each pool password once, with the configured Argon2 costs."""
+    return [get_password_hash(pool_password(index)) for index in range(size)]
+
+
+def synthetic_users(
+    seed: int, start_id: int, count: int, hashes: Sequence[str]
+) -> Iterator[UserRow]:
+    # One generator per row, so the output does not depend on how the id
+    # range is split into chunks or processes
+    for user_id in range(start_id, start_id + count):
+        rng = random.Random(f"{seed}:user:{user_id}")
+        email = (
+            f"{rng.choice(FIRST_NAMES)}.{rng.choice(LAST_NAMES)}{user_id}"
+            f"@{rng.choice(DOMAINS)}"
+        )
+        yield user_id, email, hashes[user_id % len(hashes)]
+
+
+def synthetic_examples(seed: int, start: int, count: int) -> Iterator[Tuple[str]]:
+    for index in range(start, start + count):
+        rng = random.Random(f"{seed}:example:{index}")
+        yield (f"{rng.choice(WORDS)}-{rng.choice(WORDS)}-{index}",)
+
+
+def copy_rows(
+    engine: Engine, table: str, columns: Sequence[str], rows: Iterable[tuple]
+) -> int:
+    """Append rows to a table with one COPY; returns how many."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    buffer.seek(0)
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        connection.commit()
+    finally:
+        connection.close()
+    return count
+
+
+def build_router(directory_url: str, shard_urls: Sequence[str]) -> ShardRouter:
+    """A router like the app's, with its stored bucket map loaded."""
+    directory = sessionmaker(bind=create_db_engine(directory_url))
+    shards = [
+        (
+            directory
+            if make_url(url) == make_url(directory_url)
+            else sessionmaker(bind=create_db_engine(url))
+        )
+        for url in shard_urls
+    ]
+    router = ShardRouter(directory, shards or [directory], settings.DB_SHARD_BUCKETS)
+    router.load_map()
+    return router
+
+
+def _engine(factory: sessionmaker) -> Engine:
+    return factory.kw["bind"]
+
+
+def _init_worker(
+    directory_url: str, shard_urls: Sequence[str], hashes: List[str]
+) -> None:
+    global _router, _hashes
+    _router = build_router(directory_url, shard_urls)
+    _hashes = hashes
+
+
+def _load_users(seed: int, start_id: int, count: int) -> int:
+    rows = list(synthetic_users(seed, start_id, count, _hashes))
+    if not _router.sharded:
+        return copy_rows(
+            _engine(_router.shards[0]),
+            "users",
+            ("id", "email", "hashed_password"),
+            rows,
+        )
+    # Claim the emails in the directory first, as signups do
+    copy_rows(
+        _engine(_router.directory),
+        "user_directory",
+        ("user_id", "email_key"),
+        ((user_id, email.lower()) for user_id, email, _ in rows),
+    )
+    by_shard: Dict[int, List[UserRow]] = defaultdict(list)
+    for row in rows:
+        by_shard[_router.shard_for(row[0])].append(row)
+    for shard, shard_rows in by_shard.items():
+        copy_rows(
+            _engine(_router.shards[shard]),
+            "users",
+            ("id", "email", "hashed_password"),
+            shard_rows,
+        )
+    return len(rows)
+
+
+def _load_examples(seed: int, start: int, count: int) -> int:
+    return copy_rows(
+        _engine(_router.directory),
+        "example",
+        ("name",),
+        synthetic_examples(seed, start, count),
+    )
+
+
+def next_user_id(router: ShardRouter) -> int:
+    if router.sharded:
+        query, engine = "SELECT max(user_id) FROM user_directory", router.directory
+    else:
+        query, engine = "SELECT max(id) FROM users", router.shards[0]
+    with _engine(engine).connect() as connection:
+        return (connection.execute(text(query)).scalar() or 0) + 1
+
+
+def reset_sequences(router: ShardRouter) -> None:
+    """Move id sequences past the explicit ids the generator inserted."""
+    tables = [(_engine(shard), "users", "id") for shard in router.shards]
+    if router.sharded:
+        tables.append((_engine(router.directory), "user_directory", "user_id"))
+    for engine, table, column in tables:
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+                    f"GREATEST((SELECT max({column}) FROM {table}), 1))"
+                )
+            )
+
+
+def _chunks(start: int, count: int, size: int) -> List[Tuple[int, int]]:
+    return [
+        (chunk_start, min(size, start + count - chunk_start))
+        for chunk_start in range(start, start + count, size)
+    ]
+
+
+def _dispose(router: ShardRouter) -> None:
+    router.dispose()
+    _engine(router.directory).dispose()
+
+
+def load_synthetic_data(
+    directory_url: str,
+    shard_urls: Sequence[str] = (),
+    users: int = 0,
+    examples: int = 0,
+    seed: int = 0,
+    processes: int = 1,
+    chunk_size: int = 50000,
+    pool_size: int = 16,
+    start_id: Optional[int] = None,
+    redis_url: Optional[str] = None,
+) -> Dict[str, Tuple[int, float]]:
+    """Generate and COPY users and example rows; returns (rows, seconds) per phase.
+
+    Rows are a pure function of the seed and their id, so the same seed on an
+    empty database always yields the same users (password salts aside). User
+    i logs in with password_for(i, pool_size). Chunks are loaded in parallel
+    by `processes` spawned worker processes, each with its own connections;
+    a chunk is one COPY per database, so a failure leaves earlier chunks in
+    place. The users bypass signup, so with `redis_url` the shared login
+    filter is invalidated afterwards and rebuilt by the running workers.
+    """
+    started = time.perf_counter()
+    hashes = hash_pool(pool_size)
+    stats = {"password_hashes": (pool_size, time.perf_counter() - started)}
+    router = build_router(directory_url, shard_urls)
+    try:
+        if start_id is None:
+            start_id = next_user_id(router)
+        phases = [
+            ("users", _load_users, _chunks(start_id, users, chunk_size)),
+            ("example", _load_examples, _chunks(1, examples, chunk_size)),
+        ]
+        initargs = (directory_url, list(shard_urls), hashes)
+        if processes > 1:
+            pool = ProcessPoolExecutor(
+                processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=initargs,
+            )
+            run = pool.map
+        else:
+            pool = None
+            _init_worker(*initargs)
+            run = map
+        try:
+            for table, load, chunks in phases:
+                if not chunks:
+                    continue
+                started = time.perf_counter()
+                rows = sum(run(load, repeat(seed), *zip(*chunks)))
+                stats[table] = (rows, time.perf_counter() - started)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            elif _router is not None:
+                _dispose(_router)
+        reset_sequences(router)
+    finally:
+        _dispose(router)
+    if users and redis_url:
+        invalidate_shared_filter(redis_url)
+    return stats
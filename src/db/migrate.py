@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Set
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, pool, text
+from sqlalchemy.engine import Connection, Engine
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+ALEMBIC_INI = PROJECT_ROOT / "alembic.ini"
+
+# Arbitrary key of the session-level advisory lock serializing migrations
+MIGRATION_LOCK_ID = 7_301_954_117
+
+
+def head_revisions() -> Set[str]:
+    """Heads of the migration scripts; reads files only."""
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(PROJECT_ROOT / "migrations"))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+def current_revisions(connection: Connection) -> Set[str]:
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def run_alembic_upgrade(url: str, revision: str = "head") -> None:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")])
+    )
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "-c", str(ALEMBIC_INI)]
+        + ["-x", f"url={url}", "upgrade", revision],
+        cwd=PROJECT_ROOT,
+        env=env,
+        check=True,
+    )
+
+
+@contextmanager
+def advisory_lock(
+    engine: Engine, lock_id: int = MIGRATION_LOCK_ID, poll_interval: float = 0.5
+):
+    """Hold a session-level advisory lock, waiting for other holders.
+
+    Waiting polls pg_try_advisory_lock outside any transaction: a session
+    blocked in pg_advisory_lock keeps a snapshot open, and CREATE INDEX
+    CONCURRENTLY in the holder's migration would wait for it forever.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        while not connection.execute(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id}
+        ).scalar():
+            time.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+
+
+def at_head(engine: Engine, heads: Set[str]) -> bool:
+    with engine.connect() as connection:
+        return current_revisions(connection) == heads
+
+
+def migrate(url: str) -> str:
+    """Bring one database to head; returns what was done.
+
+    A database already at head is left alone without taking any lock, so
+    restarts cost one query. Otherwise replicas starting together queue on
+    an advisory lock, and each re-checks the version once it holds it: only
+    the first runs Alembic.
+    """
+    heads = head_revisions()
+    engine = create_engine(url, poolclass=pool.NullPool)
+    try:
+        if at_head(engine, heads):
+            return "up to date"
+        with advisory_lock(engine):
+            if at_head(engine, heads):
+                return "migrated by another replica"
+            run_alembic_upgrade(url)
+            return "migrated"
+    finally:
+        engine.dispose()
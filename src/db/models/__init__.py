@@ -4,7 +4,9 @@ from sqlalchemy.orm import declarative_base
 # Create the declarative base
 Base: DeclarativeMeta = declarative_base()
 
+from .audit import AuthAuditEvent  # noqa: F401
 from .example_model import ExampleModel  # noqa: F401
+from .shard import ShardBucket, UserDirectory  # noqa: F401
 
 # Import all models here to ensure they are registered with SQLAlchemy
 from .user import User  # noqa: F401
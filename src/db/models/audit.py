@@ -0,0 +1,26 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
+
+from src.db.models import Base
+
+
+class AuthAuditEvent(Base):
+    """One authentication event, written in batches by src.core.audit.AuditLog.
+
+    Range-partitioned by day on occurred_at (see src/db/audit.py), so
+    retention drops whole partitions instead of deleting rows.
+    """
+
+    __tablename__ = "auth_audit_events"
+    __table_args__ = (
+        Index("ix_auth_audit_events_user_id", "user_id", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+    # The partition key has to be part of the primary key
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    occurred_at = Column(DateTime(timezone=True), primary_key=True)
+    event = Column(String, nullable=False)
+    user_id = Column(Integer)
+    subject = Column(String)  # Username a failed login tried
+    client_ip = Column(String)
+    detail = Column(String)
@@ -6,5 +6,5 @@ from src.db.models import Base
 class ExampleModel(Base):
     __tablename__ = "example"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String, index=True)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String
+
+from src.db.models import Base
+
+
+class UserDirectory(Base):
+    """Email to user id directory, kept in the main database when sharded.
+
+    Its sequence allocates user ids for every shard, and the unique email key
+    keeps emails unique across shards.
+    """
+
+    __tablename__ = "user_directory"
+
+    user_id = Column(Integer, primary_key=True)
+    email_key = Column(String, unique=True, nullable=False)  # lower(email)
+
+
+class ShardBucket(Base):
+    """Which shard serves a hash bucket of user ids; moved by reshard.py."""
+
+    __tablename__ = "shard_buckets"
+
+    bucket = Column(Integer, primary_key=True, autoincrement=False)
+    shard = Column(Integer, nullable=False)
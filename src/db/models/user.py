@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, func
 
 from src.db.models import Base
 
@@ -6,6 +6,12 @@ from src.db.models import Base
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    email = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)
+    # Tokens minted under an older generation are rejected (revoke-all)
+    token_generation = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+# Emails are unique and looked up regardless of case
+Index("ix_users_email_lower", func.lower(User.email), unique=True)
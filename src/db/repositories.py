@@ -1,12 +1,23 @@
+import heapq
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Integer, String, any_, bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.orm import Session
 
 from src.core.security import get_password_hash
+from src.core.tracing import traced
+from src.db.models.shard import UserDirectory
 from src.db.models.user import User
+from src.db.sharding import ShardRouter
 
 
+@traced("repo.create_user_repo")
 def create_user_repo(db_session: Session, email: str, password: str):
     try:
-        existing = db_session.query(User).filter(User.email == email).first()
+        existing = get_user_by_email(db_session, email)
         if existing:
             return None
 
@@ -21,20 +32,61 @@ def create_user_repo(db_session: Session, email: str, password: str):
         raise
 
 
+@traced("repo.get_user_repo")
 def get_user_repo(db_session: Session, user_id: int):
     """Get user by ID from the database."""
     return db_session.query(User).filter(User.id == user_id).first()
 
 
+@traced("repo.get_user_by_email")
 def get_user_by_email(db_session: Session, email: str):
-    return db_session.query(User).filter(User.email == email).first()
+    """Case-insensitive lookup, served by the unique lower(email) index."""
+    return (
+        db_session.query(User)
+        .filter(func.lower(User.email) == func.lower(email))
+        .first()
+    )
+
+
+def _requested_emails(emails: Sequence[str]):
+    # One row per requested address, so each match carries the key it answers
+    return (
+        func.unnest(bindparam("emails", list(emails), type_=ARRAY(String)))
+        .table_valued("email")
+        .render_derived(name="requested")
+    )
+
+
+@traced("repo.get_users_by_ids")
+def get_users_by_ids(db_session: Session, user_ids: Sequence[int]) -> Dict[int, User]:
+    """Fetch many users with one `id = ANY(:ids)` query."""
+    users = db_session.scalars(
+        select(User).where(
+            User.id == any_(bindparam("ids", list(user_ids), type_=ARRAY(Integer)))
+        )
+    )
+    return {user.id: user for user in users}
 
 
+@traced("repo.get_users_by_emails")
+def get_users_by_emails(db_session: Session, emails: Sequence[str]) -> Dict[str, User]:
+    """Fetch many users by email, ignoring case, keyed by the requested email."""
+    requested = _requested_emails(emails)
+    rows = db_session.execute(
+        select(User, requested.c.email).join(
+            requested, func.lower(User.email) == func.lower(requested.c.email)
+        )
+    )
+    return {email: user for user, email in rows}
+
+
+@traced("repo.get_user_by_id")
 def get_user_by_id(db: Session, user_id: int) -> User:
     """Get a user by ID."""
     return db.query(User).filter(User.id == user_id).first()
 
 
+@traced("repo.create_user")
 def create_user(db: Session, email: str, hashed_password: str) -> User:
     """Create a new user."""
     db_user = User(email=email, hashed_password=hashed_password)
@@ -42,3 +94,182 @@ def create_user(db: Session, email: str, hashed_password: str) -> User:
     db.commit()
     db.refresh(db_user)
     return db_user
+
+
+@traced("repo.update_user_password_hash")
+def update_user_password_hash(
+    db: Session, user_id: int, hashed_password: str, old_hash: str
+) -> bool:
+    """Replace the stored hash only if it is still `old_hash`; False if not."""
+    updated = (
+        db.query(User)
+        .filter(User.id == user_id, User.hashed_password == old_hash)
+        .update({User.hashed_password: hashed_password})
+    )
+    db.commit()
+    return updated == 1
+
+
+@traced("repo.iter_user_emails")
+def iter_user_emails(db: Session, batch_size: int = 10000) -> Iterator[str]:
+    """Stream every registered email without loading whole rows."""
+    result = db.execute(
+        select(User.email).execution_options(yield_per=batch_size)
+    ).scalars()
+    yield from result
+
+
+@traced("repo.get_token_generation")
+def get_token_generation(db: Session, user_id: int) -> Optional[int]:
+    return db.execute(
+        select(User.token_generation).where(User.id == user_id)
+    ).scalar_one_or_none()
+
+
+@traced("repo.increment_token_generation")
+def increment_token_generation(db: Session, user_id: int) -> Optional[int]:
+    """Bump a user's token generation and return the new value."""
+    generation = db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_generation=User.token_generation + 1)
+        .returning(User.token_generation)
+    ).scalar_one_or_none()
+    db.commit()
+    return generation
+
+
+@traced("repo.create_sharded_user")
+def create_sharded_user(
+    router: ShardRouter, email: str, password: str
+) -> Optional[User]:
+    """Create a user on its shard; None when the email is taken on any shard.
+
+    The directory allocates the id and claims the email first, so two shards
+    can never accept the same address, and a taken email costs no password
+    hash.
+    """
+    if not router.sharded:
+        with router.session(0) as db:
+            return create_user_repo(db, email, password)
+
+    with router.directory_session() as directory:
+        user_id = directory.execute(
+            insert(UserDirectory)
+            .values(email_key=func.lower(email))
+            .on_conflict_do_nothing(index_elements=[UserDirectory.email_key])
+            .returning(UserDirectory.user_id)
+        ).scalar_one_or_none()
+        directory.commit()
+    if user_id is None:
+        return None
+
+    try:
+        hashed_password = get_password_hash(password)
+        with router.user_session(user_id) as db:
+            db_user = User(id=user_id, email=email, hashed_password=hashed_password)
+            db.add(db_user)
+            db.commit()
+            db.refresh(db_user)
+            return db_user
+    except Exception:
+        # Release the email so the signup can be retried
+        with router.directory_session() as directory:
+            directory.execute(
+                delete(UserDirectory).where(UserDirectory.user_id == user_id)
+            )
+            directory.commit()
+        raise
+
+
+@traced("repo.get_sharded_user")
+def get_sharded_user(router: ShardRouter, user_id: int) -> Optional[User]:
+    with router.user_session(user_id) as db:
+        return get_user_repo(db, user_id)
+
+
+@traced("repo.get_sharded_user_by_email")
+def get_sharded_user_by_email(router: ShardRouter, email: str) -> Optional[User]:
+    """Resolve the email in the directory, then read the user from its shard."""
+    if not router.sharded:
+        with router.session(0) as db:
+            return get_user_by_email(db, email)
+    with router.directory_session() as directory:
+        user_id = directory.execute(
+            select(UserDirectory.user_id).where(
+                UserDirectory.email_key == func.lower(email)
+            )
+        ).scalar_one_or_none()
+    if user_id is None:
+        return None
+    return get_sharded_user(router, user_id)
+
+
+@traced("repo.list_sharded_users")
+def list_sharded_users(
+    router: ShardRouter, limit: int = 100, after_id: int = 0
+) -> List[User]:
+    """One page of users in id order, gathered from every shard at once."""
+
+    def page(db: Session) -> List[User]:
+        return (
+            db.query(User)
+            .filter(User.id > after_id)
+            .order_by(User.id)
+            .limit(limit)
+            .all()
+        )
+
+    pages = router.scatter(page)
+    return list(islice(heapq.merge(*pages, key=lambda user: user.id), limit))
+
+
+def iter_registered_emails(router: ShardRouter) -> Iterator[str]:
+    """Every registered email (lower-cased when sharded), from one database."""
+    with router.directory_session() as db:
+        if router.sharded:
+            yield from db.execute(
+                select(UserDirectory.email_key).execution_options(yield_per=10000)
+            ).scalars()
+        else:
+            yield from iter_user_emails(db)
+
+
+@traced("repo.get_sharded_users_by_ids")
+def get_sharded_users_by_ids(
+    router: ShardRouter, user_ids: Sequence[int]
+) -> Dict[int, User]:
+    """One batched query per shard holding any of the ids, run concurrently."""
+    by_shard: Dict[int, List[int]] = defaultdict(list)
+    for user_id in user_ids:
+        by_shard[router.shard_for(user_id)].append(user_id)
+    results = router.run_on(
+        {
+            shard: lambda db, ids=ids: get_users_by_ids(db, ids)
+            for shard, ids in by_shard.items()
+        }
+    )
+    return {
+        user_id: user for found in results.values() for user_id, user in found.items()
+    }
+
+
+@traced("repo.get_sharded_users_by_emails")
+def get_sharded_users_by_emails(
+    router: ShardRouter, emails: Sequence[str]
+) -> Dict[str, User]:
+    if not router.sharded:
+        with router.session(0) as db:
+            return get_users_by_emails(db, emails)
+    requested = _requested_emails(emails)
+    with router.directory_session() as directory:
+        ids = dict(
+            directory.execute(
+                select(requested.c.email, UserDirectory.user_id).join(
+                    requested,
+                    UserDirectory.email_key == func.lower(requested.c.email),
+                )
+            ).all()
+        )
+    users = get_sharded_users_by_ids(router, list(ids.values()))
+    return {email: users[user_id] for email, user_id in ids.items() if user_id in users}
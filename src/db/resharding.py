@@ -0,0 +1,233 @@
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
+
+from src.db.models.shard import ShardBucket, UserDirectory
+from src.db.models.user import User
+from src.db.sharding import bucket_expression, default_bucket_map
+
+USERS = User.__table__
+
+
+def read_bucket_map(directory: Engine, buckets: int) -> List[int]:
+    """The stored bucket map; raises if any bucket has no row yet."""
+    with directory.connect() as connection:
+        rows = dict(
+            connection.execute(select(ShardBucket.bucket, ShardBucket.shard)).all()
+        )
+    missing = [bucket for bucket in range(buckets) if bucket not in rows]
+    if missing:
+        raise RuntimeError(
+            f"{len(missing)} buckets have no shard_buckets row; run pin first"
+        )
+    return [rows[bucket] for bucket in range(buckets)]
+
+
+def pin_bucket_map(directory: Engine, buckets: int, shards: int) -> int:
+    """Store the default map for the current shard count, before changing it.
+
+    Without stored rows the router falls back to bucket % shards, which would
+    move most users as soon as another shard URL is configured.
+    """
+    rows = [
+        {"bucket": bucket, "shard": shard}
+        for bucket, shard in enumerate(default_bucket_map(buckets, shards))
+    ]
+    with directory.begin() as connection:
+        result = connection.execute(insert(ShardBucket).on_conflict_do_nothing(), rows)
+    return result.rowcount
+
+
+def backfill_directory(
+    directory: Engine, shards: Sequence[Engine], batch_size: int = 10000
+) -> int:
+    """Register every existing user in the directory; safe to run repeatedly.
+
+    Users whose id or lower-cased email is already registered to another
+    pairing (case-only duplicates across shards, say) are left out: once
+    every other user is registered, a RuntimeError lists them.
+    """
+    added = 0
+    conflicts: List[Tuple[int, str]] = []
+    for shard in shards:
+        with shard.connect() as source:
+            result = source.execution_options(yield_per=batch_size).execute(
+                select(USERS.c.id, USERS.c.email)
+            )
+            for rows in result.partitions():
+                wanted = [(user_id, email.lower()) for user_id, email in rows]
+                with directory.begin() as connection:
+                    inserted = set(
+                        connection.execute(
+                            insert(UserDirectory)
+                            .on_conflict_do_nothing()
+                            .returning(UserDirectory.user_id),
+                            [
+                                {"user_id": user_id, "email_key": email_key}
+                                for user_id, email_key in wanted
+                            ],
+                        ).scalars()
+                    )
+                    skipped = [pair for pair in wanted if pair[0] not in inserted]
+                    if skipped:
+                        # Skipped because already registered, or a real clash
+                        registered = set(
+                            connection.execute(
+                                select(
+                                    UserDirectory.user_id, UserDirectory.email_key
+                                ).where(
+                                    UserDirectory.user_id.in_(
+                                        [user_id for user_id, _ in skipped]
+                                    )
+                                )
+                            ).all()
+                        )
+                        conflicts += [
+                            pair for pair in skipped if pair not in registered
+                        ]
+                added += len(inserted)
+    with directory.begin() as connection:
+        # New signups must get ids above every existing one
+        connection.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence('user_directory', 'user_id'), "
+                "GREATEST((SELECT max(user_id) FROM user_directory), 1))"
+            )
+        )
+    if conflicts:
+        shown = ", ".join(
+            f"{user_id} <{email_key}>" for user_id, email_key in conflicts
+        )
+        raise RuntimeError(
+            f"Registered {added} users; {len(conflicts)} clash with other "
+            f"directory rows by id or email and were not: {shown}"
+        )
+    return added
+
+
+def plan_moves(bucket_map: Sequence[int], shards: int) -> Dict[int, int]:
+    """Buckets to move (bucket -> target shard) for an even spread.
+
+    Only buckets over a shard's quota move, so adding a shard relocates about
+    1/shards of the users rather than rehashing everyone.
+    """
+    quota = [len(bucket_map) // shards] * shards
+    for shard in range(len(bucket_map) % shards):
+        quota[shard] += 1
+    load = [0] * shards
+    for shard in bucket_map:
+        if shard < shards:
+            load[shard] += 1
+
+    moves = {}
+    for bucket, shard in enumerate(bucket_map):
+        if shard < shards and load[shard] <= quota[shard]:
+            continue
+        target = min(range(shards), key=lambda s: load[s] - quota[s])
+        if shard < shards:
+            load[shard] -= 1
+        load[target] += 1
+        moves[bucket] = target
+    return moves
+
+
+def copy_buckets(
+    source: Engine,
+    target: Engine,
+    moving: Sequence[int],
+    buckets: int,
+    overwrite: bool = True,
+    batch_size: int = 1000,
+) -> int:
+    """Upsert the users of the `moving` buckets from source into target.
+
+    With overwrite=False, rows already on the target keep their values except
+    token_generation, which only moves forward, so a catch-up pass never
+    undoes a write that already landed on the new shard.
+    """
+    copied = 0
+    statement = insert(USERS)
+    if overwrite:
+        statement = statement.on_conflict_do_update(
+            index_elements=[USERS.c.id],
+            set_={
+                column.name: statement.excluded[column.name]
+                for column in USERS.columns
+                if column.name != "id"
+            },
+        )
+    else:
+        statement = statement.on_conflict_do_update(
+            index_elements=[USERS.c.id],
+            set_={
+                "token_generation": func.greatest(
+                    USERS.c.token_generation, statement.excluded.token_generation
+                )
+            },
+        )
+    with source.connect() as connection:
+        result = connection.execution_options(yield_per=batch_size).execute(
+            select(USERS).where(bucket_expression(USERS.c.id, buckets).in_(moving))
+        )
+        for rows in result.mappings().partitions():
+            with target.begin() as destination:
+                destination.execute(statement, [dict(row) for row in rows])
+            copied += len(rows)
+    return copied
+
+
+def delete_buckets(source: Engine, moving: Sequence[int], buckets: int) -> int:
+    with source.begin() as connection:
+        return connection.execute(
+            USERS.delete().where(bucket_expression(USERS.c.id, buckets).in_(moving))
+        ).rowcount
+
+
+def reshard(
+    directory: Engine,
+    shards: Sequence[Engine],
+    buckets: int,
+    grace: float,
+    log: Callable[[str], None] = print,
+) -> Dict[int, int]:
+    """Move buckets until users are spread evenly over `shards`, online.
+
+    Each moving bucket is copied, then the map is flipped for all of them in
+    one transaction. After `grace` seconds (longer than DB_SHARD_MAP_REFRESH)
+    every worker routes to the new shards; writes that reached an old shard in
+    that window are copied over, and only then are the old rows deleted.
+    """
+    bucket_map = read_bucket_map(directory, buckets)
+    moves = plan_moves(bucket_map, len(shards))
+    if not moves:
+        log("Buckets are already balanced")
+        return moves
+
+    # One scan of each source shard per target rather than one per bucket
+    routes: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for bucket, target in moves.items():
+        routes[(bucket_map[bucket], target)].append(bucket)
+
+    for (source, target), moving in routes.items():
+        copied = copy_buckets(shards[source], shards[target], moving, buckets)
+        log(f"{len(moving)} buckets: copied {copied} users {source} -> {target}")
+
+    with directory.begin() as connection:
+        for bucket, target in moves.items():
+            connection.execute(
+                ShardBucket.__table__.update()
+                .where(ShardBucket.bucket == bucket)
+                .values(shard=target)
+            )
+    log(f"Flipped {len(moves)} buckets; waiting {grace}s for workers to reload")
+    time.sleep(grace)
+
+    for (source, target), moving in routes.items():
+        copy_buckets(shards[source], shards[target], moving, buckets, overwrite=False)
+        deleted = delete_buckets(shards[source], moving, buckets)
+        log(f"{len(moving)} buckets: removed {deleted} users from {source}")
+    return moves
@@ -1,35 +1,56 @@
-from sqlalchemy import create_engine
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import sessionmaker
 
 from src.core.config import settings
 from src.utils.logging import logger
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=20,
-    max_overflow=10,
-    pool_recycle=3600,
-)
+# Used by scripts that run outside the app; the app owns its engine through
+# AppResources (src/core/resources.py).
+_engine: Optional[Engine] = None
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def create_db_engine(url: Optional[str] = None) -> Engine:
+    """Create an engine with the configured pool settings."""
+    return create_engine(
+        url or settings.DATABASE_URL,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def get_engine() -> Engine:
+    """Return the engine for standalone scripts, creating it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = create_db_engine()
+        SessionLocal.configure(bind=_engine)
+    return _engine
 
 
-async def check_db_connection():
+def check_db_connection(session_factory: sessionmaker = SessionLocal) -> bool:
+    """Run a trivial query; blocking, so call it from a thread in async code."""
+    db = session_factory()
     try:
-        db = SessionLocal()
-        db.execute("SELECT 1")
+        db.execute(text("SELECT 1"))
         return True
     except SQLAlchemyError as e:
-        logger.error("database_connection_failed", error=str(e))
+        logger.error(f"database_connection_failed: {str(e)}")
         return False
     finally:
         db.close()
 
 
-def get_db():
-    db = SessionLocal()
+def get_db(request: Request):
+    db = request.app.state.resources.session_factory()
     try:
         yield db
     finally:
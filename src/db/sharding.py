@@ -0,0 +1,165 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, TypeVar
+
+from sqlalchemy import BigInteger, cast, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.core.config import Settings
+from src.db.models.shard import ShardBucket
+from src.db.session import create_db_engine
+from src.utils.logging import logger
+
+T = TypeVar("T")
+
+# Knuth's multiplicative hash; kept to 32 bits so SQL can compute it too
+HASH_MULTIPLIER = 2654435761
+HASH_MODULUS = 2**32
+
+
+def bucket_for(user_id: int, buckets: int) -> int:
+    """Hash bucket of a user id."""
+    return user_id * HASH_MULTIPLIER % HASH_MODULUS % buckets
+
+
+def bucket_expression(column, buckets: int):
+    """bucket_for() as a SQL expression, for selecting a bucket's rows."""
+    return cast(column, BigInteger) * HASH_MULTIPLIER % HASH_MODULUS % buckets
+
+
+def default_bucket_map(buckets: int, shards: int) -> List[int]:
+    return [bucket % shards for bucket in range(buckets)]
+
+
+def shard_urls(settings: Settings) -> List[str]:
+    return [
+        url.strip() for url in settings.DATABASE_SHARD_URLS.split(",") if url.strip()
+    ]
+
+
+class ShardRouter:
+    """Routes user rows to one of several Postgres databases.
+
+    A user id hashes to one of a fixed number of buckets and the bucket map
+    names the shard serving it. The map lives in the directory database
+    (shard_buckets), so reshard.py can move buckets between shards while the
+    app runs; workers reload it every DB_SHARD_MAP_REFRESH seconds. The
+    directory (the main database) also maps emails to user ids and allocates
+    ids. With a single shard that is the directory itself, nothing is routed
+    and the directory tables are unused.
+    """
+
+    def __init__(
+        self,
+        directory: sessionmaker,
+        shards: Sequence[sessionmaker],
+        buckets: int = 1024,
+    ):
+        self.directory = directory
+        self.shards = list(shards)
+        self.buckets = buckets
+        self.sharded = len(self.shards) > 1 or self.shards[0] is not directory
+        self.bucket_map = default_bucket_map(buckets, len(self.shards))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if len(self.shards) > 1:
+            self._executor = ThreadPoolExecutor(
+                max_workers=len(self.shards), thread_name_prefix="shard"
+            )
+
+    @classmethod
+    def from_settings(
+        cls, settings: Settings, directory: sessionmaker
+    ) -> "ShardRouter":
+        """One engine and pool per configured shard; the directory's if none."""
+        directory_url = directory.kw["bind"].url
+        shards = []
+        for url in shard_urls(settings):
+            if make_url(url) == directory_url:
+                shards.append(directory)
+            else:
+                shards.append(
+                    sessionmaker(
+                        autocommit=False, autoflush=False, bind=create_db_engine(url)
+                    )
+                )
+        return cls(directory, shards or [directory], settings.DB_SHARD_BUCKETS)
+
+    def shard_for(self, user_id: int) -> int:
+        return self.bucket_map[bucket_for(user_id, self.buckets)]
+
+    @contextmanager
+    def session(self, shard: int) -> Iterator[Session]:
+        db = self.shards[shard]()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def user_session(self, user_id: int):
+        """Session on the shard that holds the user."""
+        return self.session(self.shard_for(user_id))
+
+    @contextmanager
+    def directory_session(self) -> Iterator[Session]:
+        db = self.directory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def scatter(self, query: Callable[[Session], T]) -> List[T]:
+        """Run `query` on every shard concurrently; results in shard order."""
+        results = self.run_on({shard: query for shard in range(len(self.shards))})
+        return [results[shard] for shard in range(len(self.shards))]
+
+    def run_on(self, work: Dict[int, Callable[[Session], T]]) -> Dict[int, T]:
+        """Run each shard's query on that shard, concurrently when several."""
+
+        def run(shard: int) -> T:
+            with self.session(shard) as db:
+                return work[shard](db)
+
+        if self._executor is None or len(work) == 1:
+            return {shard: run(shard) for shard in work}
+        # Each thread gets its own copy of the caller's context, so query
+        # counts, profiling phases and trace spans stay with the request
+        futures = {
+            shard: self._executor.submit(contextvars.copy_context().run, run, shard)
+            for shard in work
+        }
+        return {shard: future.result() for shard, future in futures.items()}
+
+    def load_map(self) -> None:
+        """Reload the bucket map; buckets without a row keep the default shard."""
+        if not self.sharded:
+            return
+        try:
+            with self.directory_session() as db:
+                rows = db.execute(select(ShardBucket.bucket, ShardBucket.shard)).all()
+        except SQLAlchemyError as e:
+            logger.warning(f"Shard map not reloaded: {str(e)}")
+            return
+        bucket_map = default_bucket_map(self.buckets, len(self.shards))
+        for bucket, shard in rows:
+            if bucket >= self.buckets or shard >= len(self.shards):
+                # Routing with a map for another layout would lose users
+                logger.error(
+                    f"Shard map names bucket {bucket} on shard {shard}, but "
+                    f"{self.buckets} buckets on {len(self.shards)} shards are "
+                    "configured; keeping the previous map"
+                )
+                return
+            bucket_map[bucket] = shard
+        self.bucket_map = bucket_map
+
+    def dispose(self) -> None:
+        """Close the shard pools this router opened."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        for shard in self.shards:
+            if shard is not self.directory:
+                shard.kw["bind"].dispose()
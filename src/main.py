@@ -1,18 +1,22 @@
 import time
+from contextlib import asynccontextmanager
 
-import structlog
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.responses import JSONResponse
 from prometheus_client import Counter, Histogram
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from src.api.v1.routers import api_router
 from src.core.config import settings
 from src.core.error_handlers import setup_exception_handlers
+from src.core.loop_monitor import setup_loop_monitor
+from src.core.profiling import ProfiledJSONResponse, setup_profiling
+from src.core.resources import AppResources
 from src.core.security import setup_security
+from src.core.tracing import setup_tracing
+from src.db.instrumentation import setup_query_instrumentation
+from src.utils.routing import route_template
 
 # Metrics
 REQUEST_COUNT = Counter(
@@ -20,9 +24,16 @@ REQUEST_COUNT = Counter(
 )
 REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency")
 
-# Structured logging
-logger = structlog.get_logger()
-limiter = Limiter(key_func=get_remote_address)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create per-worker resources at startup and release them at shutdown."""
+    app.state.resources = AppResources(settings)
+    await app.state.resources.startup()
+    try:
+        yield
+    finally:
+        await app.state.resources.shutdown()
 
 
 def create_app() -> FastAPI:
@@ -30,6 +41,8 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title=settings.PROJECT_NAME,
         version=settings.API_VERSION,
+        lifespan=lifespan,
+        default_response_class=ProfiledJSONResponse,
         description="""
         Hello World API - A production-ready FastAPI application.
         Features:
@@ -53,6 +66,9 @@ def create_app() -> FastAPI:
 
     # Setup security, error handlers, and routers
     setup_security(app)
+    setup_profiling(app)
+    setup_query_instrumentation(app)
+    setup_loop_monitor(app)
     setup_exception_handlers(app)
     app.include_router(api_router)
 
@@ -60,19 +76,34 @@ def create_app() -> FastAPI:
     async def metrics_middleware(request: Request, call_next):
         start_time = time.time()
         response = await call_next(request)
-        # Record metrics
+        # Record metrics; labelled by route so ids in paths don't add series
         REQUEST_COUNT.labels(
             method=request.method,
-            endpoint=request.url.path,
+            endpoint=route_template(request),
             status=response.status_code,
         ).inc()
         REQUEST_LATENCY.observe(time.time() - start_time)
         return response
 
+    # Outermost, so the server span covers the whole middleware stack
+    setup_tracing(app)
+
     @app.get("/health")
     async def health_check():
         return JSONResponse({"status": "healthy"})
 
+    @app.get("/livez", include_in_schema=False)
+    async def liveness():
+        """The worker is up and its event loop is serving requests."""
+        return JSONResponse({"status": "alive"})
+
+    @app.get("/readyz", include_in_schema=False)
+    async def readiness(request: Request):
+        """Serve the cached dependency check results; never runs a check."""
+        health = request.app.state.resources.health
+        report = health.report()
+        return JSONResponse(report, status_code=200 if health.is_ready() else 503)
+
     return app
 
 
@@ -0,0 +1,65 @@
+import asyncio
+from datetime import timedelta
+
+from src.core.exceptions import RedisUnavailableError
+from src.core.jobs import job
+from src.db.audit import drop_partitions_before, ensure_partitions, utc_today
+from src.services.user import rehash_user_password
+from src.utils.logging import logger
+
+
+@job("users.rehash_password", queue="local", max_attempts=3)
+async def rehash_password(resources, user_id: int, password: str, old_hash: str):
+    # Carries a plaintext password, so it only ever runs in the process that
+    # verified it
+    await asyncio.to_thread(
+        rehash_user_password, resources.shards, user_id, password, old_hash
+    )
+
+
+@job("login_filter.publish")
+async def publish_to_login_filter(resources, email: str):
+    # Signup could not publish; raising retries until Redis takes the bits
+    if not await resources.email_filter.add_shared(email):
+        raise RedisUnavailableError("Login filter publish failed")
+
+
+@job("login_filter.rebuild", max_attempts=1)
+async def rebuild_login_filter(resources):
+    # Picks up users inserted outside the signup endpoint (scripts, imports);
+    # every worker schedules it, the claim leaves the scan to one of them
+    ttl = resources.settings.LOGIN_FILTER_REFRESH / 2
+    if await resources.email_filter.claim_rebuild(ttl):
+        await resources.build_email_filter()
+
+
+@job("login_filter.reload", queue="local", max_attempts=1)
+async def reload_login_filter(resources):
+    # Takes the latest rebuild from Redis; never reads the database, but asks
+    # for a rebuild when none is published (first start, bulk inserts)
+    if not await resources.email_filter.load_shared():
+        await resources.jobs.enqueue("login_filter.rebuild")
+
+
+@job("auth.prune_blacklist", queue="local", max_attempts=1)
+async def prune_token_blacklist(resources):
+    resources.token_blacklist.prune()
+
+
+@job("audit.maintain_partitions", queue="local")
+async def maintain_audit_partitions(resources):
+    settings = resources.settings
+    today = utc_today()
+    await asyncio.to_thread(
+        ensure_partitions,
+        resources.engine,
+        today,
+        settings.AUDIT_PARTITIONS_AHEAD + 1,
+    )
+    dropped = await asyncio.to_thread(
+        drop_partitions_before,
+        resources.engine,
+        today - timedelta(days=settings.AUDIT_RETENTION_DAYS),
+    )
+    if dropped:
+        logger.info(f"Dropped expired audit partitions: {', '.join(dropped)}")
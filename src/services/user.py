@@ -1,17 +1,34 @@
-from sqlalchemy.orm import Session
+from src.core.security import (
+    get_password_hash,
+    password_needs_rehash,
+    validate_password_strength,
+)
+from src.db.repositories import (
+    create_sharded_user,
+    update_user_password_hash,
+)
+from src.db.sharding import ShardRouter
+from src.utils.logging import logger
 
-from src.core.exceptions import PasswordTooWeakException
-from src.core.security import validate_password_strength
-from src.db.repositories import create_user_repo, get_user_repo
 
+def user_create_service(router: ShardRouter, email: str, password: str):
+    validate_password_strength(password)
+    return create_sharded_user(router, email, password)
 
-def user_create_service(db: Session, email: str, password: str):
-    if not validate_password_strength(password):
-        raise PasswordTooWeakException(
-            "Password must be at least 8 characters and contain letters and numbers."
-        )
-    return create_user_repo(db, email, password)
 
+def rehash_user_password(
+    router: ShardRouter, user_id: int, password: str, old_hash: str
+) -> None:
+    """Re-hash a verified password with the current Argon2 costs.
 
-def user_read_service(db: Session, user_id: int):
-    return get_user_repo(db, user_id)
+    Runs as a job after login, so it opens its own session. The update only
+    applies while the stored hash is still `old_hash`: a retried or late run
+    must not bring back a password the user has since changed.
+    """
+    if not password_needs_rehash(old_hash):
+        return
+    with router.user_session(user_id) as db:
+        if update_user_password_hash(
+            db, user_id, get_password_hash(password), old_hash
+        ):
+            logger.info(f"Upgraded password hash parameters for user {user_id}")
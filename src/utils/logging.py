@@ -11,6 +11,7 @@ logger = logging.getLogger("app_logger")
 logger.addHandler(json_handler)
 logger.setLevel(logging.INFO)
 
-file_handler = logging.FileHandler("src/logs/app.log")
+# delay=True opens the log file on the first record, not at import time
+file_handler = logging.FileHandler("src/logs/app.log", delay=True)
 file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
@@ -0,0 +1,20 @@
+from starlette.requests import Request
+
+
+def route_template(request: Request) -> str:
+    """Return the request path with path parameters replaced by their names.
+
+    /api/v1/users/42 becomes /api/v1/users/{user_id}, which keeps per-route
+    aggregates and metric label sets bounded. Call it after routing, once
+    path_params are populated. Unmatched requests collapse to one label.
+    """
+    if request.scope.get("endpoint") is None:
+        return "unmatched"
+    path_params = request.scope.get("path_params") or {}
+    if not path_params:
+        return request.url.path
+    names = {str(value): name for name, value in path_params.items()}
+    return "/".join(
+        f"{{{names[segment]}}}" if segment in names else segment
+        for segment in request.url.path.split("/")
+    )
@@ -0,0 +1,34 @@
+import random
+import time
+from typing import Callable
+
+
+def wait_for(
+    name: str,
+    check: Callable[[], object],
+    deadline: float,
+    base_delay: float = 0.1,
+    max_delay: float = 2.0,
+) -> float:
+    """Call `check` until it stops raising; returns the seconds waited.
+
+    Retries back off exponentially with full jitter, so replicas started
+    together do not poll in lockstep. Raises TimeoutError with the last
+    error once time.monotonic() passes `deadline`.
+    """
+    started = time.monotonic()
+    attempts = 0
+    while True:
+        try:
+            check()
+            return time.monotonic() - started
+        except Exception as e:
+            error = e
+        attempts += 1
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(
+                f"{name} not reachable after {attempts} attempts: {error}"
+            )
+        delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempts - 1)))
+        time.sleep(min(delay, remaining))
@@ -0,0 +1,36 @@
+"""Standalone job worker: python -m src.worker
+
+Runs the durable (Redis) job queues next to the API workers, which can then
+set JOBS_IN_PROCESS=false and only enqueue.
+"""
+
+import asyncio
+import signal
+
+from src.core.config import settings
+from src.core.resources import AppResources
+from src.utils.logging import logger
+
+
+async def run_worker() -> None:
+    resources = AppResources(settings, consume_durable_jobs=True)
+    await resources.startup()
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    logger.info("Job worker started")
+    try:
+        await stopping.wait()
+    finally:
+        # Lets running jobs finish before the pools they use are closed
+        await resources.shutdown()
+        logger.info("Job worker stopped")
+
+
+def main() -> None:
+    asyncio.run(run_worker())
+
+
+if __name__ == "__main__":
+    main()
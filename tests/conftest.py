@@ -1,12 +1,16 @@
+import fakeredis
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from src.core import resources as resources_module
+from src.core.bloom import EmailBloomFilter
 from src.core.config import settings
+from src.core.redis_client import RedisClient
 from src.core.token_manager import create_access_token
 from src.db.models import Base
-from src.db.session import get_db
+from src.db.session import create_db_engine, get_db
 from src.main import app
 
 
@@ -40,8 +44,25 @@ def test_db():
 
 
 @pytest.fixture
-def client(test_db):
+def client(test_db, monkeypatch):
     """Create test client with database session"""
+    # Serve Redis from an in-process fakeredis server
+    monkeypatch.setattr(
+        RedisClient,
+        "from_settings",
+        classmethod(
+            lambda cls, settings: cls(
+                settings.REDIS_URL, client=fakeredis.FakeAsyncRedis()
+            )
+        ),
+    )
+
+    # Build the app's own engine against the test database
+    monkeypatch.setattr(
+        resources_module,
+        "create_db_engine",
+        lambda: create_db_engine(settings.TEST_DATABASE_URL),
+    )
 
     def override_get_db():
         try:
@@ -53,6 +74,11 @@ def client(test_db):
     app.dependency_overrides[get_db] = override_get_db
 
     with TestClient(app) as test_client:
+        # Tests insert users straight into the database, so let the login
+        # email filter pass everything until a test loads it explicitly
+        app.state.resources.email_filter = EmailBloomFilter(
+            1000, 0.01, redis=app.state.resources.redis
+        )
         yield test_client
 
 
@@ -61,4 +87,21 @@ def setup_test_environment(monkeypatch):
     """Setup test environment variables"""
     monkeypatch.setattr(settings, "ENVIRONMENT", "test")
     monkeypatch.setattr(settings, "TOKEN_AUDIENCE", "test-audience")
+    # Every test logs in from the same client address into one shared limiter
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_REQUESTS", 100000)
     yield
+
+
+@pytest.fixture
+def assert_max_queries(monkeypatch):
+    """Fail when a response reports more SQL statements than allowed"""
+    monkeypatch.setattr(settings, "DEBUG", True)
+
+    def check(response, limit):
+        count = int(response.headers["X-DB-Query-Count"])
+        assert count <= limit, (
+            f"{response.request.method} {response.request.url.path} issued "
+            f"{count} SQL statements, expected at most {limit}"
+        )
+
+    return check
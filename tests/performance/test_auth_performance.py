@@ -1,3 +1,231 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import fakeredis
+import jwt
+
+from src.core.audit import AuditLog
+from src.core.config import settings
+from src.core.redis_client import RedisClient
+from src.core.security import get_password_hash
+from src.core.sessions import SessionStore
+from src.core.token_manager import (
+    TokenBlacklist,
+    create_access_token,
+    create_token_pair,
+    decode_token,
+)
+from src.db.models.audit import AuthAuditEvent
+from src.db.models.user import User
+
+ENUMERATION_ATTEMPTS = 50
+
+
 def test_auth_performance():
     # Placeholder for auth performance/stress test
     assert True, "Implement auth performance tests here."
+
+
+def _cpu_time_for_logins(client, emails):
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    for email in emails:
+        response = client.post(
+            "/api/v1/auth/login", data={"username": email, "password": "Wrong1234"}
+        )
+        assert response.status_code == 401
+    return time.process_time() - start_cpu, time.perf_counter() - start_wall
+
+
+def test_enumeration_is_cheap_and_indistinguishable(client, test_db, monkeypatch):
+    """Unknown emails must cost far less CPU than a real check, at equal latency."""
+    monkeypatch.setattr(settings, "ARGON2_TIME_COST", 2)
+    monkeypatch.setattr(settings, "ARGON2_MEMORY_COST", 32768)
+    db = test_db()
+    db.add(
+        User(email="real@example.com", hashed_password=get_password_hash("Pass1234"))
+    )
+    db.commit()
+    db.close()
+    resources = client.app.state.resources
+    resources.email_filter.load(["real@example.com"])
+    resources.login_latency.average = None
+
+    known_cpu, known_wall = _cpu_time_for_logins(
+        client, ["real@example.com"] * ENUMERATION_ATTEMPTS
+    )
+    unknown_cpu, unknown_wall = _cpu_time_for_logins(
+        client, [f"probe{i}@example.com" for i in range(ENUMERATION_ATTEMPTS)]
+    )
+
+    print(
+        f"\nknown: {ENUMERATION_ATTEMPTS / known_wall:.1f} req/s, "
+        f"{known_cpu * 1000 / ENUMERATION_ATTEMPTS:.2f} ms CPU each; "
+        f"unknown: {ENUMERATION_ATTEMPTS / unknown_wall:.1f} req/s, "
+        f"{unknown_cpu * 1000 / ENUMERATION_ATTEMPTS:.2f} ms CPU each"
+    )
+    assert unknown_cpu < known_cpu / 3
+    assert abs(unknown_wall - known_wall) / known_wall < 0.25
+
+
+REFRESH_ROTATIONS = 200
+
+
+def test_refresh_rotation_throughput(client, test_db):
+    """Refresh is one JWT decode, one Redis script call and two encodes."""
+    db = test_db()
+    db.add(
+        User(email="spin@example.com", hashed_password=get_password_hash("Pass1234"))
+    )
+    db.commit()
+    db.close()
+    refresh_token = client.post(
+        "/api/v1/auth/login",
+        data={"username": "spin@example.com", "password": "Pass1234"},
+    ).json()["refresh_token"]
+
+    start = time.perf_counter()
+    for _ in range(REFRESH_ROTATIONS):
+        response = client.post(
+            "/api/v1/auth/refresh",
+            headers={"Authorization": f"Bearer {refresh_token}"},
+        )
+        assert response.status_code == 200
+        refresh_token = response.json()["refresh_token"]
+    elapsed = time.perf_counter() - start
+
+    print(f"\nrefresh: {REFRESH_ROTATIONS / elapsed:.0f} rotations/s")
+    assert REFRESH_ROTATIONS / elapsed > 50
+
+
+VALIDATIONS = 5000
+
+
+async def test_session_validation_against_jwt():
+    """Compare per-request token validation cost of opaque sessions and JWTs."""
+    blacklist = TokenBlacklist()
+    jwt_token, _ = create_access_token({"user_id": 1})
+    store = SessionStore(
+        RedisClient(settings.REDIS_URL, client=fakeredis.FakeAsyncRedis()), ttl=60
+    )
+    session_token = await store.create(1, "internal-app")
+
+    start = time.perf_counter()
+    for _ in range(VALIDATIONS):
+        await decode_token(jwt_token, blacklist)
+    jwt_us = (time.perf_counter() - start) * 1e6 / VALIDATIONS
+
+    start = time.perf_counter()
+    for _ in range(VALIDATIONS):
+        await store.get(session_token)
+    cached_us = (time.perf_counter() - start) * 1e6 / VALIDATIONS
+
+    start = time.perf_counter()
+    for _ in range(VALIDATIONS // 10):
+        store.cache.clear()
+        await store.get(session_token)
+    redis_us = (time.perf_counter() - start) * 1e6 / (VALIDATIONS // 10)
+
+    print(
+        f"\nJWT ({len(jwt_token)} bytes): {jwt_us:.1f} us; "
+        f"session ({len(session_token)} bytes): {cached_us:.1f} us cached, "
+        f"{redis_us:.1f} us from Redis"
+    )
+    assert len(session_token) < len(jwt_token) / 4
+    assert cached_us < jwt_us
+
+
+MINTED_PAIRS = 20000
+
+
+def _pyjwt_pair(data):
+    """The previous minting path: dict copies, datetimes, UUIDs, PyJWT."""
+    now = datetime.utcnow()
+    access_jti, refresh_jti = str(uuid.uuid4()), str(uuid.uuid4())
+    common = {"iss": settings.TOKEN_ISSUER, "aud": "test-audience", "iat": now}
+    access = jwt.encode(
+        {
+            **data,
+            **common,
+            "jti": access_jti,
+            "type": "access",
+            "exp": now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        },
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+    refresh = jwt.encode(
+        {
+            **data,
+            **common,
+            "jti": refresh_jti,
+            "access_jti": access_jti,
+            "fam": refresh_jti,
+            "type": "refresh",
+            "exp": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        },
+        settings.REFRESH_SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+    return access, refresh
+
+
+def test_token_minting_throughput():
+    """Tokens per second per core for the minter against PyJWT encoding."""
+    data = {"user_id": 1, "gen": 0}
+
+    start = time.process_time()
+    for _ in range(MINTED_PAIRS):
+        _pyjwt_pair(data)
+    pyjwt_rate = 2 * MINTED_PAIRS / (time.process_time() - start)
+
+    start = time.process_time()
+    for _ in range(MINTED_PAIRS):
+        create_token_pair(data)
+    minter_rate = 2 * MINTED_PAIRS / (time.process_time() - start)
+
+    print(
+        f"\nPyJWT: {pyjwt_rate:.0f} tokens/s/core; "
+        f"minter: {minter_rate:.0f} tokens/s/core"
+    )
+    assert minter_rate > pyjwt_rate * 1.5
+
+
+AUDIT_EVENTS = 2000
+
+
+async def test_audit_batching_throughput(test_db):
+    """Audit events per second written by COPY batches against a row per event."""
+    engine = test_db.kw["bind"]
+    audit = AuditLog(engine, batch_size=500)
+    # Partitions exist before either side is timed
+    await audit.record("warm-up")
+    await audit.flush()
+
+    start = time.perf_counter()
+    for i in range(AUDIT_EVENTS):
+        with engine.begin() as connection:
+            connection.execute(
+                AuthAuditEvent.__table__.insert(),
+                {
+                    "occurred_at": datetime.now(timezone.utc),
+                    "event": "login",
+                    "user_id": i,
+                },
+            )
+    single_rate = AUDIT_EVENTS / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(AUDIT_EVENTS):
+        await audit.record("login", user_id=i)
+    record_seconds = time.perf_counter() - start
+    await audit.flush()
+    batched_rate = AUDIT_EVENTS / (time.perf_counter() - start)
+
+    print(
+        f"\nrow per event: {single_rate:.0f} events/s; "
+        f"batched COPY: {batched_rate:.0f} events/s; "
+        f"record(): {record_seconds / AUDIT_EVENTS * 1e6:.1f} us/event"
+    )
+    assert batched_rate > single_rate * 5
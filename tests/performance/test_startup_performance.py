@@ -0,0 +1,63 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Cumulative import time budget for `import src.main`, in milliseconds.
+# Override with STARTUP_IMPORT_BUDGET_MS on slower CI runners.
+IMPORT_BUDGET_MS = int(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1500"))
+
+# Modules that must not be loaded just by importing the app
+LAZY_MODULES = [
+    "slowapi",
+    "passlib",
+    "structlog",
+    "argon2",
+    "psycopg2",
+    "opentelemetry.sdk",
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _profile_import():
+    """Import src.main in a fresh interpreter and return {module: cumulative_us}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(2))
+    return timings
+
+
+def test_startup_import_time_within_budget():
+    """Cold import of the app stays under the configured budget."""
+    # Best of three runs to smooth out noise from the filesystem cache
+    runs = [_profile_import() for _ in range(3)]
+    best_ms = min(run["src.main"] for run in runs) / 1000
+
+    print(f"\nimport src.main: {best_ms:.1f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    assert (
+        best_ms <= IMPORT_BUDGET_MS
+    ), f"import src.main took {best_ms:.1f} ms, budget is {IMPORT_BUDGET_MS} ms"
+
+
+def test_heavy_dependencies_are_lazy():
+    """Unused or deferred dependencies are kept out of the import graph."""
+    timings = _profile_import()
+    loaded = [
+        name
+        for name in LAZY_MODULES
+        if any(module == name or module.startswith(f"{name}.") for module in timings)
+    ]
+    assert not loaded, f"Imported eagerly by src.main: {loaded}"
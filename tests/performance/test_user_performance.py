@@ -1,3 +1,174 @@
+import asyncio
+import random
+import re
+import string
+import time
+
+from sqlalchemy import text
+
+from src.core.batch_loader import BatchLoader
+from src.core.password_policy import PasswordPolicy
+from src.db.instrumentation import count_queries
+from src.db.models.user import User
+from src.db.repositories import get_user_repo, get_users_by_ids
+
+PASSWORDS = 20000
+
+
 def test_user_performance():
     # Placeholder for user performance/stress test
     assert True, "Implement user performance tests here."
+
+
+def _regex_validation(password: str) -> bool:
+    # The five-search validator PasswordPolicy replaced, kept for comparison
+    if len(password) < 8:
+        return False
+    for pattern in (r"[A-Z]", r"[a-z]", r"\d", r"[!@#$%^&*(),.?\":{}|<>]"):
+        if not re.search(pattern, password):
+            return False
+    return True
+
+
+def test_password_policy_throughput():
+    """One pass reporting every violation beats sequential regex searches."""
+    rng = random.Random(40)
+    alphabet = string.ascii_letters + string.digits + "!@#$%"
+    passwords = [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(6, 24)))
+        for _ in range(PASSWORDS)
+    ]
+    policy = PasswordPolicy(min_entropy_bits=40)
+
+    start = time.perf_counter()
+    for password in passwords:
+        _regex_validation(password)
+    regex_us = (time.perf_counter() - start) * 1e6 / PASSWORDS
+
+    start = time.perf_counter()
+    for password in passwords:
+        policy.violations(password)
+    policy_us = (time.perf_counter() - start) * 1e6 / PASSWORDS
+
+    print(f"\nregex: {regex_us:.2f} us/password; policy: {policy_us:.2f} us/password")
+    assert policy_us < regex_us * 1.5
+
+
+BENCH_ROWS = 100000
+BENCH_LOOKUPS = 2000
+
+# Index layouts of the users table before and after the a7c4e91b2d05 migration
+INDEX_LAYOUTS = {
+    "before": (
+        "CREATE INDEX ON {table} (id)",
+        "CREATE UNIQUE INDEX ON {table} (email)",
+    ),
+    "after": ("CREATE UNIQUE INDEX ON {table} (lower(email))",),
+}
+LOOKUPS = {
+    "before": "SELECT id FROM {table} WHERE email = :email LIMIT 1",
+    "after": "SELECT id FROM {table} WHERE lower(email) = lower(:email) LIMIT 1",
+}
+
+
+def _bench_layout(connection, layout):
+    table = f"bench_users_{layout}"
+    connection.execute(
+        text(
+            f"CREATE TEMP TABLE {table} (id serial PRIMARY KEY, "
+            "email varchar NOT NULL, hashed_password varchar NOT NULL)"
+        )
+    )
+    for statement in INDEX_LAYOUTS[layout]:
+        connection.execute(text(statement.format(table=table)))
+
+    # Generated server-side so the timing is index maintenance, not round trips
+    start = time.perf_counter()
+    connection.execute(
+        text(
+            f"INSERT INTO {table} (email, hashed_password) "
+            "SELECT 'User' || g || '@Example.com', repeat('x', 97) "
+            "FROM generate_series(0, :rows - 1) AS g"
+        ),
+        {"rows": BENCH_ROWS},
+    )
+    insert_rate = BENCH_ROWS / (time.perf_counter() - start)
+
+    connection.execute(text(f"ANALYZE {table}"))
+    lookup = text(LOOKUPS[layout].format(table=table))
+    found = 0
+    start = time.perf_counter()
+    for i in range(BENCH_LOOKUPS):
+        # Users type their email in whatever case they like
+        email = f"user{i * 7 % BENCH_ROWS}@example.com"
+        found += connection.execute(lookup, {"email": email}).first() is not None
+    lookup_rate = BENCH_LOOKUPS / (time.perf_counter() - start)
+    return insert_rate, lookup_rate, found
+
+
+def test_email_index_layout_throughput(test_db):
+    """Bulk insert and lookup throughput of the old and new users indexes."""
+    with test_db().get_bind().connect() as connection:
+        results = {layout: _bench_layout(connection, layout) for layout in LOOKUPS}
+        connection.rollback()
+
+    for layout, (insert_rate, lookup_rate, found) in results.items():
+        print(
+            f"\n{layout}: {insert_rate:.0f} inserts/s, {lookup_rate:.0f} lookups/s, "
+            f"{found}/{BENCH_LOOKUPS} found"
+        )
+    before, after = results["before"], results["after"]
+    assert before[2] == 0 and after[2] == BENCH_LOOKUPS
+    assert after[0] > before[0] * 0.85
+    assert after[1] > before[1] * 0.5
+
+
+CONCURRENT_LOOKUPS = 200
+
+
+async def test_batched_user_lookups(test_db):
+    """Concurrent id lookups: one query each vs the batching loader."""
+    db = test_db()
+    created = [
+        User(email=f"loader{i}@example.com", hashed_password="x")
+        for i in range(CONCURRENT_LOOKUPS)
+    ]
+    db.add_all(created)
+    db.commit()
+    ids = [user.id for user in created]
+    db.close()
+
+    def single(user_id):
+        session = test_db()
+        try:
+            return get_user_repo(session, user_id)
+        finally:
+            session.close()
+
+    def batch(user_ids):
+        session = test_db()
+        try:
+            return get_users_by_ids(session, user_ids)
+        finally:
+            session.close()
+
+    with count_queries() as unbatched:
+        start = time.perf_counter()
+        await asyncio.gather(*(asyncio.to_thread(single, i) for i in ids))
+        unbatched_s = time.perf_counter() - start
+
+    loader = BatchLoader("benchmark_users", batch, window=0.001, max_batch=100)
+    with count_queries() as batched:
+        start = time.perf_counter()
+        users = await asyncio.gather(*(loader.load(i) for i in ids))
+        batched_s = time.perf_counter() - start
+
+    print(
+        f"\nunbatched: {unbatched.count} queries, "
+        f"{CONCURRENT_LOOKUPS / unbatched_s:.0f} lookups/s; "
+        f"batched: {batched.count} queries, {CONCURRENT_LOOKUPS / batched_s:.0f} "
+        "lookups/s"
+    )
+    assert [user.id for user in users] == ids
+    assert batched.count <= 2
+    assert batched_s < unbatched_s
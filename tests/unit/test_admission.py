@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from src.core.admission import AdmissionController
+from src.core.exceptions import ServiceOverloadedError
+from src.core.security import get_password_hash
+from src.db.models.user import User
+
+
+async def test_limits_concurrency():
+    controller = AdmissionController("test", max_concurrency=2, queue_deadline=1.0)
+    running = 0
+    peak = 0
+
+    async def work():
+        nonlocal running, peak
+        async with controller.admit():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(work() for _ in range(6)))
+    assert peak == 2
+    assert controller.in_flight == 0
+    assert controller.waiting == 0
+
+
+async def test_queued_request_times_out_at_deadline():
+    controller = AdmissionController("test", max_concurrency=1, queue_deadline=0.05)
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.admit():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    while controller.in_flight == 0:
+        await asyncio.sleep(0)
+    with pytest.raises(ServiceOverloadedError) as exc_info:
+        async with controller.admit():
+            pass
+    assert exc_info.value.retry_after >= 1
+    release.set()
+    await holder
+    assert controller.waiting == 0
+
+
+async def test_rejects_early_when_expected_wait_exceeds_deadline():
+    controller = AdmissionController("test", max_concurrency=1, queue_deadline=0.5)
+    controller.avg_service_time = 1.0
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.admit():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    while controller.in_flight == 0:
+        await asyncio.sleep(0)
+    assert controller.expected_wait() == 1.0
+    with pytest.raises(ServiceOverloadedError):
+        async with controller.admit():
+            pass
+    # Rejected without ever queueing
+    assert controller.waiting == 0
+    release.set()
+    await holder
+
+
+def test_login_is_shed_with_retry_after(client, test_db):
+    db = test_db()
+    db.add(
+        User(email="storm@example.com", hashed_password=get_password_hash("Pass1234"))
+    )
+    db.commit()
+    db.close()
+    controller = AdmissionController("login", max_concurrency=1, queue_deadline=0.1)
+    controller.in_flight = 1
+    controller.avg_service_time = 5.0
+    client.app.state.resources.login_admission = controller
+
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "storm@example.com", "password": "Pass1234"},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+    # An unknown email is shed the same way, so a 503 does not reveal accounts
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "nobody@example.com", "password": "Pass1234"},
+    )
+    assert response.status_code == 503
+
+
+def test_cheap_endpoints_unaffected_by_full_login_queue(client):
+    controller = AdmissionController("login", max_concurrency=1, queue_deadline=0.1)
+    controller.in_flight = 1
+    client.app.state.resources.login_admission = controller
+
+    assert client.get("/api/v1/hello").status_code == 200
@@ -0,0 +1,154 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from src.core import audit as audit_module
+from src.core.audit import AuditLog
+from src.core.security import get_password_hash
+from src.db.audit import (
+    drop_partitions_before,
+    ensure_partitions,
+    list_partitions,
+    partition_name,
+)
+from src.db.models.audit import AuthAuditEvent
+from src.db.models.user import User
+
+
+def _events(test_db):
+    db = test_db()
+    try:
+        return db.execute(
+            select(
+                AuthAuditEvent.event,
+                AuthAuditEvent.user_id,
+                AuthAuditEvent.subject,
+                AuthAuditEvent.detail,
+            ).order_by(AuthAuditEvent.id)
+        ).all()
+    finally:
+        db.close()
+
+
+async def test_events_are_copied_in_batches(test_db):
+    audit = AuditLog(test_db.kw["bind"], batch_size=3, flush_interval=10)
+    audit.start()
+    for i in range(2):
+        await audit.record("login", user_id=i, client_ip="10.0.0.1")
+    await asyncio.sleep(0.05)
+    # A partial batch waits for the interval
+    assert len(audit) == 2
+    await audit.record("login_failed", subject="who@example.com")
+    # A full one is written at once
+    for _ in range(500):
+        if len(_events(test_db)) == 3:
+            break
+        await asyncio.sleep(0.01)
+    assert len(_events(test_db)) == 3
+    await audit.stop()
+
+    rows = _events(test_db)
+    assert [row.event for row in rows] == ["login", "login", "login_failed"]
+    assert rows[0].subject is None and rows[2].user_id is None
+    assert rows[2].subject == "who@example.com"
+
+
+async def test_full_buffer_applies_backpressure_then_drops(test_db):
+    audit = AuditLog(test_db.kw["bind"], capacity=2, backpressure_timeout=0.01)
+    await audit.record("a")
+    await audit.record("b")
+    # Nothing is flushing, so the third waits out its timeout and is dropped
+    await audit.record("c")
+    assert len(audit) == 2
+
+    audit.start()
+    # With the writer running, a waiting event gets its room
+    audit.backpressure_timeout = 2
+    await audit.record("d")
+    await audit.stop()
+    assert [row.event for row in _events(test_db)] == ["a", "b", "d"]
+
+
+async def test_failed_batches_are_kept_for_the_next_flush(test_db, monkeypatch):
+    audit = AuditLog(test_db.kw["bind"])
+    real_copy = audit_module.copy_audit_rows
+    calls = []
+
+    def flaky_copy(engine, rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError("database is down")
+        return real_copy(engine, rows)
+
+    monkeypatch.setattr(audit_module, "copy_audit_rows", flaky_copy)
+    await audit.record("logout", user_id=1)
+    assert await audit.flush() == 0
+    assert len(audit) == 1
+    assert await audit.flush() == 1
+    assert [row.event for row in _events(test_db)] == ["logout"]
+
+
+def test_retention_drops_whole_partitions(test_db):
+    engine = test_db.kw["bind"]
+    today = date(2026, 1, 10)
+    ensure_partitions(engine, today - timedelta(days=3), 5)
+    assert len(list_partitions(engine)) == 5
+
+    dropped = drop_partitions_before(engine, today - timedelta(days=1))
+    assert dropped == [
+        partition_name(today - timedelta(days=3)),
+        partition_name(today - timedelta(days=2)),
+    ]
+    assert list_partitions(engine)[0] == partition_name(today - timedelta(days=1))
+
+
+def test_auth_handlers_record_events(client, test_db):
+    db = test_db()
+    user = User(
+        email="audit@example.com", hashed_password=get_password_hash("Pass1234!")
+    )
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    client.post(
+        "/api/v1/auth/login",
+        data={"username": "audit@example.com", "password": "wrong-one1"},
+    )
+    tokens = client.post(
+        "/api/v1/auth/login",
+        data={"username": "audit@example.com", "password": "Pass1234!"},
+    ).json()
+    refreshed = client.post(
+        "/api/v1/auth/refresh",
+        headers={"Authorization": f"Bearer {tokens['refresh_token']}"},
+    ).json()
+    client.post(
+        "/api/v1/auth/logout",
+        headers={"Authorization": f"Bearer {refreshed['access_token']}"},
+    )
+    client.portal.call(client.app.state.resources.audit.flush)
+
+    rows = _events(test_db)
+    assert [(row.event, row.user_id) for row in rows] == [
+        ("login_failed", user_id),
+        ("login", user_id),
+        ("refresh", user_id),
+        ("logout", user_id),
+    ]
+    assert rows[0].detail == "wrong password"
+
+
+async def test_rows_land_in_the_day_partition(test_db):
+    engine = test_db.kw["bind"]
+    audit = AuditLog(engine, partitions_ahead=1)
+    await audit.record("login", user_id=7)
+    assert await audit.flush() == 1
+
+    today = datetime.now(timezone.utc).date()
+    assert list_partitions(engine) == [
+        partition_name(today),
+        partition_name(today + timedelta(days=1)),
+    ]
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.core.batch_loader import BatchLoader
+from src.db.instrumentation import count_queries
+from src.db.models.user import User
+from src.db.repositories import get_users_by_emails, get_users_by_ids
+
+
+def _recording_loader(name, **kwargs):
+    calls = []
+
+    def fetch(keys):
+        calls.append(sorted(keys))
+        return {key: key * 10 for key in keys if key != 0}
+
+    return BatchLoader(name, fetch, **kwargs), calls
+
+
+async def test_concurrent_lookups_share_one_batch():
+    loader, calls = _recording_loader("test_share", window=0.01)
+
+    results = await asyncio.gather(*(loader.load(key) for key in (3, 1, 2, 1, 0)))
+
+    assert results == [30, 10, 20, 10, None]
+    assert calls == [[0, 1, 2, 3]]
+
+
+async def test_full_batch_dispatches_before_the_window():
+    loader, calls = _recording_loader("test_full", window=10, max_batch=3)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(loader.load(key) for key in (1, 2, 3))), timeout=1
+    )
+
+    assert results == [10, 20, 30]
+    assert calls == [[1, 2, 3]]
+
+
+async def test_errors_reach_every_waiter():
+    def fail(keys):
+        raise RuntimeError("database down")
+
+    loader = BatchLoader("test_error", fail, window=0.001)
+    results = await asyncio.gather(
+        loader.load(1), loader.load(2), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+async def test_metrics_report_batch_size_and_saved_queries():
+    loader, _ = _recording_loader("test_metrics", window=0.001)
+    await asyncio.gather(*(loader.load(key) for key in (1, 2, 2, 3)))
+
+    labels = {"loader": "test_metrics"}
+    assert REGISTRY.get_sample_value("batch_loader_batch_size_sum", labels) == 3
+    assert REGISTRY.get_sample_value("batch_loader_queries_saved_total", labels) == 3
+    assert (
+        REGISTRY.get_sample_value("batch_loader_added_latency_seconds_count", labels)
+        == 1
+    )
+
+
+@pytest.fixture
+def users(test_db):
+    db = test_db()
+    created = [
+        User(email=f"Batch{i}@Example.com", hashed_password="x") for i in range(5)
+    ]
+    db.add_all(created)
+    db.commit()
+    ids = [user.id for user in created]
+    db.close()
+    return ids
+
+
+def test_users_by_ids_is_one_query(test_db, users):
+    db = test_db()
+    with count_queries() as stats:
+        found = get_users_by_ids(db, users + [999999])
+    assert stats.count == 1
+    assert sorted(found) == sorted(users)
+    db.close()
+
+
+def test_users_by_emails_keeps_requested_spelling(test_db, users):
+    db = test_db()
+    with count_queries() as stats:
+        found = get_users_by_emails(db, ["batch1@example.com", "BATCH3@EXAMPLE.COM"])
+    assert stats.count == 1
+    assert found["batch1@example.com"].email == "Batch1@Example.com"
+    assert found["BATCH3@EXAMPLE.COM"].id == users[3]
+    db.close()
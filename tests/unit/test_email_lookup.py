@@ -0,0 +1,47 @@
+from sqlalchemy import event, inspect, text
+
+from src.db.models.user import User
+from src.db.repositories import get_user_by_email
+
+
+def test_lookup_ignores_case(test_db):
+    db = test_db()
+    db.add(User(email="Mixed.Case@Example.com", hashed_password="x"))
+    db.commit()
+
+    user = get_user_by_email(db, "mixed.case@EXAMPLE.COM")
+    assert user is not None and user.email == "Mixed.Case@Example.com"
+    assert get_user_by_email(db, "other@example.com") is None
+    db.close()
+
+
+def test_lookup_uses_lower_email_index(test_db):
+    db = test_db()
+    engine = db.get_bind()
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        get_user_by_email(db, "Someone@Example.com")
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    statement, parameters = captured[-1]
+    db.execute(text("SET enable_seqscan = off"))
+    cursor = db.connection().connection.cursor()
+    cursor.execute(f"EXPLAIN {statement}", parameters)
+    plan = "\n".join(row[0] for row in cursor.fetchall())
+    assert "ix_users_email_lower" in plan
+    db.close()
+
+
+def test_primary_keys_have_no_duplicate_index(test_db):
+    db = test_db()
+    inspector = inspect(db.get_bind())
+    for table in ("users", "example"):
+        indexed = [index["column_names"] for index in inspector.get_indexes(table)]
+        assert ["id"] not in indexed
+    db.close()
@@ -0,0 +1,62 @@
+from fastapi import status
+
+from src.main import app
+
+
+def test_livez(client):
+    response = client.get("/livez")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"status": "alive"}
+
+
+def test_readyz_reports_dependency_checks(client):
+    """Readiness reflects the latest background check results"""
+    client.portal.call(app.state.resources.health.run_checks)
+
+    response = client.get("/readyz")
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["checks"]["postgres"]["status"] == "ok"
+    assert body["checks"]["redis"]["status"] == "ok"
+
+
+def test_readyz_serves_cached_results(client, monkeypatch):
+    """Probes never run the dependency checks themselves"""
+    calls = []
+
+    async def counting_check():
+        calls.append(1)
+        return True
+
+    health = app.state.resources.health
+    monkeypatch.setitem(health.checks, "postgres", counting_check)
+    for _ in range(20):
+        client.get("/readyz")
+    assert calls == []
+
+
+def test_readyz_unready_when_critical_check_fails(client, monkeypatch):
+    async def failing_check():
+        raise ConnectionError("connection refused")
+
+    health = app.state.resources.health
+    monkeypatch.setitem(health.checks, "postgres", failing_check)
+    client.portal.call(health.run_checks)
+
+    response = client.get("/readyz")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["checks"]["postgres"]["error"] == "connection refused"
+
+
+def test_readyz_ignores_non_critical_failures(client, monkeypatch):
+    async def failing_check():
+        return False
+
+    health = app.state.resources.health
+    monkeypatch.setitem(health.checks, "redis", failing_check)
+    client.portal.call(health.run_checks)
+
+    response = client.get("/readyz")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["checks"]["redis"]["status"] == "failing"
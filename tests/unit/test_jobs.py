@@ -0,0 +1,291 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from src.core.jobs import (
+    JobQueue,
+    MemoryBackend,
+    RedisStreamsBackend,
+    Worker,
+    job,
+    parse_queues,
+)
+from src.core.redis_client import RedisClient
+
+
+class Context:
+    def __init__(self):
+        self.calls = []
+        self.failures = {}
+        self.running = 0
+        self.peak = 0
+
+
+@job("test.record", queue="default")
+async def record(context, value):
+    context.calls.append(value)
+
+
+@job("test.flaky", queue="default", max_attempts=3)
+async def flaky(context, value):
+    context.calls.append(value)
+    remaining = context.failures.get(value, 0)
+    if remaining:
+        context.failures[value] = remaining - 1
+        raise RuntimeError("try again")
+
+
+@job("test.slow", queue="slow")
+async def slow(context):
+    context.running += 1
+    context.peak = max(context.peak, context.running)
+    await asyncio.sleep(0.02)
+    context.running -= 1
+    context.calls.append("slow")
+
+
+@job("test.secret", queue="local")
+async def secret(context, password):
+    context.calls.append(password)
+
+
+def _redis() -> RedisClient:
+    return RedisClient("redis://test", client=fakeredis.FakeAsyncRedis())
+
+
+def _worker(context, jobs) -> Worker:
+    worker = Worker(context, retry_base=0.001, retry_max=0.01, poll_interval=0.01)
+    for queue, limit in {**jobs.durable_queues, **jobs.local_queues}.items():
+        worker.consume(jobs.local, queue, limit)
+        if jobs.durable is not None and queue in jobs.durable_queues:
+            worker.consume(jobs.durable, queue, limit)
+    return worker
+
+
+async def _until(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def test_parse_queues():
+    assert parse_queues("default:4, maintenance:1,bare") == {
+        "default": 4,
+        "maintenance": 1,
+        "bare": 1,
+    }
+
+
+def test_backoff_is_capped_and_jittered():
+    worker = Worker(None, retry_base=1.0, retry_max=10.0)
+    delays = [worker.backoff(attempt) for attempt in range(1, 12) for _ in range(20)]
+    assert all(0 <= delay <= 10.0 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+async def test_memory_queue_runs_jobs():
+    context = Context()
+    jobs = JobQueue(MemoryBackend(), local_queues={"default": 2})
+    worker = _worker(context, jobs)
+    worker.start()
+
+    for value in range(5):
+        await jobs.enqueue("test.record", value=value)
+    await _until(lambda: len(context.calls) == 5)
+    await worker.stop()
+
+    assert sorted(context.calls) == list(range(5))
+
+
+async def test_failed_jobs_retry_then_dead_letter():
+    context = Context()
+    context.failures = {"recovers": 2, "broken": 10}
+    local = MemoryBackend()
+    jobs = JobQueue(local, local_queues={"default": 1})
+    worker = _worker(context, jobs)
+    worker.start()
+
+    await jobs.enqueue("test.flaky", value="recovers")
+    await jobs.enqueue("test.flaky", value="broken")
+    await _until(lambda: len(local.dead_letters) == 1)
+    await _until(lambda: context.calls.count("recovers") == 3)
+    await worker.stop()
+
+    # max_attempts=3 on the job overrides the worker's default of 5
+    assert context.calls.count("broken") == 3
+    dead, error = local.dead_letters[0]
+    assert dead.kwargs == {"value": "broken"} and "try again" in error
+
+
+async def test_queue_concurrency_is_limited():
+    context = Context()
+    jobs = JobQueue(MemoryBackend(), local_queues={"slow": 2})
+    worker = _worker(context, jobs)
+    worker.start()
+
+    for _ in range(6):
+        await jobs.enqueue("test.slow")
+    await _until(lambda: len(context.calls) == 6)
+    await worker.stop()
+
+    assert context.peak == 2
+
+
+async def test_redis_streams_run_and_remove_jobs():
+    context = Context()
+    redis = _redis()
+    durable = RedisStreamsBackend(redis)
+    jobs = JobQueue(MemoryBackend(), durable, durable_queues={"default": 2})
+    worker = _worker(context, jobs)
+    worker.start()
+
+    for value in range(4):
+        await jobs.enqueue("test.record", value=value)
+    await _until(lambda: len(context.calls) == 4)
+    await worker.stop()
+
+    assert sorted(context.calls) == list(range(4))
+    assert await redis.redis.xlen("jobs:default") == 0
+    assert await redis.redis.xpending("jobs:default", "workers") == {
+        "pending": 0,
+        "min": None,
+        "max": None,
+        "consumers": [],
+    }
+
+
+async def test_redis_retries_wait_in_the_delayed_set_then_dead_letter():
+    context = Context()
+    context.failures = {"broken": 10}
+    redis = _redis()
+    jobs = JobQueue(
+        MemoryBackend(), RedisStreamsBackend(redis), durable_queues={"default": 1}
+    )
+    worker = _worker(context, jobs)
+    worker.start()
+
+    await jobs.enqueue("test.flaky", value="broken")
+    await _until(lambda: context.calls.count("broken") == 3)
+    for _ in range(100):
+        if await redis.redis.xlen("jobs:default:dead"):
+            break
+        await asyncio.sleep(0.01)
+    await worker.stop()
+
+    dead = await redis.redis.xrange("jobs:default:dead")
+    assert len(dead) == 1
+    fields = dead[0][1]
+    assert b'"attempts":3' in fields[b"job"] and b"try again" in fields[b"error"]
+    assert await redis.redis.zcard("jobs:default:delayed") == 0
+    assert await redis.redis.xlen("jobs:default") == 0
+
+
+async def test_jobs_of_a_dead_consumer_are_claimed():
+    context = Context()
+    redis = _redis()
+    crashed = RedisStreamsBackend(redis, consumer="crashed")
+    jobs = JobQueue(MemoryBackend(), crashed, durable_queues={"default": 1})
+    await jobs.enqueue("test.record", value="orphan")
+    # Delivered to a consumer that never acks it
+    assert len(await crashed.fetch("default", 1, 0)) == 1
+
+    rescuer = RedisStreamsBackend(redis, consumer="rescuer", claim_idle=0)
+    worker = Worker(context, poll_interval=0.01)
+    worker.consume(rescuer, "default", 1)
+    worker.start()
+    await _until(lambda: context.calls == ["orphan"])
+    await worker.stop()
+
+    assert await redis.redis.xlen("jobs:default") == 0
+
+
+async def test_redis_6_autoclaim_reply_is_understood(monkeypatch):
+    redis = _redis()
+    backend = RedisStreamsBackend(redis, consumer="old", claim_idle=0)
+    jobs = JobQueue(MemoryBackend(), backend, durable_queues={"default": 1})
+    await jobs.enqueue("test.record", value="pending")
+    assert len(await backend.fetch("default", 1, 0)) == 1
+    execute = redis.execute
+
+    async def redis_6_execute(*args, **kwargs):
+        reply = await execute(*args, **kwargs)
+        # Redis 6.2 replies without the list of deleted ids
+        return reply[:2] if args[0] == "XAUTOCLAIM" else reply
+
+    monkeypatch.setattr(redis, "execute", redis_6_execute)
+    claimed = await backend.fetch("default", 1, 0)
+    assert [job.kwargs for job in claimed] == [{"value": "pending"}]
+
+
+class BrokenOnceBackend(MemoryBackend):
+    def __init__(self):
+        super().__init__()
+        self.broken = True
+
+    async def fetch(self, queue, count, timeout):
+        if self.broken:
+            self.broken = False
+            raise ValueError("unexpected reply")
+        return await super().fetch(queue, count, timeout)
+
+
+async def test_consumer_survives_unexpected_fetch_errors():
+    context = Context()
+    backend = BrokenOnceBackend()
+    jobs = JobQueue(backend, local_queues={"default": 1})
+    worker = _worker(context, jobs)
+    worker.start()
+
+    await jobs.enqueue("test.record", value="after the error")
+    await _until(lambda: context.calls == ["after the error"])
+    await worker.stop()
+
+
+async def test_local_queues_never_reach_redis():
+    context = Context()
+    redis = _redis()
+    jobs = JobQueue(
+        MemoryBackend(),
+        RedisStreamsBackend(redis),
+        durable_queues={"default": 1},
+        local_queues={"local": 1},
+    )
+    worker = _worker(context, jobs)
+    worker.start()
+
+    await jobs.enqueue("test.secret", password="hunter2")
+    await _until(lambda: context.calls == ["hunter2"])
+    await worker.stop()
+
+    assert await redis.redis.exists("jobs:local") == 0
+
+
+async def test_enqueue_falls_back_to_memory_when_redis_is_down():
+    context = Context()
+    redis = _redis()
+    for _ in range(redis.breaker.failure_threshold):
+        redis.breaker.record_failure()
+    jobs = JobQueue(
+        MemoryBackend(), RedisStreamsBackend(redis), durable_queues={"default": 1}
+    )
+    worker = _worker(context, jobs)
+    worker.start()
+
+    await jobs.enqueue("test.record", value="kept")
+    await _until(lambda: context.calls == ["kept"])
+    await worker.stop()
+
+
+@pytest.mark.parametrize("durable", [True, False])
+def test_app_workers_consume_local_queues(client, durable):
+    resources = client.app.state.resources
+    consumers = {
+        (consumer.backend.name, consumer.queue)
+        for consumer in Worker.from_settings(
+            resources.settings, resources, resources.jobs, durable=durable
+        )._consumers
+    }
+    assert ("memory", "local") in consumers and ("memory", "default") in consumers
+    assert (("redis", "default") in consumers) is durable
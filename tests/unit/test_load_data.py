@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import select
+
+from src.core.config import settings
+from src.core.security import verify_password
+from src.db import load_data
+from src.db.load_data import load_synthetic_data, password_for, synthetic_users
+from src.db.models.example_model import ExampleModel
+from src.db.models.user import User
+
+
+@pytest.fixture(autouse=True)
+def cheap_hashes(monkeypatch):
+    monkeypatch.setattr(settings, "ARGON2_TIME_COST", 1)
+    monkeypatch.setattr(settings, "ARGON2_MEMORY_COST", 8)
+    monkeypatch.setattr(settings, "ARGON2_PARALLELISM", 1)
+
+
+def test_rows_do_not_depend_on_chunking():
+    hashes = ["h0", "h1", "h2"]
+    whole = list(synthetic_users(7, 1, 100, hashes))
+    split = list(synthetic_users(7, 1, 40, hashes)) + list(
+        synthetic_users(7, 41, 60, hashes)
+    )
+    assert whole == split
+    assert whole != list(synthetic_users(8, 1, 100, hashes))
+    assert len({email for _, email, _ in whole}) == 100
+
+
+def test_users_and_examples_are_copied_in_parallel(test_db, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(load_data, "invalidate_shared_filter", invalidated.append)
+    db = test_db()
+    db.add(User(email="existing@example.com", hashed_password="x"))
+    db.commit()
+
+    stats = load_synthetic_data(
+        settings.TEST_DATABASE_URL,
+        users=250,
+        examples=30,
+        seed=3,
+        processes=2,
+        chunk_size=100,
+        pool_size=4,
+        redis_url=settings.REDIS_URL,
+    )
+    # Workers must rebuild the login filter to let the new users in
+    assert invalidated == [settings.REDIS_URL]
+    assert stats["users"][0] == 250 and stats["example"][0] == 30
+    assert stats["password_hashes"][0] == 4
+
+    users = db.execute(select(User).order_by(User.id)).scalars().all()
+    assert [user.id for user in users] == list(range(1, 252))
+    assert verify_password(password_for(users[-1].id, 4), users[-1].hashed_password)
+    assert db.query(ExampleModel).count() == 30
+
+    # The id sequence continues after the generated ids
+    db.add(User(email="after@example.com", hashed_password="x"))
+    db.commit()
+    assert db.query(User).filter(User.email == "after@example.com").one().id == 252
+    db.close()
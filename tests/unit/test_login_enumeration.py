@@ -0,0 +1,189 @@
+import time
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from src.core.bloom import EmailBloomFilter
+from src.core.config import settings
+from src.core.exceptions import RedisUnavailableError
+from src.core.login_timing import LoginLatency
+from src.core.redis_client import RedisClient
+from src.services.jobs import publish_to_login_filter
+
+
+def _redis():
+    return RedisClient(settings.REDIS_URL, client=fakeredis.FakeAsyncRedis())
+
+
+async def test_loaded_filter_has_no_false_negatives():
+    email_filter = EmailBloomFilter(1000, 0.01)
+    emails = [f"user{i}@example.com" for i in range(500)]
+    email_filter.load(emails)
+
+    for email in emails:
+        assert await email_filter.might_contain(email)
+    assert await email_filter.might_contain("USER1@example.com ")
+    misses = sum(
+        [await email_filter.might_contain(f"other{i}@example.com") for i in range(500)]
+    )
+    assert misses < 25
+
+
+async def test_unloaded_filter_fails_open():
+    email_filter = EmailBloomFilter(1000, 0.01)
+    assert await email_filter.might_contain("anyone@example.com")
+
+
+async def test_signups_are_shared_through_redis():
+    redis = _redis()
+    first = EmailBloomFilter(1000, 0.01, redis=redis)
+    second = EmailBloomFilter(1000, 0.01, redis=redis)
+    first.load(["old@example.com"])
+    await first.publish(complete=True)
+    second.load([])
+
+    await first.add_shared("new@example.com")
+
+    assert await second.might_contain("old@example.com")
+    assert await second.might_contain("new@example.com")
+    assert not await second.might_contain("nobody@example.com")
+
+
+async def test_workers_load_the_built_filter_from_redis():
+    redis = _redis()
+    builder = EmailBloomFilter(1000, 0.01, redis=redis)
+    worker = EmailBloomFilter(1000, 0.01, redis=redis)
+
+    # Signups alone do not make a filter that may answer negatives
+    await builder.add_shared("new@example.com")
+    assert not await worker.load_shared()
+    assert not worker.loaded
+
+    builder.load([f"user{i}@example.com" for i in range(100)])
+    await builder.publish(complete=True)
+    worker.add("local@example.com")
+    assert await worker.load_shared()
+
+    # Answered from the loaded bits, without asking Redis
+    allow = redis.breaker.allow
+    redis.breaker.allow = lambda: False
+    assert await worker.might_contain("user7@example.com")
+    assert await worker.might_contain("new@example.com")
+    assert await worker.might_contain("local@example.com")
+    redis.breaker.allow = allow
+    assert not await worker.might_contain("nobody@example.com")
+
+
+async def test_local_miss_is_not_trusted_without_a_complete_build():
+    redis = _redis()
+    builder = EmailBloomFilter(1000, 0.01, redis=redis, built_ttl=60)
+    worker = EmailBloomFilter(1000, 0.01, redis=redis)
+    builder.load(["known@example.com"])
+    await builder.publish(complete=True)
+    assert await worker.load_shared()
+    assert not await worker.might_contain("fresh@example.com")
+    assert 0 < await redis.execute("TTL", builder.built_key) <= 60
+
+    # As after a bulk insert, or a build that expired without a rebuild
+    await redis.execute("DEL", builder.built_key)
+    assert await worker.might_contain("fresh@example.com")
+    assert not await worker.load_shared()
+
+
+async def test_failed_publish_is_retried():
+    redis = _redis()
+    redis.breaker.allow = lambda: False
+    resources = SimpleNamespace(email_filter=EmailBloomFilter(1000, 0.01, redis=redis))
+
+    with pytest.raises(RedisUnavailableError):
+        await publish_to_login_filter(resources, email="new@example.com")
+
+
+async def test_one_rebuild_is_claimed_per_period():
+    redis = _redis()
+    first = EmailBloomFilter(1000, 0.01, redis=redis)
+    second = EmailBloomFilter(1000, 0.01, redis=redis)
+
+    assert await first.claim_rebuild(60)
+    assert not await second.claim_rebuild(60)
+    assert not await EmailBloomFilter(1000, 0.01).claim_rebuild(60)
+
+
+async def test_local_miss_fails_open_when_redis_is_down():
+    redis = _redis()
+    redis.breaker.record_failure = lambda: None
+    email_filter = EmailBloomFilter(1000, 0.01, redis=redis)
+    email_filter.load([])
+    redis.breaker.allow = lambda: False
+
+    assert await email_filter.might_contain("nobody@example.com")
+
+
+async def test_padding_matches_average_latency():
+    latency = LoginLatency(jitter=0)
+    latency.observe(0.05)
+
+    started_at = time.perf_counter()
+    await latency.pad(started_at)
+
+    assert time.perf_counter() - started_at >= 0.05
+
+
+def test_unknown_email_skips_database_and_is_padded(client, assert_max_queries):
+    resources = client.app.state.resources
+    resources.email_filter.load(["known@example.com"])
+    resources.login_latency.average = 0.05
+
+    started_at = time.perf_counter()
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "ghost@example.com", "password": "TestPass123"},
+    )
+
+    assert response.status_code == 401
+    assert time.perf_counter() - started_at >= 0.04
+    assert_max_queries(response, 0)
+
+
+def test_startup_prefers_the_shared_filter_to_the_database(client, monkeypatch):
+    resources = client.app.state.resources
+    # Sized like the app's filter, which startup already published
+    builder = EmailBloomFilter(
+        settings.LOGIN_FILTER_CAPACITY,
+        settings.LOGIN_FILTER_ERROR_RATE,
+        redis=resources.redis,
+    )
+    builder.load(["shared@example.com"])
+    client.portal.call(builder.publish, True)
+
+    def read_database():
+        raise AssertionError("the database should not be read")
+
+    resources.email_filter = EmailBloomFilter(
+        settings.LOGIN_FILTER_CAPACITY,
+        settings.LOGIN_FILTER_ERROR_RATE,
+        redis=resources.redis,
+    )
+    monkeypatch.setattr(resources, "_read_emails_into_filter", read_database)
+    client.portal.call(resources.load_email_filter)
+
+    assert resources.email_filter.loaded
+    assert client.portal.call(
+        resources.email_filter.might_contain, "shared@example.com"
+    )
+
+
+def test_signup_adds_email_to_filter(client):
+    resources = client.app.state.resources
+    resources.email_filter.load([])
+
+    client.post(
+        "/api/v1/users", json={"email": "fresh@example.com", "password": "Pass1234!"}
+    )
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "fresh@example.com", "password": "Pass1234!"},
+    )
+
+    assert response.status_code == 200
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from src.core.config import settings
+from src.core.loop_monitor import LoopBlockingMiddleware, LoopLagMonitor
+
+
+def _hold_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def _lag_samples() -> float:
+    return REGISTRY.get_sample_value("event_loop_lag_seconds_count") or 0
+
+
+async def test_lag_is_measured_continuously():
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+    before = _lag_samples()
+    monitor.start()
+    await asyncio.sleep(0.1)
+    monitor.stop()
+
+    assert _lag_samples() - before >= 3
+    assert monitor.block_count == 0
+
+
+async def test_blocking_call_is_caught_with_its_stack():
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+    monitor.start()
+    await asyncio.sleep(0.02)
+    _hold_the_loop(0.3)
+    await asyncio.sleep(0.05)
+    monitor.stop()
+
+    assert monitor.block_count == 1
+    block = monitor.blocks[0]
+    assert 0.25 <= block.duration < 1
+    assert "_hold_the_loop" in block.stack
+    assert "test_blocking_call_is_caught_with_its_stack" in block.stack
+
+
+def _app(monitor: LoopLagMonitor) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app):
+        monitor.start()
+        yield
+        monitor.stop()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.resources = SimpleNamespace(loop_monitor=monitor)
+    app.add_middleware(LoopBlockingMiddleware)
+
+    @app.get("/blocking")
+    async def blocking():
+        _hold_the_loop(0.3)
+        return {}
+
+    @app.get("/offloaded")
+    async def offloaded():
+        await asyncio.to_thread(_hold_the_loop, 0.3)
+        return {}
+
+    return app
+
+
+def test_requests_that_block_the_loop_fail(monkeypatch):
+    monkeypatch.setattr(settings, "LOOP_BLOCK_FAIL_MS", 100.0)
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+
+    with TestClient(_app(monitor)) as client:
+        assert client.get("/offloaded").status_code == 200
+        with pytest.raises(AssertionError, match="GET /blocking blocked the event"):
+            client.get("/blocking")
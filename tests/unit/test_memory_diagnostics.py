@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi import status
+from prometheus_client import REGISTRY
+
+from src.core import security
+from src.core.config import settings
+from src.core.security import RateLimitMiddleware
+
+ADMIN_TOKEN = "test-admin-token"
+
+
+def _login_from(limiter: RateLimitMiddleware, ip: str) -> None:
+    limiter.check_rate_limit(SimpleNamespace(client=SimpleNamespace(host=ip)))
+
+
+def test_rate_limiter_forgets_idle_clients(monkeypatch):
+    limiter = RateLimitMiddleware(app=None)
+    monkeypatch.setattr(RateLimitMiddleware, "MIN_PRUNE_SIZE", 10)
+    limiter._prune_at = 10
+    clock = SimpleNamespace(now=datetime(2026, 1, 1))
+    monkeypatch.setattr(security, "datetime", SimpleNamespace(utcnow=lambda: clock.now))
+
+    for i in range(9):
+        _login_from(limiter, f"10.0.0.{i}")
+    _login_from(limiter, "10.0.0.0")
+    assert len(limiter.requests) == 9
+
+    # The tenth client triggers a sweep of the nine whose window has passed
+    clock.now += timedelta(seconds=settings.LOGIN_RATE_LIMIT_WINDOW + 1)
+    _login_from(limiter, "10.0.1.1")
+    assert list(limiter.requests) == ["10.0.1.1"]
+
+
+def test_request_metrics_are_labelled_by_route(client):
+    for user_id in (901, 902):
+        client.get(f"/api/v1/users/{user_id}")
+
+    def requests_for(endpoint):
+        return REGISTRY.get_sample_value(
+            "http_requests_total",
+            {"method": "GET", "endpoint": endpoint, "status": "404"},
+        )
+
+    assert requests_for("/api/v1/users/{user_id}") >= 2
+    assert requests_for("/api/v1/users/901") is None
+
+
+def test_memory_report_lists_cache_sizes(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", ADMIN_TOKEN)
+    response = client.get("/api/v1/admin/memory", headers={"X-Admin-Token": "x"})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    report = client.get(
+        "/api/v1/admin/memory", headers={"X-Admin-Token": ADMIN_TOKEN}
+    ).json()
+    assert report["rss_bytes"] > 0
+    assert len(report["gc"]["counts"]) == 3
+    assert report["tracing"] is False
+    for name in ("token_blacklist", "rate_limited_clients", "session_cache"):
+        assert report["sizes"][name] >= 0
+
+
+def test_snapshot_diff_finds_growing_allocations(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", ADMIN_TOKEN)
+    headers = {"X-Admin-Token": ADMIN_TOKEN}
+
+    response = client.post("/api/v1/admin/memory/snapshots", headers=headers)
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+    client.post("/api/v1/admin/memory/tracing", headers=headers)
+    try:
+        base = client.post("/api/v1/admin/memory/snapshots", headers=headers).json()
+        hoard = [bytearray(1024) for _ in range(2000)]
+        snapshot = client.post("/api/v1/admin/memory/snapshots", headers=headers).json()
+        assert snapshot["top"]
+
+        diff = client.get(
+            f"/api/v1/admin/memory/snapshots/{snapshot['id']}/diff/{base['id']}",
+            headers=headers,
+        ).json()
+        grown = [
+            entry
+            for entry in diff
+            if "test_memory_diagnostics.py" in entry["traceback"][0]
+        ]
+        assert grown and grown[0]["size_diff"] >= 2000 * 1024
+        assert len(hoard) == 2000
+
+        response = client.get("/api/v1/admin/memory/snapshots/999", headers=headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    finally:
+        client.delete("/api/v1/admin/memory/tracing", headers=headers)
+    report = client.get("/api/v1/admin/memory", headers=headers).json()
+    assert report["tracing"] is False and report["snapshots"] == []
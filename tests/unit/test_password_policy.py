@@ -0,0 +1,104 @@
+import hashlib
+
+import pytest
+
+from src.core.config import settings
+from src.core.exceptions import PasswordTooWeakException
+from src.core.password_policy import BreachedPasswords, PasswordPolicy
+from src.core.security import get_password_policy, validate_password_strength
+
+
+def _sha1(password: str) -> str:
+    return hashlib.sha1(password.encode()).hexdigest().upper()
+
+
+@pytest.fixture
+def breached_file(tmp_path):
+    leaked = ["password1", "Summer2024!", "letmein"]
+    filler = [f"filler-{i}" for i in range(200)]
+    lines = sorted(f"{_sha1(p)}:{i + 1}" for i, p in enumerate(leaked + filler))
+    path = tmp_path / "breached.txt"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_reports_every_violation_at_once():
+    problems = PasswordPolicy().violations("abc")
+
+    assert problems == [
+        "Password must be at least 8 characters long",
+        "Password must contain at least one uppercase letter",
+        "Password must contain at least one number",
+        "Password must contain at least one special character",
+    ]
+
+
+def test_strong_password_passes():
+    assert PasswordPolicy(min_entropy_bits=50).violations("Tr0ub4dor&3x") == []
+
+
+def test_entropy_estimate_grows_with_classes_and_length():
+    assert PasswordPolicy.entropy_bits("aaaaaaaa") < PasswordPolicy.entropy_bits(
+        "aA1!aA1!"
+    )
+    assert PasswordPolicy(required_classes=(), min_entropy_bits=60).violations(
+        "abcdefgh"
+    ) == ["Password is too predictable"]
+
+
+def test_breached_lookup(breached_file):
+    with BreachedPasswords(breached_file) as breached:
+        assert "Summer2024!" in breached
+        assert "password1" in breached
+        assert "filler-199" in breached
+        assert "Winter2024!" not in breached
+        assert "" not in breached
+        policy = PasswordPolicy(breached=breached)
+        assert policy.violations("Summer2024!") == [
+            "Password has appeared in a data breach"
+        ]
+
+
+def test_policy_follows_settings(monkeypatch, breached_file):
+    monkeypatch.setattr(settings, "PASSWORD_MIN_LENGTH", 12)
+    monkeypatch.setattr(settings, "PASSWORD_REQUIRED_CLASSES", "lower,digit")
+    monkeypatch.setattr(settings, "PASSWORD_BREACHED_FILE", breached_file)
+
+    with pytest.raises(PasswordTooWeakException) as exc_info:
+        validate_password_strength("password1")
+    assert exc_info.value.violations == [
+        "Password must be at least 12 characters long",
+        "Password has appeared in a data breach",
+    ]
+    assert validate_password_strength("correct horse 42")
+    assert get_password_policy() is get_password_policy()
+
+    # A rebuilt policy releases the previous breached-password map
+    breached = get_password_policy().breached
+    monkeypatch.setattr(settings, "PASSWORD_MIN_LENGTH", 10)
+    assert get_password_policy().breached is not breached
+    assert breached._map.closed
+
+
+def test_unknown_class_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_REQUIRED_CLASSES", "upper,emoji")
+    with pytest.raises(ValueError):
+        PasswordPolicy.from_settings(settings)
+
+
+def test_missing_breached_file_is_rejected(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PASSWORD_BREACHED_FILE", str(tmp_path / "none.txt"))
+    with pytest.raises(ValueError, match="none.txt"):
+        PasswordPolicy.from_settings(settings)
+
+
+def test_signup_returns_all_violations(client):
+    response = client.post(
+        "/api/v1/users", json={"email": "weak@example.com", "password": "short"}
+    )
+
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert "at least 8 characters" in detail
+    assert "uppercase" in detail
+    assert "special character" in detail
@@ -0,0 +1,93 @@
+import time
+
+from argon2 import PasswordHasher
+
+from src.core.config import settings
+from src.core.security import get_password_hasher, password_needs_rehash
+from src.db.models.user import User
+from src.services.user import rehash_user_password
+
+
+def _create_user(test_db, email: str, hashed_password: str) -> None:
+    db = test_db()
+    db.add(User(email=email, hashed_password=hashed_password))
+    db.commit()
+    db.close()
+
+
+def _stored_hash(test_db, email: str) -> str:
+    db = test_db()
+    try:
+        return db.query(User).filter(User.email == email).one().hashed_password
+    finally:
+        db.close()
+
+
+def _wait_for_upgrade(test_db, email: str, timeout: float = 5.0) -> str:
+    # The upgrade runs as a job after the response
+    deadline = time.monotonic() + timeout
+    stored = _stored_hash(test_db, email)
+    while password_needs_rehash(stored) and time.monotonic() < deadline:
+        time.sleep(0.02)
+        stored = _stored_hash(test_db, email)
+    return stored
+
+
+def test_hasher_follows_settings(monkeypatch):
+    monkeypatch.setattr(settings, "ARGON2_TIME_COST", 2)
+    monkeypatch.setattr(settings, "ARGON2_MEMORY_COST", 8192)
+    hasher = get_password_hasher()
+    assert hasher.time_cost == 2
+    assert hasher.memory_cost == 8192
+    assert get_password_hasher() is hasher
+
+
+def test_password_needs_rehash_ignores_foreign_hashes():
+    assert password_needs_rehash("not-an-argon2-hash") is False
+
+
+def test_login_upgrades_outdated_hash(client, test_db):
+    weak = PasswordHasher(time_cost=1, memory_cost=8, parallelism=1)
+    _create_user(test_db, "rehash@example.com", weak.hash("TestPass123"))
+    assert password_needs_rehash(_stored_hash(test_db, "rehash@example.com"))
+
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "rehash@example.com", "password": "TestPass123"},
+    )
+
+    assert response.status_code == 200
+    upgraded = _wait_for_upgrade(test_db, "rehash@example.com")
+    assert not password_needs_rehash(upgraded)
+    assert get_password_hasher().verify(upgraded, "TestPass123")
+
+
+def test_login_keeps_current_hash(client, test_db):
+    current = get_password_hasher().hash("TestPass123")
+    _create_user(test_db, "current@example.com", current)
+
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "current@example.com", "password": "TestPass123"},
+    )
+
+    assert response.status_code == 200
+    assert _stored_hash(test_db, "current@example.com") == current
+
+
+def test_rehash_leaves_a_changed_password_alone(client, test_db):
+    weak = PasswordHasher(time_cost=1, memory_cost=8, parallelism=1)
+    old_hash = weak.hash("OldPass123")
+    _create_user(test_db, "changed@example.com", old_hash)
+    # Changed after the login that queued the rehash
+    db = test_db()
+    user = db.query(User).filter(User.email == "changed@example.com").one()
+    user.hashed_password = new_hash = weak.hash("NewPass456")
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    shards = client.app.state.resources.shards
+    rehash_user_password(shards, user_id, "OldPass123", old_hash)
+
+    assert _stored_hash(test_db, "changed@example.com") == new_hash
@@ -0,0 +1,81 @@
+import time
+
+from fastapi import status
+
+from src.core.config import settings
+from src.core.profiling import DEBUG_PROFILE_HEADER, sign_debug_header
+from src.core.security import get_password_hash
+from src.db.models.user import User
+
+ADMIN_TOKEN = "test-admin-token"
+
+
+def _create_user(test_db, email):
+    db = test_db()
+    db.add(User(email=email, hashed_password=get_password_hash("TestPass123")))
+    db.commit()
+    db.close()
+
+
+def test_unsampled_requests_are_not_profiled(client):
+    response = client.get("/api/v1/hello")
+    assert "Server-Timing" not in response.headers
+
+
+def test_sampled_login_reports_phase_breakdown(client, test_db, monkeypatch):
+    """A sampled login reports time spent in the database, Argon2 and JWT"""
+    _create_user(test_db, "profile@example.com")
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 1.0)
+
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "profile@example.com", "password": "TestPass123"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    timing = response.headers["Server-Timing"]
+    for phase in ("db;", "argon2;", "jwt;", "serialization;", "total;"):
+        assert phase in timing
+
+
+def test_signed_debug_header_forces_profiling(client):
+    header = sign_debug_header(int(time.time()) + 60)
+    response = client.get("/api/v1/hello", headers={DEBUG_PROFILE_HEADER: header})
+    assert "Server-Timing" in response.headers
+
+
+def test_invalid_debug_header_is_ignored(client):
+    expired = sign_debug_header(int(time.time()) - 1)
+    forged = f"{int(time.time()) + 60}.{'0' * 64}"
+    for header in (expired, forged, "garbage"):
+        response = client.get("/api/v1/hello", headers={DEBUG_PROFILE_HEADER: header})
+        assert "Server-Timing" not in response.headers
+
+
+def test_admin_endpoints_require_token(client, monkeypatch):
+    response = client.get("/api/v1/admin/profiling/summary")
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", ADMIN_TOKEN)
+    response = client.get(
+        "/api/v1/admin/profiling/summary", headers={"X-Admin-Token": "wrong"}
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_admin_profiling_aggregates(client, monkeypatch):
+    """Profiles are aggregated per route template and exported as folded stacks"""
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", ADMIN_TOKEN)
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 1.0)
+    headers = {"X-Admin-Token": ADMIN_TOKEN}
+    client.delete("/api/v1/admin/profiling", headers=headers)
+
+    client.get("/api/v1/users/999")
+    client.get("/api/v1/users/998")
+
+    summary = client.get("/api/v1/admin/profiling/summary", headers=headers).json()
+    assert summary["GET /api/v1/users/{user_id}"]["requests"] == 2
+    assert "db" in summary["GET /api/v1/users/{user_id}"]["avg_ms"]
+
+    response = client.get("/api/v1/admin/profiling/flamegraph", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
@@ -0,0 +1,85 @@
+import logging
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.core.config import settings
+from src.db.instrumentation import count_queries, normalize_sql, parameter_shape
+from src.db.models.user import User
+
+
+def test_debug_headers_report_query_count(client, monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", True)
+    response = client.post(
+        "/api/v1/users", json={"email": "header@example.com", "password": "Header123!"}
+    )
+    assert int(response.headers["X-DB-Query-Count"]) > 0
+    assert float(response.headers["X-DB-Time-Ms"]) > 0
+
+
+def test_batched_queries_are_not_charged_to_the_request(client, assert_max_queries):
+    labels = {"loader": "users_by_id"}
+    before = REGISTRY.get_sample_value("batch_loader_queries_total", labels) or 0
+
+    response = client.get("/api/v1/users/999")
+
+    assert_max_queries(response, 0)
+    assert REGISTRY.get_sample_value("batch_loader_queries_total", labels) > before
+
+
+def test_headers_hidden_outside_debug(client):
+    response = client.get("/api/v1/users/999")
+    assert "X-DB-Query-Count" not in response.headers
+
+
+def test_create_user_query_budget(client, assert_max_queries):
+    response = client.post(
+        "/api/v1/users", json={"email": "budget@example.com", "password": "Budget123!"}
+    )
+    assert response.status_code == 200
+    assert_max_queries(response, 3)
+
+
+def test_query_budget_violation_fails(client, assert_max_queries):
+    response = client.post(
+        "/api/v1/users", json={"email": "over@example.com", "password": "Budget123!"}
+    )
+    with pytest.raises(AssertionError, match=r"issued \d+ SQL statements"):
+        assert_max_queries(response, 0)
+
+
+def test_count_queries_in_code(test_db):
+    db = test_db()
+    with count_queries() as stats:
+        db.query(User).filter(User.id == 1).first()
+        db.query(User).filter(User.email == "x@example.com").first()
+    db.close()
+    assert stats.count == 2
+    assert stats.total_time > 0
+
+
+def test_slow_queries_are_logged_normalized(test_db, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0)
+    db = test_db()
+    with caplog.at_level(logging.WARNING, logger="app_logger"):
+        db.query(User).filter(User.email == "secret@example.com").first()
+    db.close()
+
+    message = next(r.getMessage() for r in caplog.records if "slow_query" in r.message)
+    assert "FROM users WHERE users.email = %(email_1)s" in message
+    assert "email_1: str" in message
+    assert "secret@example.com" not in message
+
+
+def test_normalize_sql():
+    statement = """SELECT *  FROM users
+        WHERE id IN (%(id_1)s, %(id_2)s, %(id_3)s) AND name = 'bob' LIMIT 10"""
+    assert (
+        normalize_sql(statement)
+        == "SELECT * FROM users WHERE id IN (...) AND name = ? LIMIT ?"
+    )
+
+
+def test_parameter_shape():
+    assert parameter_shape({"id": 1, "email": "a"}, False) == "id: int, email: str"
+    assert parameter_shape([{"id": 1}, {"id": 2}], True) == "2 x id: int"
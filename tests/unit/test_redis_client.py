@@ -0,0 +1,115 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from src.core.exceptions import RedisUnavailableError
+from src.core.redis_client import CircuitBreaker, RedisClient
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def redis_client(server):
+    """RedisClient backed by an in-process fakeredis server"""
+    return RedisClient(
+        "redis://localhost:6379/0",
+        failure_threshold=2,
+        reset_timeout=60,
+        client=fakeredis.FakeAsyncRedis(server=server),
+    )
+
+
+async def test_get_set_delete(redis_client):
+    await redis_client.set("greeting", "hello", ex=60)
+    assert await redis_client.get("greeting") == b"hello"
+    assert await redis_client.delete("greeting") == 1
+    assert await redis_client.get("greeting") is None
+
+
+async def test_pipeline_runs_commands_in_order(redis_client):
+    results = await redis_client.pipeline(
+        [("SET", "a", 1), ("INCRBY", "a", 2), ("GET", "a")]
+    )
+    assert results == [True, 3, b"3"]
+
+
+async def test_batched_helpers(redis_client):
+    mapping = {f"key:{i}": str(i) for i in range(25)}
+    await redis_client.set_many(mapping, batch_size=10)
+    values = await redis_client.mget_batched(list(mapping) + ["missing"], batch_size=7)
+    assert values == [str(i).encode() for i in range(25)] + [None]
+
+
+async def test_circuit_opens_and_falls_back_to_local_store(redis_client, server):
+    server.connected = False
+    await redis_client.set("k", "v")
+    await redis_client.incr("counter")
+    assert redis_client.breaker.state == "open"
+
+    # Served locally without touching Redis while the circuit is open
+    assert await redis_client.get("k") == b"v"
+    assert await redis_client.incr("counter") == 2
+    assert await redis_client.mget_batched(["k"]) == [b"v"]
+    with pytest.raises(RedisUnavailableError):
+        await redis_client.execute("PING")
+
+
+async def test_connect_reports_unavailable(redis_client, server):
+    server.connected = False
+    assert await redis_client.connect(warm_connections=2) is False
+
+
+async def test_cached_get_uses_local_cache(redis_client, server):
+    await redis_client.set("config", "one")
+    assert await redis_client.cached_get("config") == b"one"
+
+    # A write from another client is not seen until invalidated
+    await fakeredis.FakeAsyncRedis(server=server).set("config", "two")
+    assert await redis_client.cached_get("config") == b"one"
+
+    redis_client.invalidate_local([b"config"])
+    assert await redis_client.cached_get("config") == b"two"
+
+
+def test_circuit_breaker_half_open_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_half_open_breaker_allows_one_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    breaker.opened_at -= 60
+
+    assert [breaker.allow(), breaker.allow()] == [True, False]
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    breaker.opened_at -= 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+async def test_half_open_client_sends_one_trial(redis_client):
+    for _ in range(redis_client.breaker.failure_threshold):
+        redis_client.breaker.record_failure()
+    redis_client.breaker.opened_at -= redis_client.breaker.reset_timeout
+
+    results = await asyncio.gather(
+        redis_client.pipeline([("PING",)]),
+        redis_client.pipeline([("PING",)]),
+        return_exceptions=True,
+    )
+
+    assert results[0] == [True]
+    assert isinstance(results[1], RedisUnavailableError)
+    assert redis_client.breaker.state == "closed"
@@ -0,0 +1,113 @@
+import hmac
+import json
+import time
+from types import SimpleNamespace
+
+import fakeredis
+import jwt
+import pytest
+
+from src.core import token_parser
+from src.core.config import settings
+from src.core.exceptions import RedisUnavailableError
+from src.core.redis_client import RedisClient
+from src.core.refresh_tokens import REUSED, REVOKED, ROTATED, RefreshTokenStore
+from src.core.security import get_password_hash
+from src.core.token_parser import ParsedToken
+from src.db.models.user import User
+
+
+def _login(client, test_db, email="rotate@example.com"):
+    db = test_db()
+    db.add(User(email=email, hashed_password=get_password_hash("TestPass123")))
+    db.commit()
+    db.close()
+    response = client.post(
+        "/api/v1/auth/login", data={"username": email, "password": "TestPass123"}
+    )
+    return response.json()["refresh_token"]
+
+
+def _refresh(client, refresh_token):
+    return client.post(
+        "/api/v1/auth/refresh", headers={"Authorization": f"Bearer {refresh_token}"}
+    )
+
+
+def test_rotated_tokens_stay_in_the_login_family(client, test_db):
+    first = _login(client, test_db)
+    second = _refresh(client, first).json()["refresh_token"]
+
+    claims = [
+        jwt.decode(t, options={"verify_signature": False}) for t in (first, second)
+    ]
+    assert claims[0]["fam"] == claims[1]["fam"]
+    assert claims[0]["jti"] != claims[1]["jti"]
+
+
+def test_reuse_revokes_the_whole_family(client, test_db):
+    first = _login(client, test_db)
+    second = _refresh(client, first).json()["refresh_token"]
+
+    assert _refresh(client, first).status_code == 401
+    # The legitimate holder's newer token is revoked along with the leaked one
+    assert _refresh(client, second).status_code == 401
+
+
+def test_refresh_parses_and_verifies_the_token_once(client, test_db, monkeypatch):
+    refresh_token = _login(client, test_db)
+    # Warm the shared header cache so only the claims are left to parse
+    ParsedToken(refresh_token)
+    hmac_calls, json_calls = [], []
+
+    def counting_hmac(*args, **kwargs):
+        hmac_calls.append(args)
+        return hmac.new(*args, **kwargs)
+
+    def counting_loads(*args, **kwargs):
+        json_calls.append(args)
+        return json.loads(*args, **kwargs)
+
+    monkeypatch.setattr(
+        token_parser,
+        "hmac",
+        SimpleNamespace(new=counting_hmac, compare_digest=hmac.compare_digest),
+    )
+    monkeypatch.setattr(token_parser, "json", SimpleNamespace(loads=counting_loads))
+    response = _refresh(client, refresh_token)
+
+    assert response.status_code == 200
+    assert len(hmac_calls) == 1
+    assert len(json_calls) == 1
+
+
+async def test_script_is_loaded_once_then_run_by_sha():
+    redis = RedisClient(settings.REDIS_URL, client=fakeredis.FakeAsyncRedis())
+    store = RefreshTokenStore(redis, family_ttl=60)
+    expires_at = int(time.time()) + 60
+
+    assert await store.rotate("a", "fam", expires_at) == ROTATED
+    assert await store.rotate("b", "fam", expires_at) == ROTATED
+    assert await store.rotate("a", "fam", expires_at) == REUSED
+    assert await store.rotate("c", "fam", expires_at) == REVOKED
+    assert redis.available
+
+
+async def test_rotation_fails_closed_while_redis_is_down():
+    redis = RedisClient(settings.REDIS_URL, client=fakeredis.FakeAsyncRedis())
+    redis.breaker.allow = lambda: False
+    store = RefreshTokenStore(redis, family_ttl=60)
+
+    # Each worker would otherwise accept the token once
+    with pytest.raises(RedisUnavailableError):
+        await store.rotate("a", "fam", int(time.time()) + 60)
+
+
+def test_refresh_answers_503_while_redis_is_down(client, test_db):
+    refresh_token = _login(client, test_db)
+    client.app.state.resources.redis.breaker.allow = lambda: False
+
+    response = _refresh(client, refresh_token)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
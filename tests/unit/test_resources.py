@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.core.resources import AppResources
+from src.db.session import create_db_engine
+from src.main import app
+
+
+def test_resources_created_in_lifespan(client):
+    """The lifespan stores a started resource container on app.state"""
+    resources = app.state.resources
+    assert isinstance(resources, AppResources)
+    assert resources.engine is not None
+    assert resources.session_factory is not None
+
+
+def test_pool_warm_up_preconnects(test_db):
+    """Warm-up leaves pre-connected connections idle in the pool"""
+    resources = AppResources(settings)
+    resources.engine = create_db_engine(settings.TEST_DATABASE_URL)
+    try:
+        resources.warm_up()
+        expected = min(settings.DB_POOL_WARMUP, settings.DB_POOL_SIZE)
+        assert resources.engine.pool.checkedin() == expected
+    finally:
+        resources.engine.dispose()
+
+
+def test_resources_released_on_shutdown():
+    """Shutdown disposes the engine opened at startup"""
+    with TestClient(app):
+        resources = app.state.resources
+        assert resources.engine is not None
+    assert resources.engine is None
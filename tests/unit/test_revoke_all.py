@@ -0,0 +1,106 @@
+import time
+
+from src.core.security import get_password_hash
+from src.core.token_manager import TokenBlacklist
+from src.db.models.user import User
+
+
+def _login(client, test_db, email="everywhere@example.com"):
+    db = test_db()
+    if not db.query(User).filter(User.email == email).first():
+        db.add(User(email=email, hashed_password=get_password_hash("TestPass123")))
+        db.commit()
+    db.close()
+    return client.post(
+        "/api/v1/auth/login", data={"username": email, "password": "TestPass123"}
+    ).json()
+
+
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_logout_all_revokes_every_outstanding_token(client, test_db):
+    phone, laptop = _login(client, test_db), _login(client, test_db)
+
+    response = client.post(
+        "/api/v1/auth/logout-all", headers=_bearer(phone["access_token"])
+    )
+
+    assert response.status_code == 200
+    for tokens in (phone, laptop):
+        protected = client.get(
+            "/api/v1/auth/protected", headers=_bearer(tokens["access_token"])
+        )
+        assert protected.status_code == 401
+        refreshed = client.post(
+            "/api/v1/auth/refresh", headers=_bearer(tokens["refresh_token"])
+        )
+        assert refreshed.status_code == 401
+
+    fresh = _login(client, test_db)
+    assert (
+        client.get(
+            "/api/v1/auth/protected", headers=_bearer(fresh["access_token"])
+        ).status_code
+        == 200
+    )
+
+
+def test_refreshed_tokens_keep_the_generation(client, test_db):
+    tokens = _login(client, test_db)
+    refreshed = client.post(
+        "/api/v1/auth/refresh", headers=_bearer(tokens["refresh_token"])
+    ).json()
+
+    response = client.get(
+        "/api/v1/auth/protected", headers=_bearer(refreshed["access_token"])
+    )
+    assert response.status_code == 200
+
+
+def test_generation_check_is_served_from_cache(client, test_db, assert_max_queries):
+    headers = _bearer(_login(client, test_db)["access_token"])
+    client.get("/api/v1/auth/protected", headers=headers)
+
+    response = client.get("/api/v1/auth/protected", headers=headers)
+
+    assert response.status_code == 200
+    assert_max_queries(response, 0)
+
+
+def test_blacklist_drops_expired_entries():
+    blacklist = TokenBlacklist()
+    now = time.time()
+    blacklist.add("expired", now - 1)
+    blacklist.add("live", now + 60)
+
+    assert blacklist.prune() == 1
+    assert "expired" not in blacklist
+    assert "live" in blacklist
+
+
+def test_blacklist_prunes_itself_as_it_grows():
+    blacklist = TokenBlacklist()
+    past = time.time() - 1
+    for i in range(TokenBlacklist.MIN_PRUNE_SIZE * 3):
+        blacklist.add(f"jti-{i}", past)
+
+    assert len(blacklist) < TokenBlacklist.MIN_PRUNE_SIZE
+
+
+def test_logout_all_fails_closed_while_redis_is_down(client, test_db):
+    tokens = _login(client, test_db)
+    redis = client.app.state.resources.redis
+    redis.breaker.allow = lambda: False
+
+    response = client.post(
+        "/api/v1/auth/logout-all", headers=_bearer(tokens["access_token"])
+    )
+
+    assert response.status_code == 503
+    db = test_db()
+    user = db.query(User).filter(User.email == "everywhere@example.com").one()
+    # Nothing was revoked that a stale Redis cache could later hide
+    assert user.token_generation == 0
+    db.close()
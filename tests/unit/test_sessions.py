@@ -0,0 +1,134 @@
+import fakeredis
+import pytest
+
+from src.core.config import settings
+from src.core.redis_client import RedisClient
+from src.core.security import get_password_hash
+from src.core.sessions import SESSION_TOKEN_PREFIX, SessionStore
+from src.db.models.user import User
+
+
+def _store(**kwargs):
+    redis = RedisClient(settings.REDIS_URL, client=fakeredis.FakeAsyncRedis())
+    return SessionStore(redis, ttl=60, **kwargs)
+
+
+@pytest.fixture
+def session_login(client, test_db, monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_TOKEN_CLIENTS", "internal-app")
+    db = test_db()
+    db.add(
+        User(email="session@example.com", hashed_password=get_password_hash("Pass123"))
+    )
+    db.commit()
+    db.close()
+
+    def login(client_id="internal-app"):
+        return client.post(
+            "/api/v1/auth/login",
+            data={
+                "username": "session@example.com",
+                "password": "Pass123",
+                "client_id": client_id,
+            },
+        ).json()
+
+    return login
+
+
+async def test_sessions_slide_and_survive_cache_expiry():
+    store = _store(cache_ttl=0.001)
+    token = await store.create(5, "internal-app")
+    store.cache.clear()
+
+    session = await store.get(token)
+
+    assert (session.user_id, session.client_id) == (5, "internal-app")
+    key, user_key = store._keys(token)
+    assert await store.redis.redis.ttl(key) >= 59
+    assert await store.redis.redis.ttl(user_key) >= 59
+    # Only a digest of the token is stored
+    assert not await store.redis.redis.exists(f"session:{token}")
+
+
+async def test_session_and_index_keys_share_a_cluster_slot():
+    store = _store()
+    token = await store.create(5)
+
+    key, user_key = store._keys(token)
+    assert key.startswith("session:{5}:") and user_key.endswith(":{5}")
+    assert await store.get(SESSION_TOKEN_PREFIX + "not-a-session") is None
+
+
+async def test_expired_sessions_leave_the_index():
+    store = _store()
+    first = await store.create(5)
+    second = await store.create(5)
+    live = await store.create(5)
+    first_key, user_key = store._keys(first)
+    second_key, _ = store._keys(second)
+    await store.redis.redis.delete(first_key, second_key)
+    store.cache.clear()
+
+    # A lookup of an expired session drops it; touching the index prunes others
+    assert await store.get(first) is None
+    assert await store.get(live) is not None
+    assert await store.redis.redis.smembers(user_key) == {store._keys(live)[0].encode()}
+
+
+async def test_revoke_and_revoke_all():
+    store = _store()
+    first = await store.create(5)
+    second = await store.create(5)
+    other = await store.create(6)
+
+    await store.revoke(first)
+    assert await store.get(first) is None
+    assert await store.revoke_all(5) == 1
+    assert await store.get(second) is None
+    assert (await store.get(other)).user_id == 6
+
+
+async def test_sessions_work_from_fallback_while_redis_is_down():
+    store = _store()
+    store.redis.breaker.allow = lambda: False
+    token = await store.create(5)
+    store.cache.clear()
+
+    assert (await store.get(token)).user_id == 5
+    assert await store.revoke_all(5) == 1
+    assert await store.get(token) is None
+
+
+def test_configured_client_gets_opaque_token(client, session_login):
+    body = session_login()
+
+    assert body["access_token"].startswith(SESSION_TOKEN_PREFIX)
+    assert "refresh_token" not in body
+    headers = {"Authorization": f"Bearer {body['access_token']}"}
+    assert client.get("/api/v1/auth/protected", headers=headers).status_code == 200
+    assert client.post("/api/v1/auth/verify", headers=headers).status_code == 200
+
+
+def test_other_clients_still_get_jwts(session_login):
+    body = session_login(client_id="mobile-app")
+    assert body["access_token"].count(".") == 2
+    assert "refresh_token" in body
+
+
+def test_logout_and_logout_all_end_sessions(client, session_login):
+    first, second = session_login(), session_login()
+    first_headers = {"Authorization": f"Bearer {first['access_token']}"}
+    second_headers = {"Authorization": f"Bearer {second['access_token']}"}
+
+    assert client.post("/api/v1/auth/logout", headers=first_headers).status_code == 200
+    assert (
+        client.get("/api/v1/auth/protected", headers=first_headers).status_code == 401
+    )
+
+    third_headers = {"Authorization": f"Bearer {session_login()['access_token']}"}
+    response = client.post("/api/v1/auth/logout-all", headers=third_headers)
+    assert response.json()["revoked_sessions"] == 2
+    assert (
+        client.get("/api/v1/auth/protected", headers=second_headers).status_code == 401
+    )
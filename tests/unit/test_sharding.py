@@ -0,0 +1,290 @@
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+from src.core.config import settings
+from src.core.security import get_password_hash
+from src.db import repositories
+from src.db.instrumentation import count_queries
+from src.db.models import Base
+from src.db.models.shard import ShardBucket
+from src.db.models.user import User
+from src.db.repositories import (
+    create_sharded_user,
+    get_sharded_user,
+    get_sharded_user_by_email,
+    get_sharded_users_by_emails,
+    get_sharded_users_by_ids,
+    iter_registered_emails,
+    list_sharded_users,
+)
+from src.db.resharding import (
+    backfill_directory,
+    pin_bucket_map,
+    plan_moves,
+    read_bucket_map,
+    reshard,
+)
+from src.db.sharding import ShardRouter, bucket_expression, bucket_for
+
+SHARDS = 3
+
+
+def _shard_url(index: int) -> str:
+    url = make_url(settings.TEST_DATABASE_URL)
+    return url.set(database=f"{url.database}_shard{index}").render_as_string(
+        hide_password=False
+    )
+
+
+@pytest.fixture(autouse=True)
+def cheap_hashes(monkeypatch):
+    """These tests create many users; Argon2 cost is not what they measure."""
+    monkeypatch.setattr(settings, "ARGON2_TIME_COST", 1)
+    monkeypatch.setattr(settings, "ARGON2_MEMORY_COST", 8)
+    monkeypatch.setattr(settings, "ARGON2_PARALLELISM", 1)
+
+
+@pytest.fixture
+def shard_engines(test_db):
+    """Several local Postgres databases with the users schema, emptied after."""
+    admin = create_engine(settings.TEST_DATABASE_URL, isolation_level="AUTOCOMMIT")
+    with admin.connect() as connection:
+        existing = set(
+            connection.execute(text("SELECT datname FROM pg_database")).scalars()
+        )
+        for index in range(SHARDS):
+            name = make_url(_shard_url(index)).database
+            if name not in existing:
+                connection.execute(text(f'CREATE DATABASE "{name}"'))
+    admin.dispose()
+
+    engines = [create_engine(_shard_url(index)) for index in range(SHARDS)]
+    for engine in engines:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+    yield engines
+    for engine in engines:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def _router(test_db, engines, buckets=64):
+    return ShardRouter(
+        test_db, [sessionmaker(bind=engine) for engine in engines], buckets
+    )
+
+
+def _users_on(engine):
+    with engine.connect() as connection:
+        return set(connection.execute(select(User.id)).scalars())
+
+
+def test_bucket_hash_matches_sql(test_db):
+    db = test_db()
+    for user_id in (1, 2, 77, 2**31 - 1):
+        in_sql = db.execute(select(bucket_expression(user_id, 1024))).scalar()
+        assert in_sql == bucket_for(user_id, 1024)
+    db.close()
+
+
+def test_unsharded_router_uses_the_main_database(test_db):
+    router = ShardRouter(test_db, [test_db])
+    assert not router.sharded
+    user = create_sharded_user(router, "Solo@Example.com", "Pass1234!")
+    assert get_sharded_user_by_email(router, "solo@example.com").id == user.id
+    assert list(iter_registered_emails(router)) == ["Solo@Example.com"]
+
+
+def test_users_are_routed_by_id(test_db, shard_engines):
+    router = _router(test_db, shard_engines[:2])
+    users = [
+        create_sharded_user(router, f"User{i}@Example.com", "Pass1234!")
+        for i in range(20)
+    ]
+
+    for user in users:
+        assert user.id in _users_on(shard_engines[router.shard_for(user.id)])
+        assert get_sharded_user(router, user.id).email == user.email
+    assert all(_users_on(engine) for engine in shard_engines[:2])
+
+    found = get_sharded_user_by_email(router, "user7@EXAMPLE.com")
+    assert found is not None and found.id == users[7].id
+    assert get_sharded_user_by_email(router, "nobody@example.com") is None
+    # Unique across shards, whatever the case
+    assert create_sharded_user(router, "USER3@example.com", "Pass1234!") is None
+    assert len(list(iter_registered_emails(router))) == 20
+    router.dispose()
+
+
+def test_taken_email_is_rejected_before_hashing(test_db, shard_engines, monkeypatch):
+    router = _router(test_db, shard_engines[:2])
+    create_sharded_user(router, "taken@example.com", "Pass1234!")
+
+    def failing_hash(password):
+        raise RuntimeError("hashing failed")
+
+    monkeypatch.setattr(repositories, "get_password_hash", failing_hash)
+    assert create_sharded_user(router, "TAKEN@example.com", "Pass1234!") is None
+
+    # A failed signup releases its claim on the email
+    with pytest.raises(RuntimeError):
+        create_sharded_user(router, "retry@example.com", "Pass1234!")
+    monkeypatch.setattr(repositories, "get_password_hash", get_password_hash)
+    assert create_sharded_user(router, "retry@example.com", "Pass1234!") is not None
+    router.dispose()
+
+
+def test_listing_gathers_every_shard_in_id_order(test_db, shard_engines):
+    router = _router(test_db, shard_engines)
+    ids = [
+        create_sharded_user(router, f"list{i}@example.com", "Pass1234!").id
+        for i in range(15)
+    ]
+
+    first = list_sharded_users(router, limit=10)
+    rest = list_sharded_users(router, limit=10, after_id=first[-1].id)
+    assert [user.id for user in first + rest] == sorted(ids)
+    router.dispose()
+
+
+def test_batched_lookups_query_each_shard_once(test_db, shard_engines):
+    router = _router(test_db, shard_engines)
+    users = [
+        create_sharded_user(router, f"Many{i}@Example.com", "Pass1234!")
+        for i in range(12)
+    ]
+    ids = [user.id for user in users]
+
+    with count_queries() as stats:
+        by_id = get_sharded_users_by_ids(router, ids)
+    assert sorted(by_id) == sorted(ids)
+    assert stats.count == len({router.shard_for(user_id) for user_id in ids})
+
+    by_email = get_sharded_users_by_emails(router, ["many2@example.com", "x@y.z"])
+    assert list(by_email) == ["many2@example.com"]
+    assert by_email["many2@example.com"].id == ids[2]
+    router.dispose()
+
+
+def test_map_for_unknown_shards_is_ignored(test_db, shard_engines):
+    router = _router(test_db, shard_engines[:2])
+    db = test_db()
+    db.add(ShardBucket(bucket=5, shard=7))
+    db.commit()
+    db.close()
+
+    before = list(router.bucket_map)
+    router.load_map()
+    assert router.bucket_map == before
+    router.dispose()
+
+
+def test_plan_moves_only_relocates_the_excess():
+    moves = plan_moves([bucket % 2 for bucket in range(64)], 3)
+    assert 20 <= len(moves) <= 22
+    assert set(moves.values()) == {2}
+
+
+def test_online_reshard_from_two_to_three_shards(test_db, shard_engines):
+    buckets = 64
+    two = _router(test_db, shard_engines[:2], buckets)
+    ids = [
+        create_sharded_user(two, f"move{i}@example.com", "Pass1234!").id
+        for i in range(60)
+    ]
+    two.dispose()
+
+    pin_bucket_map(test_db.kw["bind"], buckets, 2)
+    three = _router(test_db, shard_engines, buckets)
+    three.load_map()
+    # Pinned: adding the third URL does not move anyone yet
+    assert all(get_sharded_user(three, user_id) for user_id in ids)
+    assert not _users_on(shard_engines[2])
+
+    moves = reshard(
+        test_db.kw["bind"], shard_engines, buckets, grace=0, log=lambda _: None
+    )
+    three.load_map()
+
+    assert set(moves.values()) == {2}
+    assert read_bucket_map(test_db.kw["bind"], buckets) == three.bucket_map
+    assert all(get_sharded_user(three, user_id) for user_id in ids)
+    counts = [len(_users_on(engine)) for engine in shard_engines]
+    assert sum(counts) == len(ids) and min(counts) > 0
+    three.dispose()
+
+
+def test_backfill_registers_existing_users(test_db, shard_engines):
+    with shard_engines[0].begin() as connection:
+        connection.execute(
+            User.__table__.insert(),
+            [
+                {"id": 41, "email": "Old@Example.com", "hashed_password": "x"},
+                {"id": 42, "email": "older@example.com", "hashed_password": "x"},
+            ],
+        )
+    directory = test_db.kw["bind"]
+    assert backfill_directory(directory, shard_engines) == 2
+    assert backfill_directory(directory, shard_engines) == 0
+
+    router = _router(test_db, shard_engines[:1])
+    assert router.sharded
+    user = create_sharded_user(router, "new@example.com", "Pass1234!")
+    assert user.id > 42
+    db = test_db()
+    assert db.execute(select(func.count()).select_from(User)).scalar() == 0
+    db.close()
+
+
+def test_backfill_reports_users_that_clash(test_db, shard_engines):
+    with shard_engines[0].begin() as connection:
+        connection.execute(
+            User.__table__.insert(),
+            [{"id": 41, "email": "Twice@Example.com", "hashed_password": "x"}],
+        )
+    with shard_engines[1].begin() as connection:
+        connection.execute(
+            User.__table__.insert(),
+            [
+                {"id": 42, "email": "twice@example.com", "hashed_password": "x"},
+                {"id": 43, "email": "once@example.com", "hashed_password": "x"},
+            ],
+        )
+    directory = test_db.kw["bind"]
+
+    with pytest.raises(RuntimeError, match="1 clash.*42 <twice@example.com>"):
+        backfill_directory(directory, shard_engines[:2])
+    # Everyone else is registered, and a re-run only reports the clash again
+    router = _router(test_db, shard_engines[:2])
+    assert get_sharded_user_by_email(router, "once@example.com").id == 43
+    with pytest.raises(RuntimeError, match="Registered 0 users; 1 clash"):
+        backfill_directory(directory, shard_engines[:2])
+    router.dispose()
+
+
+def test_app_routes_signup_and_login(shard_engines, monkeypatch, request):
+    urls = ",".join(_shard_url(index) for index in range(2))
+    monkeypatch.setattr(settings, "DATABASE_SHARD_URLS", urls)
+    client = request.getfixturevalue("client")
+    shards = client.app.state.resources.shards
+    assert shards.sharded and len(shards.shards) == 2
+
+    ids = []
+    for i in range(6):
+        response = client.post(
+            "/api/v1/users",
+            json={"email": f"App{i}@Example.com", "password": "Pass1234!"},
+        )
+        assert response.status_code == 200
+        ids.append(response.json()["id"])
+    assert all(_users_on(engine) for engine in shard_engines[:2])
+
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": "app4@example.com", "password": "Pass1234!"},
+    )
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/api/v1/users/me", headers=headers).json()["id"] == ids[4]
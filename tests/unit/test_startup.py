@@ -0,0 +1,139 @@
+import subprocess
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, pool, text
+from sqlalchemy.engine import make_url
+
+from src.core.config import settings
+from src.db import migrate as migrate_module
+from src.db.migrate import advisory_lock, head_revisions, migrate
+from src.utils.startup import wait_for
+
+
+@pytest.fixture
+def empty_database():
+    """A local database with nothing in it, emptied again afterwards."""
+    url = make_url(settings.TEST_DATABASE_URL)
+    url = url.set(database=f"{url.database}_migrate").render_as_string(
+        hide_password=False
+    )
+    admin = create_engine(settings.TEST_DATABASE_URL, isolation_level="AUTOCOMMIT")
+    with admin.connect() as connection:
+        name = make_url(url).database
+        if not connection.execute(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": name}
+        ).scalar():
+            connection.execute(text(f'CREATE DATABASE "{name}"'))
+    admin.dispose()
+
+    engine = create_engine(url, poolclass=pool.NullPool)
+
+    def reset():
+        with engine.begin() as connection:
+            connection.execute(text("DROP SCHEMA public CASCADE; CREATE SCHEMA public"))
+
+    reset()
+    yield url
+    reset()
+    engine.dispose()
+
+
+def test_wait_for_retries_until_the_check_passes():
+    failures = iter([ConnectionError("refused")] * 3)
+
+    def check():
+        error = next(failures, None)
+        if error:
+            raise error
+
+    waited = wait_for("service", check, time.monotonic() + 5, base_delay=0.01)
+    assert waited < 1
+
+
+def test_wait_for_gives_up_at_the_deadline():
+    def check():
+        raise ConnectionError("refused")
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError, match="service not reachable.*refused"):
+        wait_for("service", check, started + 0.2, base_delay=0.01)
+    assert time.monotonic() - started < 1
+
+
+def test_database_at_head_skips_alembic(empty_database, monkeypatch):
+    assert migrate(empty_database) == "migrated"
+
+    def fail(url):
+        raise AssertionError("alembic should not run")
+
+    monkeypatch.setattr(migrate_module, "run_alembic_upgrade", fail)
+    assert migrate(empty_database) == "up to date"
+
+
+def test_replicas_migrate_one_at_a_time(empty_database):
+    engine = create_engine(empty_database, poolclass=pool.NullPool)
+    outcome = []
+    with advisory_lock(engine):
+        replica = threading.Thread(
+            target=lambda: outcome.append(migrate(empty_database))
+        )
+        replica.start()
+        time.sleep(0.3)
+        # Waiting on the lock while this replica migrates
+        assert replica.is_alive()
+        migrate_module.run_alembic_upgrade(empty_database)
+    replica.join(timeout=10)
+    engine.dispose()
+
+    assert outcome == ["migrated by another replica"]
+    with create_engine(empty_database).connect() as connection:
+        assert (
+            set(
+                connection.execute(
+                    text("SELECT version_num FROM alembic_version")
+                ).scalars()
+            )
+            == head_revisions()
+        )
+
+
+def test_failed_email_index_build_keeps_the_unique_email_index(empty_database):
+    migrate_module.run_alembic_upgrade(empty_database, "3f9c2a7d1b64")
+    engine = create_engine(empty_database, poolclass=pool.NullPool)
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO users (email, hashed_password) "
+                "VALUES ('Twice@example.com', 'x'), ('twice@example.com', 'x')"
+            )
+        )
+
+    def email_indexes():
+        with engine.connect() as connection:
+            return dict(
+                connection.execute(
+                    text(
+                        "SELECT c.relname, i.indisvalid FROM pg_index i "
+                        "JOIN pg_class c ON c.oid = i.indexrelid "
+                        "WHERE c.relname LIKE 'ix_users_email%'"
+                    )
+                ).all()
+            )
+
+    # The concurrent build fails, and so does a retry over its invalid index;
+    # neither drops the index that still enforces uniqueness
+    for _ in range(2):
+        with pytest.raises(subprocess.CalledProcessError):
+            migrate_module.run_alembic_upgrade(empty_database)
+        assert email_indexes() == {
+            "ix_users_email": True,
+            "ix_users_email_lower": False,
+        }
+
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM users WHERE email = 'Twice@example.com'"))
+    migrate_module.run_alembic_upgrade(empty_database)
+    assert email_indexes() == {"ix_users_email_lower": True}
+    engine.dispose()
@@ -0,0 +1,64 @@
+import jwt
+import pytest
+
+from src.core.config import settings
+from src.core.token_manager import create_token_pair, get_token_minter
+from src.core.token_minter import TokenMinter
+from src.core.token_parser import ParsedToken
+
+
+def test_pair_is_linked_and_verifies():
+    tokens = create_token_pair({"user_id": 7, "gen": 2})
+    access = ParsedToken(tokens.access_token).verify(settings.TOKEN_TYPE_ACCESS)
+    refresh = ParsedToken(tokens.refresh_token).verify(settings.TOKEN_TYPE_REFRESH)
+
+    assert (access.user_id, access.gen) == (7, 2)
+    assert access.jti == tokens.access_jti
+    assert access.refresh_jti == refresh.jti == tokens.refresh_jti
+    assert refresh.access_jti == tokens.access_jti
+    assert refresh.fam == refresh.jti
+    assert access.iat == refresh.iat and isinstance(access.iat, int)
+    assert len(access.jti) == 22 and access.jti != refresh.jti
+
+
+def test_rotated_pair_keeps_family():
+    tokens = create_token_pair({"user_id": 7}, family="fam-1")
+    assert ParsedToken(tokens.refresh_token).verify().fam == "fam-1"
+
+
+def test_output_matches_pyjwt():
+    token, _ = get_token_minter().access_token({"user_id": 7})
+    assert jwt.get_unverified_header(token) == {
+        "alg": settings.ALGORITHM,
+        "typ": "JWT",
+    }
+    payload = jwt.decode(
+        token,
+        settings.SECRET_KEY,
+        algorithms=[settings.ALGORITHM],
+        audience="test-audience",
+        issuer=settings.TOKEN_ISSUER,
+    )
+    assert payload["user_id"] == 7
+
+
+def test_caller_claims_cannot_duplicate_static_ones():
+    token, _ = get_token_minter().access_token({"user_id": 7, "aud": "other"})
+    payload = jwt.utils.base64url_decode(token.split(".")[1])
+    assert payload.count(b'"aud"') == 1
+    assert jwt.decode(token, options={"verify_signature": False})["aud"] == (
+        "test-audience"
+    )
+
+
+def test_minter_follows_settings(monkeypatch):
+    minter = get_token_minter()
+    assert get_token_minter() is minter
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_EXPIRE_MINUTES", 1)
+    assert get_token_minter() is not minter
+    assert get_token_minter().access_ttl == 60
+
+
+def test_rejects_unsupported_algorithm():
+    with pytest.raises(ValueError):
+        TokenMinter("a", "b", "RS256", "iss", "aud", 60, 60)
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+from src.core.config import settings
+from src.core.exceptions import InvalidTokenError
+from src.core.token_manager import (
+    TokenBlacklist,
+    create_access_token,
+    create_refresh_token,
+    decode_token,
+    invalidate_token,
+)
+from src.core.token_parser import ParsedToken, TokenClaims
+
+
+def test_claims_are_typed_and_slotted():
+    token, jti = create_access_token({"user_id": 7})
+    claims = ParsedToken(token).verify(settings.TOKEN_TYPE_ACCESS)
+
+    assert isinstance(claims, TokenClaims)
+    assert (claims.user_id, claims.jti, claims.type) == (7, jti, "access")
+    assert not hasattr(claims, "__dict__")
+
+
+def test_key_follows_type_claim():
+    refresh = create_refresh_token({"user_id": 7})
+    assert ParsedToken(refresh).verify().type == settings.TOKEN_TYPE_REFRESH
+    with pytest.raises(InvalidTokenError):
+        ParsedToken(refresh).verify(settings.TOKEN_TYPE_ACCESS)
+
+
+def test_verification_is_cached_per_token():
+    token, _ = create_access_token({"user_id": 7})
+    parsed = ParsedToken(token)
+    assert parsed.verify() is parsed.verify(settings.TOKEN_TYPE_ACCESS)
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "",
+        "garbage",
+        "a.b.c",
+        create_access_token({"user_id": 7})[0][:-4] + "AAAA",
+        jwt.encode({"type": "access"}, "not-the-server-key-" * 2, algorithm="HS256"),
+        jwt.encode({"type": "access"}, settings.SECRET_KEY, algorithm="HS512"),
+    ],
+)
+def test_malformed_or_forged_tokens_are_rejected(token):
+    with pytest.raises(InvalidTokenError):
+        ParsedToken(token).verify()
+
+
+def test_expired_and_wrong_audience_are_rejected():
+    base = {"type": "access", "aud": "test-audience"}
+    expired = jwt.encode(
+        {**base, "exp": datetime.utcnow() - timedelta(seconds=1)},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+    with pytest.raises(InvalidTokenError, match="expired"):
+        ParsedToken(expired).verify()
+
+    foreign = jwt.encode(
+        {**base, "aud": "someone-else"}, settings.SECRET_KEY, algorithm="HS256"
+    )
+    with pytest.raises(InvalidTokenError, match="audience"):
+        ParsedToken(foreign).verify()
+
+
+async def test_invalidate_reuses_the_parsed_token():
+    blacklist = TokenBlacklist()
+    token, jti = create_access_token({"user_id": 7})
+    parsed = ParsedToken(token)
+    await decode_token(parsed, blacklist)
+
+    invalidate_token(parsed, blacklist)
+
+    assert jti in blacklist
+    with pytest.raises(InvalidTokenError, match="invalidated"):
+        await decode_token(parsed, blacklist)
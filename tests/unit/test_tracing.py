@@ -0,0 +1,230 @@
+import time
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from src.core import tracing
+from src.core.config import settings
+from src.core.security import get_password_hash
+from src.core.tail_sampling import TailSamplingProcessor
+from src.db.models.user import User
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_SPAN_ID = "00f067aa0ba902b7"
+
+
+class CollectorStandIn:
+    """Local OTLP collector stand-in keeping every exported span"""
+
+    def __init__(self, provider, exporter):
+        self.provider = provider
+        self.exporter = exporter
+
+    def spans(self):
+        self.provider.force_flush()
+        return self.exporter.get_finished_spans()
+
+    def clear(self):
+        self.provider.force_flush()
+        self.exporter.clear()
+
+
+@pytest.fixture
+def collector(client, monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 1.0)
+    exporter = InMemorySpanExporter()
+    provider = tracing.configure_tracing(settings, exporter=exporter)
+    yield CollectorStandIn(provider, exporter)
+    tracing.shutdown_tracing(provider)
+
+
+def test_login_trace_covers_middleware_auth_db_and_hashing(client, test_db, collector):
+    db = test_db()
+    db.add(
+        User(email="trace@example.com", hashed_password=get_password_hash("Pass1234"))
+    )
+    db.commit()
+    db.close()
+    collector.clear()
+
+    client.post(
+        "/api/v1/auth/login",
+        data={"username": "trace@example.com", "password": "Pass1234"},
+    )
+    spans = collector.spans()
+    names = {span.name for span in spans}
+
+    for name in (
+        "POST /api/v1/auth/login",
+        "middleware.rate_limit",
+        "repo.get_users_by_emails",
+        "db.query",
+        "security.verify_password",
+    ):
+        assert name in names
+    # The user lookup batch may serve several requests: it is a trace of its
+    # own, linked to each caller
+    by_name = {span.name: span for span in spans}
+    request_trace = by_name["POST /api/v1/auth/login"].context.trace_id
+    batch = by_name["batch_loader.users_by_email"]
+    assert [link.context.trace_id for link in batch.links] == [request_trace]
+    assert by_name["repo.get_users_by_emails"].context.trace_id == (
+        batch.context.trace_id
+    )
+    assert len({span.context.trace_id for span in spans}) == 2
+
+
+def test_w3c_trace_context_is_continued(client, collector):
+    traceparent = f"00-{TRACE_ID}-{PARENT_SPAN_ID}-01"
+    response = client.get("/api/v1/users/999", headers={"traceparent": traceparent})
+
+    assert response.headers["traceparent"].startswith(f"00-{TRACE_ID}-")
+    server_span = next(
+        span for span in collector.spans() if span.name == "GET /api/v1/users/{user_id}"
+    )
+    assert format(server_span.context.trace_id, "032x") == TRACE_ID
+    assert format(server_span.parent.span_id, "016x") == PARENT_SPAN_ID
+
+
+@pytest.mark.parametrize(
+    "latency_threshold, kept",
+    [(0.0, True), (60.0, False)],
+)
+def test_tail_sampling_keeps_slow_traces(latency_threshold, kept):
+    span_exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(
+        TailSamplingProcessor(
+            SimpleSpanProcessor(span_exporter),
+            sample_rate=0.0,
+            latency_threshold=latency_threshold,
+        )
+    )
+    tracer = provider.get_tracer("test")
+    with tracer.start_as_current_span("root"):
+        with tracer.start_as_current_span("child"):
+            pass
+
+    assert len(span_exporter.get_finished_spans()) == (2 if kept else 0)
+
+
+def test_tail_sampling_keeps_traces_with_errors():
+    span_exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(
+        TailSamplingProcessor(
+            SimpleSpanProcessor(span_exporter), sample_rate=0.0, latency_threshold=60
+        )
+    )
+    tracer = provider.get_tracer("test")
+    with pytest.raises(ValueError):
+        with tracer.start_as_current_span("root"):
+            with tracer.start_as_current_span("child"):
+                raise ValueError("boom")
+
+    assert {span.name for span in span_exporter.get_finished_spans()} == {
+        "root",
+        "child",
+    }
+
+
+@pytest.mark.parametrize(
+    "latency_threshold, kept",
+    [(0.0, {"root", "late"}), (60.0, set())],
+)
+def test_tail_sampling_applies_the_decision_to_late_spans(latency_threshold, kept):
+    span_exporter = InMemorySpanExporter()
+    processor = TailSamplingProcessor(
+        SimpleSpanProcessor(span_exporter),
+        sample_rate=0.0,
+        latency_threshold=latency_threshold,
+    )
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    tracer = provider.get_tracer("test")
+    with tracer.start_as_current_span("root"):
+        late = tracer.start_span("late")
+    late.end()
+
+    assert {span.name for span in span_exporter.get_finished_spans()} == kept
+    assert not processor._pending
+
+
+def test_tail_sampling_drops_traces_whose_root_never_ends():
+    span_exporter = InMemorySpanExporter()
+    processor = TailSamplingProcessor(
+        SimpleSpanProcessor(span_exporter), pending_timeout=0.05
+    )
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    tracer = provider.get_tracer("test")
+    for _ in range(3):
+        root = tracer.start_span("root")
+        tracer.start_span("orphan", context=trace.set_span_in_context(root)).end()
+        time.sleep(0.1)
+
+    # Each orphan expires the ones before it
+    assert list(processor._pending) == [root.get_span_context().trace_id]
+    assert not span_exporter.get_finished_spans()
+
+
+def test_tail_sampling_decides_each_call_of_a_trace():
+    span_exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(
+        TailSamplingProcessor(
+            SimpleSpanProcessor(span_exporter), sample_rate=0.0, latency_threshold=60
+        )
+    )
+    tracer = provider.get_tracer("test")
+    upstream = trace.set_span_in_context(
+        trace.NonRecordingSpan(
+            trace.SpanContext(
+                int(TRACE_ID, 16),
+                int(PARENT_SPAN_ID, 16),
+                is_remote=True,
+                trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED),
+            )
+        )
+    )
+
+    with tracer.start_as_current_span("first call", context=upstream):
+        with tracer.start_as_current_span("fast child"):
+            pass
+    with pytest.raises(ValueError):
+        with tracer.start_as_current_span("second call", context=upstream):
+            with tracer.start_as_current_span("failing child"):
+                raise ValueError("boom")
+
+    # The first call was dropped; the second is still judged on its own
+    assert {span.name for span in span_exporter.get_finished_spans()} == {
+        "second call",
+        "failing child",
+    }
+
+
+def test_tail_sampling_keeps_late_subtrees_with_their_parent():
+    span_exporter = InMemorySpanExporter()
+    processor = TailSamplingProcessor(
+        SimpleSpanProcessor(span_exporter), latency_threshold=0.0
+    )
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    tracer = provider.get_tracer("test")
+    with tracer.start_as_current_span("root"):
+        late = tracer.start_span("late")
+    tracer.start_span("later", context=trace.set_span_in_context(late)).end()
+    late.end()
+
+    assert {span.name for span in span_exporter.get_finished_spans()} == {
+        "root",
+        "late",
+        "later",
+    }
+    assert not processor._pending
@@ -25,6 +25,13 @@ def test_create_duplicate_user(client, test_user_data):
     assert response.status_code == status.HTTP_400_BAD_REQUEST
 
 
+def test_duplicate_check_ignores_case(client, test_user_data):
+    client.post("/api/v1/users", json=test_user_data)
+    upper = {**test_user_data, "email": test_user_data["email"].upper()}
+    response = client.post("/api/v1/users", json=upper)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 def test_get_user(client, test_user_data, auth_headers):
     """Test getting user details"""
     # Create user first